@@ -110,6 +110,16 @@ def run_infer_script(
     delay_feedback: float = 0.0,
     delay_mix: float = 0.5,
     sid: int = 0,
+    f0_cache: bool = True,
+    feature_cache: bool = True,
+    silence_gate: bool = False,
+    f0_autotune_key: str = "C",
+    f0_autotune_scale: str = "chromatic",
+    f0_autotune_speed: float = 0,
+    split_workers: int = 1,
+    precision: str = None,
+    precision_check: bool = False,
+    compile_models: bool = False,
 ):
     kwargs = {
         "audio_input_path": input_path,
@@ -125,8 +135,12 @@ def run_infer_script(
         "pth_path": pth_path,
         "index_path": index_path,
         "split_audio": split_audio,
+        "split_workers": split_workers,
         "f0_autotune": f0_autotune,
         "f0_autotune_strength": f0_autotune_strength,
+        "f0_autotune_key": f0_autotune_key,
+        "f0_autotune_scale": f0_autotune_scale,
+        "f0_autotune_speed": f0_autotune_speed,
         "clean_audio": clean_audio,
         "clean_strength": clean_strength,
         "export_format": export_format,
@@ -173,13 +187,29 @@ def run_infer_script(
         "delay_feedback": delay_feedback,
         "delay_mix": delay_mix,
         "sid": sid,
+        "f0_cache": f0_cache,
+        "feature_cache": feature_cache,
+        "silence_gate": silence_gate,
+        "precision": precision,
+        "compile_models": compile_models,
     }
     infer_pipeline = import_voice_converter()
+    if precision_check:
+        from rvc.infer.quantize import compare_precision
+
+        del kwargs["audio_input_path"], kwargs["audio_output_path"]
+        report = compare_precision(
+            infer_pipeline, input_path, precision or "int8", **kwargs
+        )
+        return f"Precision check of {input_path}: {report}", None
     infer_pipeline.convert_audio(
         **kwargs,
     )
-    return f"File {input_path} inferred successfully.", output_path.replace(
-        ".wav", f".{export_format.lower()}"
+    from rvc.infer.export import export_paths
+
+    return (
+        f"File {input_path} inferred successfully.",
+        export_paths(output_path, export_format)[0],
     )
 
 
@@ -244,6 +274,16 @@ def run_batch_infer_script(
     delay_feedback: float = 0.0,
     delay_mix: float = 0.5,
     sid: int = 0,
+    f0_cache: bool = True,
+    feature_cache: bool = True,
+    silence_gate: bool = False,
+    f0_autotune_key: str = "C",
+    f0_autotune_scale: str = "chromatic",
+    f0_autotune_speed: float = 0,
+    split_workers: int = 1,
+    workers: int = 1,
+    precision: str = None,
+    compile_models: bool = False,
 ):
     kwargs = {
         "audio_input_paths": input_folder,
@@ -259,8 +299,12 @@ def run_batch_infer_script(
         "pth_path": pth_path,
         "index_path": index_path,
         "split_audio": split_audio,
+        "split_workers": split_workers,
         "f0_autotune": f0_autotune,
         "f0_autotune_strength": f0_autotune_strength,
+        "f0_autotune_key": f0_autotune_key,
+        "f0_autotune_scale": f0_autotune_scale,
+        "f0_autotune_speed": f0_autotune_speed,
         "clean_audio": clean_audio,
         "clean_strength": clean_strength,
         "export_format": export_format,
@@ -307,6 +351,12 @@ def run_batch_infer_script(
         "delay_feedback": delay_feedback,
         "delay_mix": delay_mix,
         "sid": sid,
+        "f0_cache": f0_cache,
+        "feature_cache": feature_cache,
+        "silence_gate": silence_gate,
+        "workers": workers,
+        "precision": precision,
+        "compile_models": compile_models,
     }
     infer_pipeline = import_voice_converter()
     infer_pipeline.convert_audio_batch(
@@ -405,8 +455,11 @@ def run_tts_script(
         sliders=None,
     )
 
-    return f"Text {tts_text} synthesized successfully.", output_rvc_path.replace(
-        ".wav", f".{export_format.lower()}"
+    from rvc.infer.export import export_paths
+
+    return (
+        f"Text {tts_text} synthesized successfully.",
+        export_paths(output_rvc_path, export_format)[0],
     )
 
 
@@ -508,6 +561,7 @@ def run_train_script(
     d_pretrained_path: str = None,
     vocoder: str = "HiFi-GAN",
     checkpointing: bool = False,
+    index_type: str = "IVF-Flat",
 ):
 
     if pretrained == True:
@@ -551,28 +605,244 @@ def run_train_script(
         ),
     ]
     subprocess.run(command)
-    run_index_script(model_name, index_algorithm)
+    run_index_script(model_name, index_algorithm, index_type)
     return f"Model {model_name} trained successfully."
 
 
 # Index
-def run_index_script(model_name: str, index_algorithm: str):
+def run_index_script(
+    model_name: str, index_algorithm: str, index_type: str = "IVF-Flat"
+):
     index_script_path = os.path.join("rvc", "train", "process", "extract_index.py")
     command = [
         python,
         index_script_path,
         os.path.join(logs_path, model_name),
         index_algorithm,
+        index_type,
     ]
 
     subprocess.run(command)
     return f"Index file for {model_name} generated successfully."
 
 
+# Index benchmark
+def run_index_benchmark_script(model_name: str, queries: int = 2000):
+    import numpy as np
+    from rvc.infer.retrieval import benchmark_index_types
+
+    feature_dir = os.path.join(logs_path, model_name, "extracted")
+    features = [
+        np.load(os.path.join(feature_dir, name))
+        for name in sorted(os.listdir(feature_dir))
+    ]
+    # Hold out whole files as queries, so they are not in the indexes being measured.
+    query_files = 0
+    while query_files < len(features) - 1 and (
+        sum(len(f) for f in features[len(features) - query_files :]) < queries
+    ):
+        query_files += 1
+    split = len(features) - query_files
+    vectors = np.concatenate(features[:split]).astype(np.float32)
+    query_vectors = np.concatenate(features[split:])[:queries].astype(np.float32)
+
+    results = benchmark_index_types(vectors, query_vectors)
+    print(
+        f"{len(vectors)} indexed vectors, {len(query_vectors)} queries "
+        f"({len(query_vectors) / 50:.0f} s of audio)"
+    )
+    print(
+        f"{'Index':<10}{'Parameters':<14}{'Build (s)':>10}{'Recall@8':>10}"
+        f"{'ms / audio s':>14}"
+    )
+    for result in results:
+        print(
+            f"{result['index_type']:<10}{result['search_params']:<14}"
+            f"{result['build_s']:>10.2f}{result['recall']:>10.3f}"
+            f"{result['ms_per_audio_s']:>14.3f}"
+        )
+    return results
+
+
+# Inference benchmark
+def run_infer_benchmark_script(
+    sample_rate: int = 48000, frames: int = 500, runs: int = 5
+):
+    from rvc.infer.optimize import benchmark_vocoders
+
+    config = get_config()
+    results = benchmark_vocoders(
+        config.json_config, sample_rate, frames, runs, config.device
+    )
+    print(
+        f"Synthesizer.infer latency for {frames / 100:.1f} s of audio at {sample_rate} Hz"
+    )
+    print(
+        f"{'Vocoder':<14}{'Loaded (ms)':>13}{'Prepared (ms)':>15}{'Compiled (ms)':>15}"
+    )
+    for result in results:
+        compiled = (
+            f"{result['compiled_ms']:>15.1f}"
+            if result["compiled_ms"] is not None
+            else f"{'-':>15}"
+        )
+        print(
+            f"{result['vocoder']:<14}{result['loaded_ms']:>13.1f}"
+            f"{result['prepared_ms']:>15.1f}{compiled}"
+        )
+    return results
+
+
+# Front-end benchmark
+def run_frontend_benchmark_script(input_path: str = None, duration: float = 1800):
+    import tempfile
+    import numpy as np
+    import soundfile as sf
+    from rvc.infer.pipeline import benchmark_front_end
+
+    temp_path = None
+    if not input_path:
+        # A synthetic 44.1 kHz stereo recording, written block by block.
+        temp_path = os.path.join(tempfile.gettempdir(), "rvc_frontend_benchmark.wav")
+        rng = np.random.default_rng(0)
+        with sf.SoundFile(temp_path, "w", samplerate=44100, channels=2) as f:
+            for start in range(0, int(duration * 44100), 44100 * 10):
+                t = (start + np.arange(44100 * 10)) / 44100
+                tone = 0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(0.5 * t) > 0)
+                noise = 0.01 * rng.standard_normal((t.shape[0], 2))
+                f.write(
+                    (tone[:, None] + noise)[: int(duration * 44100) - start].astype(
+                        np.float32
+                    )
+                )
+        input_path = temp_path
+    try:
+        results = benchmark_front_end(input_path, get_config())
+    finally:
+        if temp_path is not None:
+            os.remove(temp_path)
+    print(f"{'Path':<9}{'Stage':<17}{'Time (s)':>10}{'Peak (MB)':>11}")
+    for result in results:
+        print(
+            f"{result['path']:<9}{result['stage']:<17}"
+            f"{result['seconds']:>10.2f}{result['peak_mb']:>11.1f}"
+        )
+    for path in ("float64", "float32"):
+        stages = [result for result in results if result["path"] == path]
+        print(
+            f"{path}: {sum(r['seconds'] for r in stages):.2f} s, "
+            f"largest stage peak {max(r['peak_mb'] for r in stages):.1f} MB"
+        )
+    return results
+
+
+# RMVPE decoder benchmark
+def run_rmvpe_benchmark_script(
+    frames: int = 30000,
+    runs: int = 5,
+    memory_minutes: float = 0,
+    reference_minutes: float = 5,
+    device: str = "cpu",
+):
+    from rvc.lib.predictors.RMVPE import (
+        benchmark_salience_decoder,
+        benchmark_segment_memory,
+    )
+
+    result = benchmark_salience_decoder(frames, runs)
+    print(
+        f"Checked {result['maps']} salience maps against the frame-by-frame decoder: "
+        + ("identical output." if result["matched"] else "OUTPUT DIFFERS.")
+    )
+    print(
+        f"{frames} frames ({frames / 100:.0f} s of audio): loop {result['loop_ms']:.1f} ms, "
+        f"vectorized {result['vectorized_ms']:.1f} ms"
+    )
+    if memory_minutes > 0:
+        result["memory"] = benchmark_segment_memory(
+            memory_minutes, reference_minutes, device=device
+        )
+        for name, rss in result["memory"].items():
+            print(
+                f"{name}: peak RSS {rss['peak_mb']:.0f} MB "
+                f"(+{rss['peak_mb'] - rss['before_mb']:.0f} MB during inference)"
+            )
+    return result
+
+
+# Autotune benchmark
+def run_autotune_benchmark_script(frames: int = 30000, runs: int = 5):
+    from rvc.infer.pipeline import benchmark_autotune
+
+    result = benchmark_autotune(get_config(), frames, runs)
+    print(
+        f"{result['same_note'] * 100:.2f}% of voiced frames land on the same note as the "
+        f"frame-by-frame loop, within {result['max_cents']:.2g} cents."
+    )
+    print(
+        f"{frames} frames ({frames / 100:.0f} s of audio): loop {result['loop_ms']:.1f} ms, "
+        f"vectorized {result['vectorized_ms']:.1f} ms"
+    )
+    return result
+
+
+# Split audio merge benchmark
+def run_merge_benchmark_script(segments: int = 300, runs: int = 3):
+    from rvc.lib.tools.split_audio import benchmark_merge
+
+    result = benchmark_merge(segments, runs)
+    print(
+        f"Merged {segments} segments ({result['seconds']:.0f} s of audio): "
+        + ("identical output." if result["matched"] else "OUTPUT DIFFERS.")
+    )
+    print(
+        f"concatenating {result['concat_ms']:.1f} ms, "
+        f"preallocated {result['preallocated_ms']:.1f} ms"
+    )
+    return result
+
+
+# Smoke test
+SMOKE_CHECKS = {
+    "prepare_for_inference": ("rvc.infer.optimize", "check_prepare_for_inference"),
+    "stream_normalization": ("rvc.infer.infer", "check_stream_normalization"),
+    "export_writer": ("rvc.infer.export", "check_export_writer"),
+    "effects_chain": ("rvc.infer.effects", "check_effects_chain"),
+}
+
+
+def run_smoke_test_script(checks: list = None):
+    import importlib
+
+    results = {}
+    for name, (module, function) in SMOKE_CHECKS.items():
+        if checks and name not in checks:
+            continue
+        try:
+            passed, detail = getattr(importlib.import_module(module), function)()
+        except Exception as error:
+            passed, detail = False, f"{type(error).__name__}: {error}"
+        results[name] = passed
+        print(f"{'PASS' if passed else 'FAIL'} {name}: {detail}")
+    print(f"{sum(results.values())} of {len(results)} checks passed.")
+    return results
+
+
 # Model information
 def run_model_information_script(pth_path: str):
-    print(model_information(pth_path))
-    return model_information(pth_path)
+    information = model_information(pth_path)
+    print(information)
+    return information
+
+
+# Pack model
+def run_pack_model_script(pth_path: str, float32: bool = False):
+    from rvc.infer.packed import pack_model
+
+    packed_path = pack_model(pth_path, float32=float32)
+    message = f"Packed '{pth_path}' into '{packed_path}'."
+    print(message)
+    return message, packed_path
 
 
 # Model blender
@@ -620,6 +890,34 @@ def run_audio_analyzer_script(
     return audio_info, plot_path
 
 
+# Serve
+def run_serve_script(
+    host: str = "127.0.0.1",
+    port: int = 6970,
+    max_batch: int = 8,
+    max_wait_ms: int = 50,
+    compile_models: bool = False,
+):
+    from rvc.infer.server import run_server
+
+    run_server(host, port, max_batch, max_wait_ms, compile_models)
+
+
+# ONNX export
+def run_onnx_export_script(
+    pth_path: str,
+    embedder_model: str = "contentvec",
+    embedder_model_custom: str = None,
+    precision: str = None,
+):
+    infer_pipeline = import_voice_converter()
+    infer_pipeline.set_precision(precision)
+    report = infer_pipeline.check_onnx_parity(
+        pth_path, embedder_model, embedder_model_custom
+    )
+    return f"ONNX models of {pth_path} exported: {report}"
+
+
 # Parse arguments
 def parse_arguments():
     parser = argparse.ArgumentParser(
@@ -718,6 +1016,13 @@ def parse_arguments():
         help=split_audio_description,
         default=False,
     )
+    split_workers_description = "Number of split audio chunks converted concurrently. Only used with split_audio."
+    infer_parser.add_argument(
+        "--split_workers",
+        type=int,
+        help=split_workers_description,
+        default=1,
+    )
     f0_autotune_description = "Apply a light autotune to the inferred audio. Particularly useful for singing voice conversions."
     infer_parser.add_argument(
         "--f0_autotune",
@@ -734,6 +1039,37 @@ def parse_arguments():
         choices=[(i / 10) for i in range(11)],
         default=1.0,
     )
+    f0_autotune_key_description = "Set the tonic of the scale the autotune snaps to."
+    infer_parser.add_argument(
+        "--f0_autotune_key",
+        type=str,
+        help=f0_autotune_key_description,
+        choices=["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"],
+        default="C",
+    )
+    f0_autotune_scale_description = (
+        "Set the scale the autotune snaps to. 'chromatic' snaps to every semitone."
+    )
+    infer_parser.add_argument(
+        "--f0_autotune_scale",
+        type=str,
+        help=f0_autotune_scale_description,
+        choices=[
+            "chromatic",
+            "major",
+            "minor",
+            "pentatonic_major",
+            "pentatonic_minor",
+        ],
+        default="chromatic",
+    )
+    f0_autotune_speed_description = "Set the retune speed of the autotune in milliseconds. 0 snaps instantly, higher values keep note transitions and vibrato more natural."
+    infer_parser.add_argument(
+        "--f0_autotune_speed",
+        type=float,
+        help=f0_autotune_speed_description,
+        default=0,
+    )
     clean_audio_description = "Clean the output audio using noise reduction algorithms. Recommended for speech conversions."
     infer_parser.add_argument(
         "--clean_audio",
@@ -750,13 +1086,16 @@ def parse_arguments():
         choices=[(i / 10) for i in range(11)],
         default=0.7,
     )
-    export_format_description = "Select the desired output audio format."
+    export_format_description = (
+        "Select the desired output audio format, or several to write them all at once."
+    )
     infer_parser.add_argument(
         "--export_format",
         type=str,
+        nargs="+",
         help=export_format_description,
         choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
-        default="WAV",
+        default=["WAV"],
     )
     embedder_model_description = (
         "Choose the model used for generating speaker embeddings."
@@ -1153,6 +1492,65 @@ def parse_arguments():
         required=False,
     )
 
+    f0_cache_description = "Reuse F0 contours cached from earlier runs on the same input. Set to False to always re-estimate the pitch."
+    infer_parser.add_argument(
+        "--f0_cache",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=f0_cache_description,
+        default=True,
+        required=False,
+    )
+
+    feature_cache_description = "Reuse the decoded input audio and embedder features cached from earlier runs on the same input. Set to False to always recompute them."
+    infer_parser.add_argument(
+        "--feature_cache",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=feature_cache_description,
+        default=True,
+        required=False,
+    )
+
+    silence_gate_description = "Skip long silences instead of converting them, filling them with silence in the output. Off by default, so the whole input is converted."
+    infer_parser.add_argument(
+        "--silence_gate",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=silence_gate_description,
+        default=False,
+        required=False,
+    )
+
+    precision_description = "Inference precision on CPU. int8 applies dynamic int8 quantization to the embedder and the text encoder of the voice model; GPUs always run fp32. Defaults to the configured precision."
+    infer_parser.add_argument(
+        "--precision",
+        type=str,
+        choices=["fp32", "int8"],
+        help=precision_description,
+        default=None,
+        required=False,
+    )
+
+    infer_parser.add_argument(
+        "--precision_check",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help="Instead of writing an output, convert the input at fp32 and at the selected precision (int8 if none) and report the speedup and the mel-spectral distance between the two outputs.",
+        default=False,
+        required=False,
+    )
+
+    compile_models_description = "Compile the voice model with TorchScript on first use and cache the compiled model next to the checkpoint, so later runs load it directly."
+    infer_parser.add_argument(
+        "--compile_models",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=compile_models_description,
+        default=False,
+        required=False,
+    )
+
     # Parser for 'batch_infer' mode
     batch_infer_parser = subparsers.add_parser(
         "batch_infer",
@@ -1234,6 +1632,12 @@ def parse_arguments():
         help=split_audio_description,
         default=False,
     )
+    batch_infer_parser.add_argument(
+        "--split_workers",
+        type=int,
+        help=split_workers_description,
+        default=1,
+    )
     batch_infer_parser.add_argument(
         "--f0_autotune",
         type=lambda x: bool(strtobool(x)),
@@ -1248,6 +1652,32 @@ def parse_arguments():
         choices=[(i / 10) for i in range(11)],
         default=1.0,
     )
+    batch_infer_parser.add_argument(
+        "--f0_autotune_key",
+        type=str,
+        help=f0_autotune_key_description,
+        choices=["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"],
+        default="C",
+    )
+    batch_infer_parser.add_argument(
+        "--f0_autotune_scale",
+        type=str,
+        help=f0_autotune_scale_description,
+        choices=[
+            "chromatic",
+            "major",
+            "minor",
+            "pentatonic_major",
+            "pentatonic_minor",
+        ],
+        default="chromatic",
+    )
+    batch_infer_parser.add_argument(
+        "--f0_autotune_speed",
+        type=float,
+        help=f0_autotune_speed_description,
+        default=0,
+    )
     batch_infer_parser.add_argument(
         "--clean_audio",
         type=lambda x: bool(strtobool(x)),
@@ -1265,9 +1695,10 @@ def parse_arguments():
     batch_infer_parser.add_argument(
         "--export_format",
         type=str,
+        nargs="+",
         help=export_format_description,
         choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
-        default="WAV",
+        default=["WAV"],
     )
     batch_infer_parser.add_argument(
         "--embedder_model",
@@ -1616,6 +2047,59 @@ def parse_arguments():
         required=False,
     )
 
+    batch_infer_parser.add_argument(
+        "--f0_cache",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=f0_cache_description,
+        default=True,
+        required=False,
+    )
+
+    batch_infer_parser.add_argument(
+        "--feature_cache",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=feature_cache_description,
+        default=True,
+        required=False,
+    )
+
+    batch_infer_parser.add_argument(
+        "--silence_gate",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=silence_gate_description,
+        default=False,
+        required=False,
+    )
+
+    batch_infer_parser.add_argument(
+        "--precision",
+        type=str,
+        choices=["fp32", "int8"],
+        help=precision_description,
+        default=None,
+        required=False,
+    )
+
+    batch_infer_parser.add_argument(
+        "--compile_models",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=compile_models_description,
+        default=False,
+        required=False,
+    )
+
+    batch_infer_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes to shard the batch across. Each worker gets its own share of the CPU cores.",
+        default=1,
+        required=False,
+    )
+
     # Parser for 'tts' mode
     tts_parser = subparsers.add_parser("tts", help="Run TTS inference")
     tts_parser.add_argument(
@@ -1745,9 +2229,10 @@ def parse_arguments():
     tts_parser.add_argument(
         "--export_format",
         type=str,
+        nargs="+",
         help=export_format_description,
         choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
-        default="WAV",
+        default=["WAV"],
     )
     tts_parser.add_argument(
         "--embedder_model",
@@ -2052,6 +2537,14 @@ def parse_arguments():
         default="Auto",
         required=False,
     )
+    train_parser.add_argument(
+        "--index_type",
+        type=str,
+        choices=["IVF-Flat", "HNSW", "IVF-PQ"],
+        help="Choose the FAISS index structure. HNSW searches faster on large datasets, IVF-PQ uses less memory.",
+        default="IVF-Flat",
+        required=False,
+    )
 
     # Parser for 'index' mode
     index_parser = subparsers.add_parser(
@@ -2068,6 +2561,158 @@ def parse_arguments():
         default="Auto",
         required=False,
     )
+    index_parser.add_argument(
+        "--index_type",
+        type=str,
+        choices=["IVF-Flat", "HNSW", "IVF-PQ"],
+        help="Choose the FAISS index structure. HNSW searches faster on large datasets, IVF-PQ uses less memory.",
+        default="IVF-Flat",
+        required=False,
+    )
+
+    # Parser for 'index_benchmark' mode
+    index_benchmark_parser = subparsers.add_parser(
+        "index_benchmark",
+        help="Compare index types on a model's extracted features.",
+    )
+    index_benchmark_parser.add_argument(
+        "--model_name", type=str, help="Name of the model.", required=True
+    )
+    index_benchmark_parser.add_argument(
+        "--queries",
+        type=int,
+        help="Number of held-out feature frames used as queries.",
+        default=2000,
+    )
+
+    # Parser for 'infer_benchmark' mode
+    infer_benchmark_parser = subparsers.add_parser(
+        "infer_benchmark",
+        help="Measure voice model inference latency per vocoder before and after optimization.",
+    )
+    infer_benchmark_parser.add_argument(
+        "--sample_rate",
+        type=int,
+        help="Sampling rate whose model configuration is benchmarked.",
+        choices=[32000, 40000, 48000],
+        default=48000,
+    )
+    infer_benchmark_parser.add_argument(
+        "--frames",
+        type=int,
+        help="Embedder frames per call, 100 frames being one second of audio.",
+        default=500,
+    )
+    infer_benchmark_parser.add_argument(
+        "--runs",
+        type=int,
+        help="Timed calls per variant; the median is reported.",
+        default=5,
+    )
+
+    # Parser for 'frontend_benchmark' mode
+    frontend_benchmark_parser = subparsers.add_parser(
+        "frontend_benchmark",
+        help="Measure time and memory of decoding, filtering and window handling in float64 and float32.",
+    )
+    frontend_benchmark_parser.add_argument(
+        "--input_path",
+        type=str,
+        help="Audio file to measure, a synthetic recording of --duration seconds by default.",
+        default=None,
+    )
+    frontend_benchmark_parser.add_argument(
+        "--duration",
+        type=float,
+        help="Length in seconds of the synthetic recording.",
+        default=1800,
+    )
+
+    # Parser for 'rmvpe_benchmark' mode
+    rmvpe_benchmark_parser = subparsers.add_parser(
+        "rmvpe_benchmark",
+        help="Check the RMVPE salience decoder against the frame-by-frame loop it replaced and time both.",
+    )
+    rmvpe_benchmark_parser.add_argument(
+        "--frames",
+        type=int,
+        help="Frames of the timed salience map, 100 frames being one second of audio.",
+        default=30000,
+    )
+    rmvpe_benchmark_parser.add_argument(
+        "--runs",
+        type=int,
+        help="Timed calls per decoder; the median is reported.",
+        default=5,
+    )
+    rmvpe_benchmark_parser.add_argument(
+        "--memory_minutes",
+        type=float,
+        help="Also measure the peak resident memory of segmented inference on a synthetic input of this many minutes, e.g. 60. 0 skips it.",
+        default=0,
+    )
+    rmvpe_benchmark_parser.add_argument(
+        "--reference_minutes",
+        type=float,
+        help="Length of the shorter input measured alongside, also converted in a single pass.",
+        default=5,
+    )
+    rmvpe_benchmark_parser.add_argument(
+        "--device",
+        type=str,
+        help="Device to run the network on for the memory measurement; only host memory is measured.",
+        default="cpu",
+    )
+
+    # Parser for 'autotune_benchmark' mode
+    autotune_benchmark_parser = subparsers.add_parser(
+        "autotune_benchmark",
+        help="Time the vectorized autotune against the frame-by-frame loop it replaced on the same F0 contour.",
+    )
+    autotune_benchmark_parser.add_argument(
+        "--frames",
+        type=int,
+        help="Frames of the synthetic F0 contour, 100 frames being one second of audio.",
+        default=30000,
+    )
+    autotune_benchmark_parser.add_argument(
+        "--runs",
+        type=int,
+        help="Timed calls per implementation; the median is reported.",
+        default=5,
+    )
+
+    # Parser for 'merge_benchmark' mode
+    merge_benchmark_parser = subparsers.add_parser(
+        "merge_benchmark",
+        help="Check the split audio merge against the concatenating merge it replaced and time both.",
+    )
+    merge_benchmark_parser.add_argument(
+        "--segments",
+        type=int,
+        help="Number of random segments to merge.",
+        default=300,
+    )
+    merge_benchmark_parser.add_argument(
+        "--runs",
+        type=int,
+        help="Timed calls per implementation; the median is reported.",
+        default=3,
+    )
+
+    # Parser for 'smoke_test' mode
+    smoke_test_parser = subparsers.add_parser(
+        "smoke_test",
+        help="Run quick checks of the inference optimizations against the behavior they replaced.",
+    )
+    smoke_test_parser.add_argument(
+        "--checks",
+        type=str,
+        nargs="+",
+        choices=list(SMOKE_CHECKS),
+        help="Checks to run, all of them by default.",
+        default=None,
+    )
 
     # Parser for 'model_information' mode
     model_information_parser = subparsers.add_parser(
@@ -2077,6 +2722,22 @@ def parse_arguments():
         "--pth_path", type=str, help="Path to the .pth model file.", required=True
     )
 
+    # Parser for 'pack_model' mode
+    pack_model_parser = subparsers.add_parser(
+        "pack_model",
+        help="Convert a .pth model to the memory-mapped packed format loaded by inference.",
+    )
+    pack_model_parser.add_argument(
+        "--pth_path", type=str, help="Path to the .pth model file.", required=True
+    )
+    pack_model_parser.add_argument(
+        "--float32",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help="Store the weights as float32 so loading maps them without a copy. Half precision models then take twice the disk space; by default the weights keep their dtype and are converted on load.",
+        default=False,
+    )
+
     # Parser for 'model_blender' mode
     model_blender_parser = subparsers.add_parser(
         "model_blender", help="Fuse two RVC models together."
@@ -2151,6 +2812,75 @@ def parse_arguments():
         "--input_path", type=str, help="Path to the input audio file.", required=True
     )
 
+    # Parser for 'serve' mode
+    serve_parser = subparsers.add_parser(
+        "serve", help="Run a local HTTP inference server."
+    )
+    serve_parser.add_argument(
+        "--host",
+        type=str,
+        help="Interface to bind the server to.",
+        default="127.0.0.1",
+    )
+    serve_parser.add_argument(
+        "--port", type=int, help="Port to listen on.", default=6970
+    )
+    serve_parser.add_argument(
+        "--max_batch",
+        type=int,
+        help="Maximum number of requests, and of windows per forward pass, in one batch.",
+        default=8,
+    )
+    serve_parser.add_argument(
+        "--max_wait_ms",
+        type=int,
+        help="Milliseconds a request waits for others to join its batch.",
+        default=50,
+    )
+    serve_parser.add_argument(
+        "--compile_models",
+        type=lambda x: bool(strtobool(x)),
+        choices=[True, False],
+        help=compile_models_description,
+        default=False,
+    )
+
+    # Parser for 'onnx_export' mode
+    onnx_export_parser = subparsers.add_parser(
+        "onnx_export",
+        help="Export a voice model, its embedder and RMVPE to ONNX and check them against torch.",
+    )
+    onnx_export_parser.add_argument(
+        "--pth_path", type=str, help="Path to the .pth model file.", required=True
+    )
+    onnx_export_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help=embedder_model_description,
+        choices=[
+            "contentvec",
+            "chinese-hubert-base",
+            "japanese-hubert-base",
+            "korean-hubert-base",
+            "custom",
+        ],
+        default="contentvec",
+    )
+    onnx_export_parser.add_argument(
+        "--embedder_model_custom",
+        type=str,
+        help=embedder_model_custom_description,
+        default=None,
+    )
+    onnx_export_parser.add_argument(
+        "--precision",
+        type=str,
+        choices=["fp32", "int8"],
+        help="Precision of the exported voice model and embedder graphs; int8 quantizes them dynamically.",
+        default=None,
+        required=False,
+    )
+
     return parser.parse_args()
 
 
@@ -2179,7 +2909,7 @@ def main():
                 f0_autotune_strength=args.f0_autotune_strength,
                 clean_audio=args.clean_audio,
                 clean_strength=args.clean_strength,
-                export_format=args.export_format,
+                export_format=",".join(args.export_format),
                 embedder_model=args.embedder_model,
                 embedder_model_custom=args.embedder_model_custom,
                 f0_file=args.f0_file,
@@ -2223,6 +2953,16 @@ def main():
                 delay_seconds=args.delay_seconds,
                 delay_feedback=args.delay_feedback,
                 delay_mix=args.delay_mix,
+                f0_cache=args.f0_cache,
+                feature_cache=args.feature_cache,
+                silence_gate=args.silence_gate,
+                f0_autotune_key=args.f0_autotune_key,
+                f0_autotune_scale=args.f0_autotune_scale,
+                f0_autotune_speed=args.f0_autotune_speed,
+                split_workers=args.split_workers,
+                precision=args.precision,
+                precision_check=args.precision_check,
+                compile_models=args.compile_models,
             )
         elif args.mode == "batch_infer":
             run_batch_infer_script(
@@ -2241,7 +2981,7 @@ def main():
                 f0_autotune_strength=args.f0_autotune_strength,
                 clean_audio=args.clean_audio,
                 clean_strength=args.clean_strength,
-                export_format=args.export_format,
+                export_format=",".join(args.export_format),
                 embedder_model=args.embedder_model,
                 embedder_model_custom=args.embedder_model_custom,
                 f0_file=args.f0_file,
@@ -2285,6 +3025,16 @@ def main():
                 delay_seconds=args.delay_seconds,
                 delay_feedback=args.delay_feedback,
                 delay_mix=args.delay_mix,
+                f0_cache=args.f0_cache,
+                feature_cache=args.feature_cache,
+                silence_gate=args.silence_gate,
+                f0_autotune_key=args.f0_autotune_key,
+                f0_autotune_scale=args.f0_autotune_scale,
+                f0_autotune_speed=args.f0_autotune_speed,
+                split_workers=args.split_workers,
+                workers=args.workers,
+                precision=args.precision,
+                compile_models=args.compile_models,
             )
         elif args.mode == "tts":
             run_tts_script(
@@ -2307,7 +3057,7 @@ def main():
                 f0_autotune_strength=args.f0_autotune_strength,
                 clean_audio=args.clean_audio,
                 clean_strength=args.clean_strength,
-                export_format=args.export_format,
+                export_format=",".join(args.export_format),
                 embedder_model=args.embedder_model,
                 embedder_model_custom=args.embedder_model_custom,
                 f0_file=args.f0_file,
@@ -2358,16 +3108,61 @@ def main():
                 d_pretrained_path=args.d_pretrained_path,
                 vocoder=args.vocoder,
                 checkpointing=args.checkpointing,
+                index_type=args.index_type,
             )
         elif args.mode == "index":
             run_index_script(
                 model_name=args.model_name,
                 index_algorithm=args.index_algorithm,
+                index_type=args.index_type,
+            )
+        elif args.mode == "index_benchmark":
+            run_index_benchmark_script(
+                model_name=args.model_name,
+                queries=args.queries,
+            )
+        elif args.mode == "infer_benchmark":
+            run_infer_benchmark_script(
+                sample_rate=args.sample_rate,
+                frames=args.frames,
+                runs=args.runs,
+            )
+        elif args.mode == "frontend_benchmark":
+            run_frontend_benchmark_script(
+                input_path=args.input_path,
+                duration=args.duration,
+            )
+        elif args.mode == "rmvpe_benchmark":
+            run_rmvpe_benchmark_script(
+                frames=args.frames,
+                runs=args.runs,
+                memory_minutes=args.memory_minutes,
+                reference_minutes=args.reference_minutes,
+                device=args.device,
+            )
+        elif args.mode == "autotune_benchmark":
+            run_autotune_benchmark_script(
+                frames=args.frames,
+                runs=args.runs,
+            )
+        elif args.mode == "merge_benchmark":
+            run_merge_benchmark_script(
+                segments=args.segments,
+                runs=args.runs,
+            )
+        elif args.mode == "smoke_test":
+            run_smoke_test_script(
+                checks=args.checks,
             )
         elif args.mode == "model_information":
             run_model_information_script(
                 pth_path=args.pth_path,
             )
+        elif args.mode == "pack_model":
+            run_pack_model_script(
+                pth_path=args.pth_path,
+                float32=args.float32,
+            )
         elif args.mode == "model_blender":
             run_model_blender_script(
                 model_name=args.model_name,
@@ -2391,6 +3186,21 @@ def main():
             run_audio_analyzer_script(
                 input_path=args.input_path,
             )
+        elif args.mode == "serve":
+            run_serve_script(
+                host=args.host,
+                port=args.port,
+                max_batch=args.max_batch,
+                max_wait_ms=args.max_wait_ms,
+                compile_models=args.compile_models,
+            )
+        elif args.mode == "onnx_export":
+            run_onnx_export_script(
+                pth_path=args.pth_path,
+                embedder_model=args.embedder_model,
+                embedder_model_custom=args.embedder_model_custom,
+                precision=args.precision,
+            )
     except Exception as error:
         print(f"An error occurred during execution: {error}")
 
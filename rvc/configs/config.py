@@ -31,7 +31,35 @@ class Config:
         )
         self.json_config = self.load_config_json()
         self.gpu_mem = None
+        # Memory budget (MB) for FAISS indexes kept resident between conversions
+        self.index_cache_size = 2048
+        # Windows converted per forward pass during inference (0 picks from free memory)
+        self.window_batch_size = 1
+        # Size cap (MB) of the on-disk F0 contour cache
+        self.f0_cache_size = 512
+        # Size cap (MB) of the on-disk cache of decoded input and embedder features
+        self.feature_cache_size = 4096
+        # Seconds of audio RMVPE converts per block on long inputs, 0 runs the whole input at once
+        self.rmvpe_segment_seconds = 60
+        # Silences quieter than this (dB below the loudest frame) and at least min_silence
+        # seconds long are skipped by the conversion instead of being synthesized
+        self.silence_threshold = -50
+        self.min_silence = 1.0
         self.x_pad, self.x_query, self.x_center, self.x_max = self.device_config()
+        # Memory budgets (MB) for models kept resident by the model registry, 0 means no limit
+        self.model_ram_budget = 8192
+        self.model_vram_budget = int(self.gpu_mem * 1024 * 0.5) if self.gpu_mem else 0
+        # Inference precision on CPU: "fp32", or "int8" for dynamically quantized Linear layers
+        self.precision = "fp32"
+        # Compile voice models with TorchScript on first use and cache the result next to the
+        # model; off unless enabled here or with --compile_models
+        self.compile_models = False
+        # Runtime for the voice model, embedder and RMVPE networks: "torch", or "onnx" to export
+        # them once and run them through onnxruntime
+        self.inference_backend = "torch"
+        # Inputs longer than this many seconds are decoded and converted segment by segment, so
+        # memory stays bounded by the segment length; 0 always decodes the whole input first
+        self.stream_input_seconds = 600
 
     def load_config_json(self):
         configs = {}
@@ -0,0 +1,298 @@
+import os
+import time
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+class StageStats:
+    """
+    Throughput counters of one stage of the batch conversion pipeline.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.items += 1
+            self.busy += seconds
+
+    def summary(self, wall_time):
+        rate = self.items / wall_time if wall_time > 0 else 0
+        return (
+            f"{self.name}: {self.items} files, {rate:.2f} files/s, "
+            f"{self.busy:.2f} s busy"
+        )
+
+
+def _put(target_queue, item, is_cancelled):
+    # Blocks while the queue is full (backpressure) but gives up once cancelled.
+    while True:
+        try:
+            target_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if is_cancelled():
+                return False
+
+
+def run_pipelined_batch(
+    jobs,
+    decode,
+    infer,
+    encode,
+    is_cancelled,
+    decode_workers=2,
+    encode_workers=2,
+    queue_size=4,
+):
+    """
+    Converts a batch of files with decoding, inference and encoding overlapped.
+
+    A pool of decode threads feeds a bounded queue, the calling thread runs inference on whatever
+    has been decoded, and a pool of encode threads writes the results. Both queues are bounded,
+    so a slow stage throttles the ones before it instead of buffering whole files in memory.
+
+    Args:
+        jobs: List of `(input_path, output_path)` pairs.
+        decode: Callable taking a job and returning the decoded input.
+        infer: Callable taking a job and its decoded input and returning the converted result,
+            or None if nothing should be written.
+        encode: Callable taking a job and the converted result and writing it.
+        is_cancelled: Callable returning True once the batch should stop.
+        decode_workers: Number of decode threads.
+        encode_workers: Number of encode threads.
+        queue_size: Maximum number of decoded inputs and pending outputs held at once.
+    """
+    stats = {name: StageStats(name) for name in ("decode", "inference", "encode")}
+    pending_jobs = queue.Queue()
+    for job in jobs:
+        pending_jobs.put(job)
+    decoded = queue.Queue(maxsize=queue_size)
+    start_time = time.time()
+
+    def decode_worker():
+        while not is_cancelled():
+            try:
+                job = pending_jobs.get_nowait()
+            except queue.Empty:
+                break
+            stage_start = time.perf_counter()
+            try:
+                audio = decode(job)
+            except Exception as error:
+                print(f"An error occurred decoding '{job[0]}': {error}")
+                continue
+            stats["decode"].record(time.perf_counter() - stage_start)
+            if not _put(decoded, (job, audio), is_cancelled):
+                break
+        _put(decoded, _DONE, lambda: False)
+
+    def encode_job(job, result):
+        try:
+            if is_cancelled():
+                return
+            stage_start = time.perf_counter()
+            encode(job, result)
+            stats["encode"].record(time.perf_counter() - stage_start)
+        except Exception as error:
+            print(f"An error occurred encoding '{job[1]}': {error}")
+            print(traceback.format_exc())
+        finally:
+            encode_slots.release()
+
+    decode_workers = max(1, min(decode_workers, len(jobs)))
+    decoders = [
+        threading.Thread(target=decode_worker, daemon=True)
+        for _ in range(decode_workers)
+    ]
+    for decoder in decoders:
+        decoder.start()
+
+    encode_slots = threading.BoundedSemaphore(queue_size)
+    with ThreadPoolExecutor(max_workers=encode_workers) as encoders:
+        finished_decoders = 0
+        reported_cancel = False
+        while finished_decoders < decode_workers:
+            item = decoded.get()
+            if item is _DONE:
+                finished_decoders += 1
+                continue
+            if is_cancelled():
+                if not reported_cancel:
+                    print(">>> Batch inference cancelled inside file loop.")
+                    reported_cancel = True
+                continue  # keep draining so decode threads can exit
+            job, audio = item
+            stage_start = time.perf_counter()
+            result = infer(job, audio)
+            stats["inference"].record(time.perf_counter() - stage_start)
+            if result is None:
+                continue
+            encode_slots.acquire()
+            encoders.submit(encode_job, job, result)
+
+    for decoder in decoders:
+        decoder.join()
+
+    wall_time = time.time() - start_time
+    for stage in stats.values():
+        print(stage.summary(wall_time))
+    return stats
+
+
+def _audio_duration(path):
+    try:
+        import soundfile as sf
+
+        return sf.info(path).duration
+    except Exception:
+        # Compressed formats soundfile cannot read: file size is a usable ordering proxy. It
+        # only orders the files; throughput is measured from the samples workers decode.
+        return os.path.getsize(path) / 16000
+
+
+def _shard_worker(worker_id, cores, job_queue, result_queue, cancel_event, kwargs, cpt):
+    import torch
+    from rvc.infer.infer import VoiceConverter
+
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(max(1, len(cores)))
+
+    converter = VoiceConverter()
+    converter.set_precision(kwargs.get("precision"))
+    converter.set_compile_models(kwargs.get("compile_models"))
+    converter.get_vc(kwargs.get("model_path"), kwargs.get("sid", 0), cpt=cpt)
+
+    def watch_cancellation():
+        cancel_event.wait()
+        converter.request_cancellation()
+
+    threading.Thread(target=watch_cancellation, daemon=True).start()
+
+    files, audio_seconds, busy = 0, 0.0, 0.0
+    while not cancel_event.is_set():
+        job = job_queue.get()
+        if job is None:
+            break
+        input_path, output_path, _ = job
+        stage_start = time.perf_counter()
+        converter.input_samples = 0
+        converter.convert_audio(
+            audio_input_path=input_path, audio_output_path=output_path, **kwargs
+        )
+        busy += time.perf_counter() - stage_start
+        files += 1
+        audio_seconds += converter.input_samples / 16000
+    result_queue.put((worker_id, files, audio_seconds, busy))
+
+
+def run_sharded_batch(jobs, kwargs, workers, is_cancelled):
+    """
+    Converts a batch of files with several worker processes.
+
+    Each worker is pinned to its own slice of the CPU cores with a matching torch thread count,
+    and loads the voice model weights from a shared-memory copy held by this process instead of
+    reading the checkpoint again. Models with a packed file map that file in every worker
+    instead, which shares its pages through the page cache. Files are handed out from one queue,
+    longest first, so the last files to finish are short ones.
+
+    Args:
+        jobs: List of `(input_path, output_path)` pairs.
+        kwargs: Keyword arguments forwarded to `VoiceConverter.convert_audio`.
+        workers: Number of worker processes.
+        is_cancelled: Callable returning True once the batch should stop.
+    """
+    import torch
+    import torch.multiprocessing as mp
+    from rvc.infer.packed import find_packed
+
+    context = mp.get_context("spawn")
+    jobs = sorted(
+        (
+            (input_path, output_path, _audio_duration(input_path))
+            for input_path, output_path in jobs
+        ),
+        key=lambda job: job[2],
+        reverse=True,
+    )
+    workers = max(1, min(workers, len(jobs)))
+
+    cpt = None
+    model_path = kwargs.get("model_path")
+    if model_path and os.path.isfile(model_path) and find_packed(model_path) is None:
+        cpt = torch.load(model_path, map_location="cpu", weights_only=True)
+        cpt["weight"] = {
+            key: value.float().share_memory_() for key, value in cpt["weight"].items()
+        }
+
+    cores = (
+        sorted(os.sched_getaffinity(0))
+        if hasattr(os, "sched_getaffinity")
+        else list(range(os.cpu_count() or 1))
+    )
+    per_worker = max(1, len(cores) // workers)
+
+    job_queue = context.Queue()
+    result_queue = context.Queue()
+    cancel_event = context.Event()
+    for job in jobs:
+        job_queue.put(job)
+    for _ in range(workers):
+        job_queue.put(None)
+
+    start_time = time.time()
+    processes = []
+    for worker_id in range(workers):
+        worker_cores = cores[worker_id * per_worker : (worker_id + 1) * per_worker]
+        process = context.Process(
+            target=_shard_worker,
+            args=(
+                worker_id,
+                worker_cores,
+                job_queue,
+                result_queue,
+                cancel_event,
+                kwargs,
+                cpt,
+            ),
+        )
+        process.start()
+        processes.append(process)
+
+    results = []
+    while len(results) < workers:
+        if is_cancelled() and not cancel_event.is_set():
+            print(">>> Batch inference cancelled, stopping workers.")
+            cancel_event.set()
+        try:
+            results.append(result_queue.get(timeout=0.5))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break
+    for process in processes:
+        process.join()
+
+    wall_time = time.time() - start_time
+    total_audio = sum(result[2] for result in results)
+    if total_audio > 0:
+        print(
+            f"Converted {total_audio:.1f} s of audio in {wall_time:.1f} s "
+            f"(real-time factor {wall_time / total_audio:.3f}, "
+            f"{total_audio / wall_time:.1f}x real time)."
+        )
+    for worker_id, files, audio_seconds, busy in sorted(results):
+        utilization = busy / wall_time * 100 if wall_time > 0 else 0
+        print(
+            f"Worker {worker_id}: {files} files, {audio_seconds:.1f} s of audio, "
+            f"{utilization:.0f}% utilization"
+        )
+    return results
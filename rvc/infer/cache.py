@@ -0,0 +1,129 @@
+import os
+import hashlib
+import threading
+import numpy as np
+
+
+class DiskCache:
+    """
+    A content-addressed on-disk cache of NumPy arrays.
+
+    Used for intermediate results that only depend on the input audio, such as raw F0 contours,
+    decoded and resampled input, and embedder features, so they can be reused across runs and
+    voice models. The directory is capped in size; the least recently used entries are deleted
+    first.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir: Directory holding the cached arrays.
+            max_bytes: Maximum total size of the cached arrays in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(array, *parts):
+        """
+        Builds a cache key from the contents of an array and any settings that affect the result.
+
+        Args:
+            array: The array the cached result is computed from.
+            *parts: Settings that change the cached result.
+        """
+        # Hashing the array's buffer directly avoids a full-length bytes copy.
+        digest = hashlib.sha1(np.ascontiguousarray(array))
+        digest.update("|".join(map(str, (array.dtype, array.shape) + parts)).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_file_key(file, *parts):
+        """
+        Builds a cache key from the contents of a file and any settings that affect the result.
+
+        Args:
+            file: Path to the file the cached result is computed from.
+            *parts: Settings that change the cached result.
+        """
+        digest = hashlib.sha1()
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update("|".join(map(str, parts)).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def load(self, key):
+        """
+        Returns the cached array for a key, or None on a miss.
+
+        Args:
+            key: Cache key built with `make_key` or `make_file_key`.
+        """
+        path = self._path(key)
+        try:
+            array = np.load(path)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self._counter_lock:
+                self.misses += 1
+            return None
+        with self._counter_lock:
+            self.hits += 1
+        return array
+
+    def save(self, key, array):
+        """
+        Stores an array and evicts old entries if the directory exceeds its size cap.
+
+        Args:
+            key: Cache key built with `make_key` or `make_file_key`.
+            array: The array to store.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+            self._evict()
+        except OSError as error:
+            print(f"An error occurred writing the cache: {error}")
+
+    def stats(self):
+        """
+        Returns the hit and miss counters of this cache.
+        """
+        with self._counter_lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".npy"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    total -= size
+                except OSError:
+                    pass
@@ -0,0 +1,234 @@
+import os
+import re
+import glob
+import json
+import hashlib
+import threading
+from typing import Optional
+
+import torch
+
+from rvc.infer.optimize import freeze
+from rvc.lib.algorithm.synthesizers import Synthesizer
+
+ARTIFACT_SUFFIX = ".jit.pt"
+
+
+def checkpoint_hash(path, chunk_size=1 << 20):
+    """
+    Returns the SHA-256 of a checkpoint file's content.
+
+    Args:
+        path: Path to the checkpoint.
+        chunk_size: Bytes read per step.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_path(weight_root, digest, device, precision):
+    """
+    Returns where the compiled form of a voice model is cached, next to the checkpoint.
+
+    Args:
+        weight_root: Path to the `.pth` checkpoint.
+        digest: Content hash of the checkpoint.
+        device: Device the artifact was compiled for.
+        precision: Precision the artifact was compiled at.
+    """
+    tag = re.sub(r"[^0-9A-Za-z.]+", "_", f"{torch.__version__}.{device}.{precision}")
+    return f"{os.path.splitext(weight_root)[0]}.{digest[:16]}.{tag}{ARTIFACT_SUFFIX}"
+
+
+def example_inputs(phone_dim, use_f0, frames, batch_size, device):
+    """
+    Returns arguments for `Synthesizer.infer` covering `frames` embedder frames.
+
+    Args:
+        phone_dim: Feature dimension of the embedder (256 for v1, 768 for v2).
+        use_f0: Whether the model takes pitch inputs.
+        frames: Number of frames per item.
+        batch_size: Number of items.
+        device: Device to place the inputs on.
+    """
+    phone = torch.randn(batch_size, frames, phone_dim, device=device)
+    lengths = torch.full((batch_size,), frames, dtype=torch.long, device=device)
+    sid = torch.zeros(batch_size, dtype=torch.long, device=device)
+    if not use_f0:
+        return phone, lengths, None, None, sid
+    pitch = torch.full((batch_size, frames), 100, dtype=torch.long, device=device)
+    pitchf = torch.full((batch_size, frames), 220.0, device=device)
+    return phone, lengths, pitch, pitchf, sid
+
+
+class InferenceModule(torch.nn.Module):
+    """
+    The inference path of a Synthesizer as a module of its own.
+
+    It holds only the submodules `Synthesizer.infer` uses and runs that same method, so
+    scripting it compiles `infer` alone, without the training `forward` that needs the
+    posterior encoder `prepare_for_inference` dropped.
+    """
+
+    infer = Synthesizer.infer
+
+    def __init__(self, net_g):
+        """
+        Shares the inference submodules of a Synthesizer.
+
+        Args:
+            net_g: The Synthesizer after `prepare_for_inference`.
+        """
+        super().__init__()
+        self.emb_g = net_g.emb_g
+        self.enc_p = net_g.enc_p
+        self.flow = net_g.flow
+        self.dec = net_g.dec
+        self.use_f0 = net_g.use_f0
+
+    def forward(
+        self,
+        phone: torch.Tensor,
+        phone_lengths: torch.Tensor,
+        pitch: Optional[torch.Tensor] = None,
+        nsff0: Optional[torch.Tensor] = None,
+        sid: torch.Tensor = None,
+        rate: Optional[torch.Tensor] = None,
+    ):
+        return self.infer(phone, phone_lengths, pitch, nsff0, sid, rate)
+
+
+def _matches(reference, candidate, inputs):
+    # infer draws noise, so both runs start from the same seed.
+    with torch.no_grad():
+        torch.manual_seed(0)
+        expected = reference.infer(*inputs)[0]
+        torch.manual_seed(0)
+        actual = candidate.infer(*inputs)[0]
+    return expected.shape == actual.shape and torch.allclose(
+        expected, actual, atol=1e-4, rtol=1e-3
+    )
+
+
+def compile_voice_model(net_g, phone_dim, use_f0, device):
+    """
+    Compiles a Synthesizer for inference with TorchScript.
+
+    Scripting `infer` through `InferenceModule` is tried first. Vocoders that do not script
+    are traced instead, which needs pitch inputs. The result is frozen, and only kept if it matches the eager model on a
+    batch and length a trace was not recorded with.
+
+    Args:
+        net_g: The Synthesizer after `prepare_for_inference`.
+        phone_dim: Feature dimension of the embedder.
+        use_f0: Whether the model takes pitch inputs.
+        device: Device the model lives on.
+
+    Returns:
+        The compiled module, or None if the model could not be compiled.
+    """
+    probe = example_inputs(phone_dim, use_f0, 150, 2, device)
+    with torch.no_grad():
+        try:
+            compiled = freeze(torch.jit.script(InferenceModule(net_g)))
+            if _matches(net_g, compiled, probe):
+                return compiled
+            print("Scripted voice model does not match the eager model.")
+        except Exception as error:
+            print(f"Voice model could not be scripted: {error}")
+
+        if not use_f0:
+            return None
+        try:
+            compiled = freeze(
+                torch.jit.trace_module(
+                    net_g,
+                    {"infer": example_inputs(phone_dim, use_f0, 100, 1, device)},
+                    check_trace=False,
+                )
+            )
+            if _matches(net_g, compiled, probe):
+                return compiled
+            print("Traced voice model does not generalize to other input shapes.")
+        except Exception as error:
+            print(f"Voice model could not be traced: {error}")
+    return None
+
+
+def warm_up(net_g, phone_dim, use_f0, device, runs=2):
+    """
+    Runs a voice model on dummy inputs so the first request does not pay for TorchScript's
+    profiling runs or for kernel selection.
+
+    Args:
+        net_g: The Synthesizer, compiled or eager.
+        phone_dim: Feature dimension of the embedder.
+        use_f0: Whether the model takes pitch inputs.
+        device: Device the model lives on.
+        runs: Number of forward passes; the profiling executor specializes on the second.
+    """
+    inputs = example_inputs(phone_dim, use_f0, 50, 1, device)
+    with torch.no_grad():
+        for _ in range(runs):
+            net_g.infer(*inputs)
+
+
+def load_artifact(path, device):
+    """
+    Loads a cached compiled voice model and the checkpoint metadata stored with it.
+
+    Args:
+        path: Path to the artifact.
+        device: Device to load the model onto.
+
+    Returns:
+        A `(model, cpt)` pair, or None if the artifact is missing or unreadable.
+    """
+    if not os.path.isfile(path):
+        return None
+    extra_files = {"cpt.json": ""}
+    try:
+        compiled = torch.jit.load(path, map_location=device, _extra_files=extra_files)
+        cpt = json.loads(extra_files["cpt.json"])
+    except Exception as error:
+        print(f"An error occurred loading the compiled voice model: {error}")
+        return None
+    return compiled, cpt
+
+
+def save_artifact(compiled, path, weight_root, cpt):
+    """
+    Writes a compiled voice model with its checkpoint metadata, and removes the artifacts of
+    earlier versions of the same checkpoint.
+
+    Args:
+        compiled: The compiled module.
+        path: Destination path from `artifact_path`.
+        weight_root: Path to the `.pth` checkpoint.
+        cpt: Checkpoint metadata without the weights.
+    """
+    base = os.path.splitext(weight_root)[0]
+    digest = path[len(base) + 1 :].split(".")[0]
+    pattern = re.compile(
+        re.escape(base) + r"\.([0-9a-f]{16})\..+" + re.escape(ARTIFACT_SUFFIX)
+    )
+    try:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        torch.jit.save(
+            compiled, tmp_path, _extra_files={"cpt.json": json.dumps(cpt, default=str)}
+        )
+        os.replace(tmp_path, path)
+    except (OSError, RuntimeError) as error:
+        # Read-only model folders still work, the model is just compiled again next time.
+        print(f"Could not write the compiled voice model next to the model: {error}")
+        return
+    for stale in glob.glob(glob.escape(base) + ".*" + ARTIFACT_SUFFIX):
+        match = pattern.fullmatch(stale)
+        if match and match.group(1) != digest:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
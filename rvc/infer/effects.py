@@ -0,0 +1,302 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+from pedalboard import (
+    Pedalboard,
+    Chorus,
+    Distortion,
+    Reverb,
+    PitchShift,
+    Limiter,
+    Gain,
+    Bitcrush,
+    Clipping,
+    Compressor,
+    Delay,
+)
+
+# Samples processed per call to the board
+EFFECTS_BLOCK = 8192
+# Presets whose idle chains are kept for reuse, least recently used first out
+EFFECTS_CACHE_SIZE = 16
+# Effects in the order they are applied: the flag enabling each, its pedalboard class and its
+# parameters as (pedalboard argument, keyword argument, default) triples
+EFFECTS = [
+    (
+        "reverb",
+        Reverb,
+        [
+            ("room_size", "reverb_room_size", 0.5),
+            ("damping", "reverb_damping", 0.5),
+            ("wet_level", "reverb_wet_level", 0.33),
+            ("dry_level", "reverb_dry_level", 0.4),
+            ("width", "reverb_width", 1.0),
+            ("freeze_mode", "reverb_freeze_mode", 0),
+        ],
+    ),
+    ("pitch_shift", PitchShift, [("semitones", "pitch_shift_semitones", 0)]),
+    (
+        "limiter",
+        Limiter,
+        [
+            ("threshold_db", "limiter_threshold", -6),
+            ("release_ms", "limiter_release", 0.05),
+        ],
+    ),
+    ("gain", Gain, [("gain_db", "gain_db", 0)]),
+    ("distortion", Distortion, [("drive_db", "distortion_gain", 25)]),
+    (
+        "chorus",
+        Chorus,
+        [
+            ("rate_hz", "chorus_rate", 1.0),
+            ("depth", "chorus_depth", 0.25),
+            ("centre_delay_ms", "chorus_delay", 7),
+            ("feedback", "chorus_feedback", 0.0),
+            ("mix", "chorus_mix", 0.5),
+        ],
+    ),
+    ("bitcrush", Bitcrush, [("bit_depth", "bitcrush_bit_depth", 8)]),
+    ("clipping", Clipping, [("threshold_db", "clipping_threshold", 0)]),
+    (
+        "compressor",
+        Compressor,
+        [
+            ("threshold_db", "compressor_threshold", 0),
+            ("ratio", "compressor_ratio", 1),
+            ("attack_ms", "compressor_attack", 1.0),
+            ("release_ms", "compressor_release", 100),
+        ],
+    ),
+    (
+        "delay",
+        Delay,
+        [
+            ("delay_seconds", "delay_seconds", 0.5),
+            ("feedback", "delay_feedback", 0.0),
+            ("mix", "delay_mix", 0.5),
+        ],
+    ),
+]
+
+
+def effects_preset(**kwargs):
+    """
+    Returns the effects enabled by post-processing keyword arguments and their parameters.
+
+    Args:
+        **kwargs: The post-processing arguments of `VoiceConverter.convert_audio`.
+
+    Returns:
+        A list of `(effect, parameters)` pairs in the order the effects are applied.
+    """
+    return [
+        (name, {arg: kwargs.get(key, default) for arg, key, default in parameters})
+        for name, _, parameters in EFFECTS
+        if kwargs.get(name, False)
+    ]
+
+
+def preset_key(preset):
+    """
+    Returns a hash identifying an effects preset.
+
+    Args:
+        preset: A preset from `effects_preset`.
+    """
+    return hashlib.sha1(json.dumps(preset, default=str).encode()).hexdigest()
+
+
+class EffectsChain:
+    """
+    A Pedalboard built once from a preset that processes audio in fixed-size blocks.
+
+    The board keeps its state between blocks (`reset=False`), so reverb tails and delays carry
+    over block boundaries and a signal can be processed as it is produced. The output always has
+    the length of the input: samples held back by effects with latency are flushed at the end.
+    A chain processes one signal at a time; `acquire_effects_chain` hands each user its own.
+    """
+
+    def __init__(self, preset, block_size=EFFECTS_BLOCK):
+        """
+        Builds the board of a preset.
+
+        Args:
+            preset: A preset from `effects_preset`.
+            block_size: Samples processed per call to the board.
+        """
+        classes = {name: effect for name, effect, _ in EFFECTS}
+        self.preset = preset
+        self.block_size = block_size
+        self.board = Pedalboard(
+            [classes[name](**parameters) for name, parameters in preset]
+        )
+        self._consumed = self._produced = 0
+
+    def reset(self):
+        """
+        Clears the state left by the previous signal.
+        """
+        self.board.reset()
+        self._consumed = self._produced = 0
+
+    def process_chunk(self, audio, sample_rate):
+        """
+        Processes the next part of the current signal, block by block.
+
+        Args:
+            audio: Mono float audio following the previously processed part.
+            sample_rate: Sampling rate of the audio.
+
+        Returns:
+            The processed audio available so far, which trails the input by the latency of the
+            board.
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        outputs = []
+        for start in range(0, audio.shape[0], self.block_size):
+            block = audio[start : start + self.block_size]
+            output = self.board(block, sample_rate, reset=False).reshape(-1)
+            self._consumed += block.shape[0]
+            self._produced += output.shape[0]
+            outputs.append(output)
+        if not outputs:
+            return np.zeros(0, dtype=np.float32)
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+    def flush(self, sample_rate, max_blocks=64):
+        """
+        Returns the processed samples still held back by the board, so the total output of the
+        signal matches its input length.
+
+        Args:
+            sample_rate: Sampling rate of the audio.
+            max_blocks: Silent blocks fed at most before the remainder is filled with silence.
+        """
+        outputs = []
+        missing = self._consumed - self._produced
+        for _ in range(max_blocks):
+            if missing <= 0:
+                break
+            silence = np.zeros(self.block_size, dtype=np.float32)
+            output = self.board(silence, sample_rate, reset=False).reshape(-1)
+            outputs.append(output[:missing])
+            missing -= outputs[-1].shape[0]
+        if missing > 0:
+            outputs.append(np.zeros(missing, dtype=np.float32))
+        self._produced = self._consumed
+        if not outputs:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(outputs)
+
+    def process(self, audio, sample_rate):
+        """
+        Processes a whole signal into an output buffer of the same length.
+
+        Args:
+            audio: Mono float audio.
+            sample_rate: Sampling rate of the audio.
+        """
+        output = np.empty(audio.shape[0], dtype=np.float32)
+        position = 0
+        self.reset()
+        for start in range(0, audio.shape[0], self.block_size):
+            block = self.process_chunk(
+                audio[start : start + self.block_size], sample_rate
+            )
+            output[position : position + block.shape[0]] = block
+            position += block.shape[0]
+        tail = self.flush(sample_rate)
+        output[position : position + tail.shape[0]] = tail
+        return output
+
+
+_idle_chains = OrderedDict()
+_idle_chains_lock = threading.Lock()
+
+
+@contextmanager
+def acquire_effects_chain(**kwargs):
+    """
+    Lends an effects chain of a set of post-processing arguments for the duration of the block.
+
+    Idle chains are pooled by the hash of their preset, so files processed with the same
+    settings reuse compiled boards, while concurrent users each get a board of their own: a
+    chain is only built when every pooled one of its preset is in use.
+
+    Args:
+        **kwargs: The post-processing arguments of `VoiceConverter.convert_audio`.
+    """
+    preset = effects_preset(**kwargs)
+    key = preset_key(preset)
+    chain = None
+    with _idle_chains_lock:
+        idle = _idle_chains.get(key)
+        if idle:
+            chain = idle.pop()
+    if chain is None:
+        chain = EffectsChain(preset)
+    try:
+        yield chain
+    finally:
+        with _idle_chains_lock:
+            _idle_chains.setdefault(key, []).append(chain)
+            _idle_chains.move_to_end(key)
+            while len(_idle_chains) > EFFECTS_CACHE_SIZE:
+                _idle_chains.popitem(last=False)
+
+
+def check_effects_chain(sample_rate=44100, seconds=5, seed=0):
+    """
+    Checks that `EffectsChain.process` matches a one-shot call of the same board, and that
+    concurrent users of a preset get chains of their own.
+
+    The preset chains reverb, limiter, gain, chorus, compressor and delay, so the block-wise
+    path has to carry state and latency across blocks. The signal is noise bursts, so tails
+    decay into silence between them.
+
+    Args:
+        sample_rate: Sampling rate of the signal.
+        seconds: Length of the signal.
+        seed: Seed of the signal.
+
+    Returns:
+        Whether both held, and a summary of the largest difference.
+    """
+    kwargs = {
+        "reverb": True,
+        "limiter": True,
+        "gain": True,
+        "gain_db": 3,
+        "chorus": True,
+        "compressor": True,
+        "compressor_threshold": -12,
+        "compressor_ratio": 4,
+        "delay": True,
+        "delay_seconds": 0.25,
+        "delay_feedback": 0.3,
+    }
+    rng = np.random.default_rng(seed)
+    audio = rng.standard_normal(int(seconds * sample_rate)).astype(np.float32) * 0.2
+    audio *= np.sin(np.pi * np.arange(audio.shape[0]) / sample_rate) > 0
+    preset = effects_preset(**kwargs)
+    classes = {name: effect for name, effect, _ in EFFECTS}
+    board = Pedalboard([classes[name](**parameters) for name, parameters in preset])
+    expected = board(audio, sample_rate).reshape(-1)
+    with acquire_effects_chain(**kwargs) as chain:
+        output = chain.process(audio, sample_rate)
+        with acquire_effects_chain(**kwargs) as other:
+            shared = other is chain
+    if shared:
+        return False, "two users of one preset were lent the same chain"
+    if output.shape != expected.shape:
+        return (
+            False,
+            f"{output.shape[0]} samples processed, {expected.shape[0]} expected",
+        )
+    difference = float(np.abs(output - expected).max())
+    return difference <= 1e-4, f"largest difference {difference:.1e}"
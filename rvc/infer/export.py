@@ -0,0 +1,298 @@
+import os
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import soxr
+import numpy as np
+import soundfile as sf
+
+from rvc.lib.utils import ffmpeg_path
+
+EXPORT_FORMATS = ["WAV", "MP3", "FLAC", "OGG", "M4A"]
+# soundfile format and subtype of each export format; M4A is encoded by ffmpeg instead
+SOUNDFILE_FORMATS = {
+    "WAV": ("WAV", "PCM_16"),
+    "MP3": ("MP3", "MPEG_LAYER_III"),
+    "FLAC": ("FLAC", "PCM_16"),
+    "OGG": ("OGG", "VORBIS"),
+}
+# Sampling rates the codec of a format can store; formats not listed take any rate
+SUPPORTED_RATES = {
+    "MP3": [8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000],
+    "M4A": [8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000, 88200, 96000],
+}
+
+
+def parse_formats(export_format):
+    """
+    Returns the list of export formats requested, without duplicates.
+
+    Args:
+        export_format: A format such as "MP3", several separated by commas, or a list of them.
+    """
+    if isinstance(export_format, str):
+        export_format = export_format.split(",")
+    formats = []
+    for name in export_format:
+        name = name.strip().upper()
+        if name not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {name}")
+        if name not in formats:
+            formats.append(name)
+    return formats
+
+
+def export_paths(audio_output_path, export_format):
+    """
+    Returns the output path of each requested format.
+
+    Args:
+        audio_output_path: Path of the output file, whose extension is replaced per format.
+        export_format: The requested formats, see `parse_formats`.
+    """
+    base = os.path.splitext(audio_output_path)[0]
+    return [f"{base}.{name.lower()}" for name in parse_formats(export_format)]
+
+
+def export_rate(export_format, sample_rate):
+    """
+    Returns the sampling rate a format is written at: `sample_rate` itself when the codec
+    stores it, otherwise the closest rate it does.
+
+    Args:
+        export_format: One of `EXPORT_FORMATS`.
+        sample_rate: Sampling rate of the audio.
+    """
+    rates = SUPPORTED_RATES.get(export_format)
+    if rates is None or sample_rate in rates:
+        return sample_rate
+    return min(rates, key=lambda rate: abs(rate - sample_rate))
+
+
+class _FfmpegSink:
+    def __init__(self, path, sample_rate):
+        self.process = subprocess.Popen(
+            [
+                ffmpeg_path(),
+                "-nostdin",
+                "-loglevel",
+                "error",
+                "-y",
+                "-f",
+                "f32le",
+                "-ar",
+                str(sample_rate),
+                "-ac",
+                "1",
+                "-i",
+                "-",
+                "-c:a",
+                "aac",
+                "-b:a",
+                "192k",
+                path,
+            ],
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # stderr is drained as it is written, so a full pipe never blocks the encoder; the
+        # last lines are kept for the error message.
+        self.stderr = deque(maxlen=20)
+        self.stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        self.stderr_reader.start()
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            self.stderr.append(line.decode(errors="replace").rstrip())
+
+    def write(self, audio):
+        self.process.stdin.write(np.ascontiguousarray(audio, dtype=np.float32))
+
+    def close(self):
+        self.process.stdin.close()
+        returncode = self.process.wait()
+        self.stderr_reader.join()
+        self.process.stderr.close()
+        if returncode != 0:
+            error = "\n".join(self.stderr)
+            raise RuntimeError(f"ffmpeg could not encode the audio: {error}")
+
+
+class ExportWriter:
+    """
+    Encodes mono audio to one or more formats as it is written, without an intermediate file.
+
+    Each format gets its own encoder, and a streaming resampler when its codec cannot store the
+    audio's sampling rate. Blocks are encoded into all formats concurrently from the same buffer.
+    """
+
+    def __init__(self, audio_output_path, sample_rate, export_format):
+        """
+        Opens an encoder per requested format.
+
+        Args:
+            audio_output_path: Path of the output file, whose extension is replaced per format.
+            sample_rate: Sampling rate of the audio that will be written.
+            export_format: The requested formats, see `parse_formats`.
+        """
+        self.paths = export_paths(audio_output_path, export_format)
+        self.sinks = []
+        try:
+            for name, path in zip(parse_formats(export_format), self.paths):
+                rate = export_rate(name, sample_rate)
+                if name in SOUNDFILE_FORMATS:
+                    file_format, subtype = SOUNDFILE_FORMATS[name]
+                    sink = sf.SoundFile(
+                        path,
+                        "w",
+                        samplerate=rate,
+                        channels=1,
+                        format=file_format,
+                        subtype=subtype,
+                    )
+                else:
+                    sink = _FfmpegSink(path, rate)
+                resampler = (
+                    soxr.ResampleStream(
+                        sample_rate, rate, 1, dtype="float32", quality="VHQ"
+                    )
+                    if rate != sample_rate
+                    else None
+                )
+                self.sinks.append((sink, resampler))
+        except Exception:
+            self._close_sinks()
+            raise
+        self.executor = (
+            ThreadPoolExecutor(max_workers=len(self.sinks))
+            if len(self.sinks) > 1
+            else None
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _write(sink, resampler, audio, last=False):
+        if resampler is not None:
+            audio = resampler.resample_chunk(audio, last=last)
+        if audio.shape[0]:
+            sink.write(audio)
+
+    def _map(self, audio, last=False):
+        if self.executor is None:
+            for sink, resampler in self.sinks:
+                self._write(sink, resampler, audio, last)
+            return
+        futures = [
+            self.executor.submit(self._write, sink, resampler, audio, last)
+            for sink, resampler in self.sinks
+        ]
+        for future in futures:
+            future.result()
+
+    def write(self, audio):
+        """
+        Encodes a block of audio into every format.
+
+        Args:
+            audio: Mono float audio at the writer's sampling rate.
+        """
+        self._map(np.asarray(audio, dtype=np.float32))
+
+    def close(self):
+        """
+        Flushes the resamplers and finishes every file.
+        """
+        try:
+            if any(resampler is not None for _, resampler in self.sinks):
+                self._map(np.zeros(0, dtype=np.float32), last=True)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self._close_sinks()
+
+    def _close_sinks(self):
+        errors = []
+        for sink, _ in self.sinks:
+            try:
+                sink.close()
+            except Exception as error:
+                errors.append(error)
+        self.sinks = []
+        if errors:
+            raise errors[0]
+
+
+def export_audio(audio, sample_rate, audio_output_path, export_format):
+    """
+    Writes audio held in memory to every requested format.
+
+    Args:
+        audio: Mono float audio.
+        sample_rate: Sampling rate of the audio.
+        audio_output_path: Path of the output file, whose extension is replaced per format.
+        export_format: The requested formats, see `parse_formats`.
+
+    Returns:
+        The paths written, one per format.
+    """
+    with ExportWriter(audio_output_path, sample_rate, export_format) as writer:
+        writer.write(audio)
+    return writer.paths
+
+
+def check_export_writer(sample_rate=40000, seconds=3, blocks=10):
+    """
+    Checks that `ExportWriter` writes every format from streamed blocks.
+
+    A sine sweep at `sample_rate` is written in `blocks` blocks to WAV, FLAC, OGG and MP3, and
+    to M4A when ffmpeg is available. Every file must exist and be non-empty, the lossless ones
+    must decode to the input within 16-bit rounding, and MP3, whose codec cannot store 40 kHz,
+    must be written at the closest rate it supports.
+
+    Args:
+        sample_rate: Sampling rate of the written audio.
+        seconds: Length of the sweep.
+        blocks: Number of blocks the sweep is written in.
+
+    Returns:
+        Whether every file was as expected, and a summary of the problems found.
+    """
+    import shutil
+    import tempfile
+
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    audio = (0.5 * np.sin(2 * np.pi * (200 + 400 * t) * t)).astype(np.float32)
+    formats = ["WAV", "FLAC", "OGG", "MP3"]
+    if shutil.which(ffmpeg_path()) is not None:
+        formats.append("M4A")
+    problems = []
+    with tempfile.TemporaryDirectory() as folder:
+        with ExportWriter(
+            os.path.join(folder, "output.wav"), sample_rate, ",".join(formats)
+        ) as writer:
+            for block in np.array_split(audio, blocks):
+                writer.write(block)
+        for name, path in zip(formats, writer.paths):
+            if not os.path.isfile(path) or os.path.getsize(path) == 0:
+                problems.append(f"{name} not written")
+            elif name in ("WAV", "FLAC"):
+                decoded, rate = sf.read(path, dtype="float32")
+                if rate != sample_rate or decoded.shape != audio.shape:
+                    problems.append(
+                        f"{name} has {decoded.shape[0]} samples at {rate} Hz"
+                    )
+                elif np.abs(decoded - audio).max() > 1e-4:
+                    problems.append(f"{name} differs from the input")
+            elif name == "MP3" and sf.info(path).samplerate != export_rate(
+                name, sample_rate
+            ):
+                problems.append(f"MP3 written at {sf.info(path).samplerate} Hz")
+    summary = ", ".join(problems) or f"{', '.join(formats)} written as expected"
+    return not problems, summary
@@ -3,33 +3,48 @@ import sys
 import soxr
 import time
 import torch
-import librosa
 import logging
+import tempfile
 import traceback
 import numpy as np
-import soundfile as sf
 import noisereduce as nr
-from pedalboard import (
-    Pedalboard,
-    Chorus,
-    Distortion,
-    Reverb,
-    PitchShift,
-    Limiter,
-    Gain,
-    Bitcrush,
-    Clipping,
-    Compressor,
-    Delay,
-)
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 
 now_dir = os.getcwd()
 sys.path.append(now_dir)
 
 from rvc.infer.pipeline import Pipeline as VC
-from rvc.lib.utils import load_audio_infer, load_embedding
+from rvc.infer.stream import StreamingEngine
+from rvc.infer.registry import get_model_registry
+from rvc.infer.compiled import (
+    artifact_path,
+    checkpoint_hash,
+    compile_voice_model,
+    load_artifact,
+    save_artifact,
+    warm_up,
+)
+from rvc.infer.onnx_backend import (
+    embedder_parity,
+    export_synthesizer,
+    get_embedder,
+    get_rmvpe,
+    load_synthesizer,
+    onnx_path,
+    rmvpe_parity,
+    synthesizer_parity,
+)
+from rvc.infer.optimize import prepare_for_inference
+from rvc.infer.packed import load_checkpoint
+from rvc.infer.export import ExportWriter, export_audio, export_paths
+from rvc.infer.effects import acquire_effects_chain
+from rvc.infer.quantize import quantize_int8, quantize_synthesizer, resolve_precision
+from rvc.infer.batch import run_pipelined_batch, run_sharded_batch
+from rvc.lib.utils import audio_duration, iter_audio, load_audio_infer, load_embedding
 from rvc.lib.tools.split_audio import process_audio, merge_audio
 from rvc.lib.algorithm.synthesizers import Synthesizer
+from rvc.lib.predictors.RMVPE import RMVPE0Predictor
 from rvc.configs.config import Config
 
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -48,6 +63,10 @@ class VoiceConverter:
         Initializes the VoiceConverter with default configuration, and sets up models and parameters.
         """
         self.config = Config()  # Load configuration
+        self.model_registry = get_model_registry(
+            self.config
+        )  # Shared, budgeted store of loaded models
+        self.registry_keys = set()  # Registry entries this converter loaded
         self.hubert_model = (
             None  # Initialize the Hubert model (for embedding extraction)
         )
@@ -60,13 +79,45 @@ class VoiceConverter:
         self.n_spk = None  # Number of speakers in the model
         self.use_f0 = None  # Whether the model uses F0
         self.loaded_model = None
-        self._is_cancelled = False # Cancellation flag
+        self.input_samples = 0  # 16 kHz input samples decoded by the last conversion
+        # Precision models are loaded at: "fp32", or "int8" for dynamic quantization on CPU
+        self.precision = resolve_precision(self.config.precision, self.config.device)
+        # Whether voice models are compiled with TorchScript
+        self.compile_models = self.config.compile_models
+        self._is_cancelled = False  # Cancellation flag
 
     def request_cancellation(self):
         """Sets the cancellation flag."""
         print(">>> Cancellation requested for VoiceConverter instance.")
         self._is_cancelled = True
 
+    def set_precision(self, precision):
+        """
+        Switches the precision models are loaded at, reloading them on next use if it changed.
+
+        Args:
+            precision (str): "fp32", or "int8" for dynamic int8 quantization on CPU. None keeps the current precision.
+        """
+        if precision is None:
+            return
+        precision = resolve_precision(precision, self.config.device)
+        if precision != self.precision:
+            self.precision = precision
+            self.hubert_model = self.loaded_model = None
+
+    def set_compile_models(self, compile_models):
+        """
+        Switches TorchScript compilation of voice models, reloading the model on next use if it changed.
+
+        Args:
+            compile_models (bool): Whether to compile voice models. None keeps the current setting.
+        """
+        if compile_models is None:
+            return
+        if compile_models != self.compile_models:
+            self.compile_models = compile_models
+            self.loaded_model = None
+
     def load_hubert(self, embedder_model: str, embedder_model_custom: str = None):
         """
         Loads the HuBERT model for speaker embedding extraction.
@@ -75,9 +126,87 @@ class VoiceConverter:
             embedder_model (str): Path to the pre-trained HuBERT model.
             embedder_model_custom (str): Path to the custom HuBERT model.
         """
-        self.hubert_model = load_embedding(embedder_model, embedder_model_custom)
-        self.hubert_model = self.hubert_model.to(self.config.device).float()
-        self.hubert_model.eval()
+
+        def load():
+            if self.config.inference_backend == "onnx":
+                return get_embedder(
+                    embedder_model,
+                    embedder_model_custom,
+                    self.config.device,
+                    self.precision,
+                )
+            model = (
+                load_embedding(embedder_model, embedder_model_custom)
+                .to(self.config.device)
+                .float()
+                .eval()
+            )
+            return quantize_int8(model) if self.precision == "int8" else model
+
+        key = (
+            "embedder",
+            embedder_model,
+            embedder_model_custom,
+            self.config.device,
+            self.precision,
+            self.config.inference_backend,
+        )
+        self.registry_keys.add(key)
+        self.hubert_model = self.model_registry.get(key, load, self.config.device)
+
+    def load_audio(self, audio_input_path, use_cache=True, **kwargs):
+        """
+        Loads the input audio at 16 kHz, reusing a previously decoded copy when available.
+
+        Args:
+            audio_input_path (str): Path to the input audio file.
+            use_cache (bool): Whether to read and write the feature cache. The cache belongs to the voice model's pipeline, so it is skipped while no model is loaded.
+            **kwargs: Formant shifting options forwarded to `load_audio_infer`.
+        """
+        if not use_cache or self.vc is None or not os.path.isfile(audio_input_path):
+            return load_audio_infer(audio_input_path, 16000, **kwargs)
+        formant_options = (
+            (kwargs.get("formant_qfrency", 0.8), kwargs.get("formant_timbre", 0.8))
+            if kwargs.get("formant_shifting", False)
+            else None
+        )
+        cache_key = self.vc.feature_cache.make_file_key(
+            audio_input_path, "audio", 16000, "float32", formant_options
+        )
+        audio = self.vc.feature_cache.load(cache_key)
+        if audio is None:
+            audio = load_audio_infer(audio_input_path, 16000, **kwargs)
+            self.vc.feature_cache.save(cache_key, audio)
+        return audio
+
+    def load_input(self, audio_input_path, feature_cache=True, **kwargs):
+        """
+        Loads the input audio at 16 kHz and normalizes its peak level for conversion.
+
+        Args:
+            audio_input_path (str): Path to the input audio file.
+            feature_cache (bool): Whether to reuse a previously decoded copy.
+            **kwargs: Formant shifting options forwarded to `load_audio_infer`.
+        """
+        audio = self.load_audio(audio_input_path, feature_cache, **kwargs)
+        audio_max = np.abs(audio).max() / 0.95
+        if audio_max > 1:
+            audio /= audio_max
+        return audio
+
+    def write_output(self, audio_opt, sample_rate, audio_output_path, export_format):
+        """
+        Encodes converted audio straight to every requested export format.
+
+        Args:
+            audio_opt (numpy.ndarray): The converted audio.
+            sample_rate (int): Sampling rate of the converted audio.
+            audio_output_path (str): Path of the output file, whose extension is replaced per format.
+            export_format (str): Desired audio format (e.g., "WAV", "MP3"), or several separated by commas.
+        """
+        return ", ".join(
+            export_audio(audio_opt, sample_rate, audio_output_path, export_format)
+        )
 
     @staticmethod
     def remove_audio_noise(data, sr, reduction_strength=0.7):
@@ -98,103 +227,23 @@ class VoiceConverter:
             print(f"An error occurred removing audio noise: {error}")
             return None
 
-    @staticmethod
-    def convert_audio_format(input_path, output_path, output_format):
-        """
-        Converts an audio file to a specified output format.
-
-        Args:
-            input_path (str): Path to the input audio file.
-            output_path (str): Path to the output audio file.
-            output_format (str): Desired audio format (e.g., "WAV", "MP3").
-        """
-        try:
-            if output_format != "WAV":
-                print(f"Saving audio as {output_format}...")
-                audio, sample_rate = librosa.load(input_path, sr=None)
-                common_sample_rates = [
-                    8000,
-                    11025,
-                    12000,
-                    16000,
-                    22050,
-                    24000,
-                    32000,
-                    44100,
-                    48000,
-                ]
-                target_sr = min(common_sample_rates, key=lambda x: abs(x - sample_rate))
-                audio = librosa.resample(
-                    audio, orig_sr=sample_rate, target_sr=target_sr, res_type="soxr_vhq"
-                )
-                sf.write(output_path, audio, target_sr, format=output_format.lower())
-            return output_path
-        except Exception as error:
-            print(f"An error occurred converting the audio format: {error}")
-
     @staticmethod
     def post_process_audio(
         audio_input,
         sample_rate,
         **kwargs,
     ):
-        board = Pedalboard()
-        if kwargs.get("reverb", False):
-            reverb = Reverb(
-                room_size=kwargs.get("reverb_room_size", 0.5),
-                damping=kwargs.get("reverb_damping", 0.5),
-                wet_level=kwargs.get("reverb_wet_level", 0.33),
-                dry_level=kwargs.get("reverb_dry_level", 0.4),
-                width=kwargs.get("reverb_width", 1.0),
-                freeze_mode=kwargs.get("reverb_freeze_mode", 0),
-            )
-            board.append(reverb)
-        if kwargs.get("pitch_shift", False):
-            pitch_shift = PitchShift(semitones=kwargs.get("pitch_shift_semitones", 0))
-            board.append(pitch_shift)
-        if kwargs.get("limiter", False):
-            limiter = Limiter(
-                threshold_db=kwargs.get("limiter_threshold", -6),
-                release_ms=kwargs.get("limiter_release", 0.05),
-            )
-            board.append(limiter)
-        if kwargs.get("gain", False):
-            gain = Gain(gain_db=kwargs.get("gain_db", 0))
-            board.append(gain)
-        if kwargs.get("distortion", False):
-            distortion = Distortion(drive_db=kwargs.get("distortion_gain", 25))
-            board.append(distortion)
-        if kwargs.get("chorus", False):
-            chorus = Chorus(
-                rate_hz=kwargs.get("chorus_rate", 1.0),
-                depth=kwargs.get("chorus_depth", 0.25),
-                centre_delay_ms=kwargs.get("chorus_delay", 7),
-                feedback=kwargs.get("chorus_feedback", 0.0),
-                mix=kwargs.get("chorus_mix", 0.5),
-            )
-            board.append(chorus)
-        if kwargs.get("bitcrush", False):
-            bitcrush = Bitcrush(bit_depth=kwargs.get("bitcrush_bit_depth", 8))
-            board.append(bitcrush)
-        if kwargs.get("clipping", False):
-            clipping = Clipping(threshold_db=kwargs.get("clipping_threshold", 0))
-            board.append(clipping)
-        if kwargs.get("compressor", False):
-            compressor = Compressor(
-                threshold_db=kwargs.get("compressor_threshold", 0),
-                ratio=kwargs.get("compressor_ratio", 1),
-                attack_ms=kwargs.get("compressor_attack", 1.0),
-                release_ms=kwargs.get("compressor_release", 100),
-            )
-            board.append(compressor)
-        if kwargs.get("delay", False):
-            delay = Delay(
-                delay_seconds=kwargs.get("delay_seconds", 0.5),
-                feedback=kwargs.get("delay_feedback", 0.0),
-                mix=kwargs.get("delay_mix", 0.5),
-            )
-            board.append(delay)
-        return board(audio_input, sample_rate)
+        """
+        Applies the post-processing effects enabled in `kwargs`, through a pooled effects
+        chain of those settings.
+
+        Args:
+            audio_input (numpy.ndarray): The converted audio.
+            sample_rate (int): Sampling rate of the converted audio.
+            **kwargs: The post-processing arguments of `convert_audio`.
+        """
+        with acquire_effects_chain(**kwargs) as effects:
+            return effects.process(audio_input, sample_rate)
 
     def convert_audio(
         self,
@@ -210,8 +259,12 @@ class VoiceConverter:
         protect: float = 0.5,
         hop_length: int = 128,
         split_audio: bool = False,
+        split_workers: int = 1,
         f0_autotune: bool = False,
         f0_autotune_strength: float = 1,
+        f0_autotune_key: str = "C",
+        f0_autotune_scale: str = "chromatic",
+        f0_autotune_speed: float = 0,
         embedder_model: str = "contentvec",
         embedder_model_custom: str = None,
         clean_audio: bool = False,
@@ -220,6 +273,13 @@ class VoiceConverter:
         post_process: bool = False,
         resample_sr: int = 0,
         sid: int = 0,
+        f0_cache: bool = True,
+        feature_cache: bool = True,
+        silence_gate: bool = False,
+        precision: str = None,
+        compile_models: bool = None,
+        audio: np.ndarray = None,
+        write_output: bool = True,
         **kwargs,
     ):
         """
@@ -237,45 +297,68 @@ class VoiceConverter:
             model_path (str): Path to the voice conversion model.
             index_path (str): Path to the index file.
             split_audio (bool): Whether to split the audio for processing.
+            split_workers (int, optional): Number of split chunks converted concurrently. Default is 1.
             f0_autotune (bool): Whether to use F0 autotune.
+            f0_autotune_key (str, optional): Tonic of the autotune scale. Default is "C".
+            f0_autotune_scale (str, optional): Scale whose notes the autotune snaps to, e.g. "major". Default is "chromatic".
+            f0_autotune_speed (float, optional): Retune speed of the autotune in milliseconds, 0 snaps instantly. Default is 0.
             clean_audio (bool): Whether to clean the audio.
             clean_strength (float): Strength of the audio cleaning.
-            export_format (str): Format for exporting the audio.
+            export_format (str): Format for exporting the audio, or several separated by commas.
             f0_file (str): Path to the F0 file.
             embedder_model (str): Path to the embedder model.
             embedder_model_custom (str): Path to the custom embedder model.
             resample_sr (int, optional): Resample sampling rate. Default is 0.
             sid (int, optional): Speaker ID. Default is 0.
+            f0_cache (bool, optional): Whether to reuse cached F0 contours. Default is True.
+            feature_cache (bool, optional): Whether to reuse cached decoded input and embedder features. Default is True.
+            silence_gate (bool, optional): Whether to skip long silences instead of converting them. Default is False.
+            precision (str, optional): "fp32", or "int8" for dynamic int8 quantization on CPU. Default is the configured precision.
+            compile_models (bool, optional): Whether to compile the voice model with TorchScript and cache the artifact next to it. Default is the configured setting.
+            audio (np.ndarray, optional): Already decoded input from `load_input`. The input file is not read and the cancellation flag is left to the caller.
+            write_output (bool, optional): Whether to write the output file. If False, `(audio, sample_rate)` is returned instead. Default is True.
             **kwargs: Additional keyword arguments.
         """
-        self._is_cancelled = False # Reset cancellation flag at start
+        if audio is None:
+            self._is_cancelled = False  # Reset cancellation flag at start
         if not model_path:
             print("No model path provided. Aborting conversion.")
             return
 
-        if self._is_cancelled: print(">>> Inference cancelled before get_vc."); return
+        if self._is_cancelled:
+            print(">>> Inference cancelled before get_vc.")
+            return
+        self.set_precision(precision)
+        self.set_compile_models(compile_models)
         self.get_vc(model_path, sid)
 
         try:
             start_time = time.time()
             print(f"Converting audio '{audio_input_path}'...")
 
-            if self._is_cancelled: print(">>> Inference cancelled before load_audio_infer."); return
-            audio = load_audio_infer(
+            stream_input = audio is None and self.should_stream_input(
                 audio_input_path,
-                16000,
+                write_output=write_output,
+                split_audio=split_audio,
+                clean_audio=clean_audio,
+                post_process=post_process,
+                f0_file=f0_file,
                 **kwargs,
             )
-            audio_max = np.abs(audio).max() / 0.95
-
-            if audio_max > 1:
-                audio /= audio_max
+            if audio is None and not stream_input:
+                if self._is_cancelled:
+                    print(">>> Inference cancelled before load_audio_infer.")
+                    return
+                audio = self.load_input(audio_input_path, feature_cache, **kwargs)
+            self.input_samples = 0 if audio is None else audio.shape[0]
 
             if not self.hubert_model or embedder_model != self.last_embedder_model:
                 self.load_hubert(embedder_model, embedder_model_custom)
                 self.last_embedder_model = embedder_model
 
-            if self._is_cancelled: print(">>> Inference cancelled before file_index setup."); return
+            if self._is_cancelled:
+                print(">>> Inference cancelled before file_index setup.")
+                return
             file_index = (
                 index_path.strip()
                 .strip('"')
@@ -296,16 +379,16 @@ class VoiceConverter:
                 chunks.append(audio)
 
             converted_chunks = []
-            if self._is_cancelled: print(">>> Inference cancelled before chunk loop."); return
-            for c in chunks:
-                # Check cancellation inside loop
-                if self._is_cancelled: print(">>> Inference cancelled inside chunk loop."); break # Exit loop if cancelled
+            if self._is_cancelled:
+                print(">>> Inference cancelled before chunk loop.")
+                return
 
-                audio_opt = self.vc.pipeline(
+            def convert_chunk(chunk, normalize=True):
+                return self.vc.pipeline(
                     model=self.hubert_model,
                     net_g=self.net_g,
                     sid=sid,
-                    audio=c,
+                    audio=chunk,
                     pitch=pitch,
                     f0_method=f0_method,
                     file_index=file_index,
@@ -317,25 +400,79 @@ class VoiceConverter:
                     hop_length=hop_length,
                     f0_autotune=f0_autotune,
                     f0_autotune_strength=f0_autotune_strength,
+                    f0_autotune_key=f0_autotune_key,
+                    f0_autotune_scale=f0_autotune_scale,
+                    f0_autotune_speed=f0_autotune_speed,
                     f0_file=f0_file,
+                    f0_cache=f0_cache,
+                    embedder_key=(
+                        f"{embedder_model}:{embedder_model_custom}:{self.precision}"
+                        f":{self.config.inference_backend}"
+                        if feature_cache
+                        else None
+                    ),
+                    silence_gate=silence_gate,
+                    normalize=normalize,
                 )
-                converted_chunks.append(audio_opt)
-                if split_audio:
-                    print(f"Converted audio chunk {len(converted_chunks)}")
+
+            if stream_input:
+                audio_output_path = self.convert_input_stream(
+                    audio_input_path,
+                    audio_output_path,
+                    export_format,
+                    convert_chunk,
+                    kwargs if post_process else None,
+                )
+                if audio_output_path is not None:
+                    elapsed_time = time.time() - start_time
+                    print(
+                        f"Conversion completed at '{audio_output_path}' in {elapsed_time:.2f} seconds."
+                    )
+                return
+
+            split_workers = min(split_workers, len(chunks)) if split_audio else 1
+            if split_workers > 1:
+                # Chunks are independent; results are collected in input order for the merge.
+                with ThreadPoolExecutor(max_workers=split_workers) as executor:
+                    futures = [executor.submit(convert_chunk, c) for c in chunks]
+                    for future in futures:
+                        if self._is_cancelled:
+                            print(">>> Inference cancelled inside chunk loop.")
+                            for pending in futures:
+                                pending.cancel()
+                            break
+                        converted_chunks.append(future.result())
+                        print(f"Converted audio chunk {len(converted_chunks)}")
+            else:
+                for c in chunks:
+                    # Check cancellation inside loop
+                    if self._is_cancelled:
+                        print(">>> Inference cancelled inside chunk loop.")
+                        break  # Exit loop if cancelled
+
+                    converted_chunks.append(convert_chunk(c))
+                    if split_audio:
+                        print(f"Converted audio chunk {len(converted_chunks)}")
 
             # Check after loop in case it was cancelled
-            if self._is_cancelled: print(">>> Inference cancelled after chunk loop."); return
+            if self._is_cancelled:
+                print(">>> Inference cancelled after chunk loop.")
+                return
 
             if split_audio:
-                if self._is_cancelled: print(">>> Inference cancelled before merge_audio."); return
+                if self._is_cancelled:
+                    print(">>> Inference cancelled before merge_audio.")
+                    return
                 audio_opt = merge_audio(
                     chunks, converted_chunks, intervals, 16000, self.tgt_sr
                 )
             else:
-                    audio_opt = converted_chunks[0]
+                audio_opt = converted_chunks[0]
 
             if clean_audio:
-                if self._is_cancelled: print(">>> Inference cancelled before remove_audio_noise."); return
+                if self._is_cancelled:
+                    print(">>> Inference cancelled before remove_audio_noise.")
+                    return
                 cleaned_audio = self.remove_audio_noise(
                     audio_opt, self.tgt_sr, clean_strength
                 )
@@ -343,34 +480,251 @@ class VoiceConverter:
                     audio_opt = cleaned_audio
 
             if post_process:
-                if self._is_cancelled: print(">>> Inference cancelled before post_process_audio."); return
+                if self._is_cancelled:
+                    print(">>> Inference cancelled before post_process_audio.")
+                    return
                 audio_opt = self.post_process_audio(
                     audio_input=audio_opt,
                     sample_rate=self.tgt_sr,
                     **kwargs,
                 )
 
-            if self._is_cancelled: print(">>> Inference cancelled before sf.write."); return
-            sf.write(audio_output_path, audio_opt, self.tgt_sr, format="WAV")
-            output_path_format = audio_output_path.replace(
-                ".wav", f".{export_format.lower()}"
-            )
-            audio_output_path = self.convert_audio_format(
-                audio_output_path, output_path_format, export_format
+            if not write_output:
+                return audio_opt, self.tgt_sr
+
+            if self._is_cancelled:
+                print(">>> Inference cancelled before write_output.")
+                return
+            audio_output_path = self.write_output(
+                audio_opt, self.tgt_sr, audio_output_path, export_format
             )
 
             elapsed_time = time.time() - start_time
             print(
                 f"Conversion completed at '{audio_output_path}' in {elapsed_time:.2f} seconds."
             )
+            if feature_cache:
+                stats = self.vc.feature_cache.stats()
+                print(f"Feature cache: {stats['hits']} hits, {stats['misses']} misses.")
         except Exception as error:
             print(f"An error occurred during audio conversion: {error}")
             print(traceback.format_exc())
 
+    def should_stream_input(self, audio_input_path, **kwargs):
+        """
+        Returns whether an input is long enough to be converted segment by segment straight
+        from the file, see `convert_input_stream`.
+
+        Splitting, noise reduction, formant shifting and F0 files all need the whole input or
+        output at once, so inputs using them are always decoded in full.
+
+        Args:
+            audio_input_path (str): Path to the input audio file.
+            **kwargs: The `convert_audio` arguments.
+        """
+        if (
+            not self.config.stream_input_seconds
+            or not kwargs.get("write_output", True)
+            or kwargs.get("split_audio")
+            or kwargs.get("clean_audio")
+            or kwargs.get("formant_shifting")
+            or hasattr(kwargs.get("f0_file"), "name")
+        ):
+            return False
+        duration = audio_duration(audio_input_path)
+        return duration is not None and duration > self.config.stream_input_seconds
+
+    def convert_input_stream(
+        self,
+        audio_input_path,
+        audio_output_path,
+        export_format,
+        convert_segment,
+        effects=None,
+    ):
+        """
+        Converts an input file segment by segment with memory bounded independently of its length.
+
+        The file is read twice: once for its peak level, which the input is normalized by as
+        in `load_input`, and once to convert it. Segments are converted without their own peak
+        normalization and spooled to a temporary file; the whole output is then scaled by one
+        gain, the one `Pipeline.finalize_audio` would apply to it, while it is encoded. Memory
+        is bounded by one decoded block and one segment of `Pipeline.segment_stream`.
+
+        Args:
+            audio_input_path (str): Path to the input audio file.
+            audio_output_path (str): Path of the output file, whose extension is replaced per format.
+            export_format (str): Desired audio format (e.g., "WAV", "MP3"), or several separated by commas.
+            convert_segment (callable): Converts one 16 kHz segment with `Pipeline.pipeline`, taking its `normalize` flag as second argument.
+            effects (dict, optional): Post-processing arguments of `convert_audio`, whose effects are applied to the output as it is encoded.
+
+        Returns:
+            The paths of the output files, or None if the conversion was cancelled.
+        """
+        audio_max = max(
+            (
+                float(np.abs(block).max())
+                for block in iter_audio(audio_input_path, 16000)
+            ),
+            default=0.0,
+        )
+        scale = 0.95 / audio_max if audio_max > 0.95 else 1.0
+
+        def scaled_blocks():
+            for block in iter_audio(audio_input_path, 16000):
+                self.input_samples += block.shape[0]
+                yield block * scale
+
+        blocks = scaled_blocks()
+        samples_per_frame = self.vc.tgt_sr // 100
+        with tempfile.TemporaryFile() as spool:
+            peak = 0.0
+            for index, (segment, head, tail) in enumerate(
+                self.vc.segment_stream(blocks)
+            ):
+                if self._is_cancelled:
+                    print(">>> Inference cancelled inside segment loop.")
+                    return None
+                converted = convert_segment(segment, False)
+                start = head // self.vc.window * samples_per_frame
+                end = converted.shape[0] - tail // self.vc.window * samples_per_frame
+                converted = converted[start:end]
+                if converted.shape[0]:
+                    peak = max(peak, float(np.abs(converted).max()))
+                spool.write(np.ascontiguousarray(converted, dtype=np.float32))
+                print(f"Converted audio segment {index + 1}")
+
+            gain = 0.99 / peak if peak > 0.99 else 1.0
+            spool.seek(0)
+            # The chain is only taken for the encoding pass, not while segments are converted.
+            lend_chain = (
+                acquire_effects_chain(**effects)
+                if effects is not None
+                else nullcontext()
+            )
+            with lend_chain as chain:
+                output = ExportWriter(audio_output_path, self.tgt_sr, export_format)
+                with output:
+                    if chain is not None:
+                        chain.reset()
+                    while True:
+                        block = np.frombuffer(
+                            spool.read(self.tgt_sr * 10 * 4), dtype=np.float32
+                        )
+                        if not block.shape[0]:
+                            break
+                        block = block * np.float32(gain)
+                        if chain is not None:
+                            block = chain.process_chunk(block, self.tgt_sr)
+                        output.write(block)
+                    if chain is not None:
+                        output.write(chain.flush(self.tgt_sr))
+        return ", ".join(output.paths)
+
+    def convert_stream(
+        self,
+        frames_iter,
+        model_path: str,
+        index_path: str = "",
+        sample_rate: int = 16000,
+        pitch: int = 0,
+        f0_method: str = "rmvpe",
+        index_rate: float = 0.75,
+        protect: float = 0.5,
+        hop_length: int = 128,
+        f0_autotune: bool = False,
+        f0_autotune_strength: float = 1,
+        embedder_model: str = "contentvec",
+        embedder_model_custom: str = None,
+        sid: int = 0,
+        context_time: float = 2.5,
+        crossfade_time: float = 0.05,
+        sola_search_time: float = 0.012,
+    ):
+        """
+        Converts audio block by block, yielding converted blocks at the model's sampling rate.
+
+        The voice model, embedder, F0 predictor and index stay resident for the whole stream.
+        Per-block latency is available from `self.stream_engine.stats()` while streaming and is
+        printed once the input is exhausted.
+
+        Args:
+            frames_iter (iterable): Fixed-size PCM blocks of the input audio.
+            model_path (str): Path to the voice conversion model.
+            index_path (str): Path to the index file.
+            sample_rate (int): Sampling rate of the input blocks.
+            pitch (int): Key for F0 up-sampling.
+            f0_method (str): Method for F0 extraction.
+            index_rate (float): Rate for index matching.
+            protect (float): Protection rate for certain audio segments.
+            hop_length (int): Hop length for audio processing.
+            f0_autotune (bool): Whether to use F0 autotune.
+            f0_autotune_strength (float): Strength of the autotune.
+            embedder_model (str): Path to the embedder model.
+            embedder_model_custom (str): Path to the custom embedder model.
+            sid (int, optional): Speaker ID. Default is 0.
+            context_time (float): Seconds of past input used as context for every block.
+            crossfade_time (float): Seconds of crossfade between output blocks.
+            sola_search_time (float): Seconds searched for the best block alignment.
+        """
+        self._is_cancelled = False
+        self.get_vc(model_path, sid)
+        if not self.hubert_model or embedder_model != self.last_embedder_model:
+            self.load_hubert(embedder_model, embedder_model_custom)
+            self.last_embedder_model = embedder_model
+
+        index = big_npy = None
+        file_index = index_path.strip().strip('"').strip()
+        if file_index and os.path.exists(file_index) and index_rate > 0:
+            try:
+                index, big_npy = self.vc.index_store.get(file_index)
+            except Exception as error:
+                print(f"An error occurred reading the FAISS index: {error}")
+
+        self.stream_engine = StreamingEngine(
+            vc=self.vc,
+            hubert_model=self.hubert_model,
+            net_g=self.net_g,
+            sid=sid,
+            tgt_sr=self.tgt_sr,
+            version=self.version,
+            use_f0=self.use_f0,
+            index=index,
+            big_npy=big_npy,
+            pitch=pitch,
+            f0_method=f0_method,
+            index_rate=index_rate,
+            protect=protect,
+            hop_length=hop_length,
+            f0_autotune=f0_autotune,
+            f0_autotune_strength=f0_autotune_strength,
+            context_time=context_time,
+            crossfade_time=crossfade_time,
+            sola_search_time=sola_search_time,
+        )
+        for block in self.stream_engine.process(frames_iter, sample_rate):
+            if self._is_cancelled:
+                print(">>> Streaming inference cancelled.")
+                break
+            yield block
+
+        stats = self.stream_engine.stats()
+        if stats["blocks"]:
+            print(
+                f"Streamed {stats['blocks']} blocks: "
+                f"{stats['mean_ms']:.1f} ms mean, {stats['p95_ms']:.1f} ms p95, "
+                f"{stats['max_ms']:.1f} ms max per block, "
+                f"{stats['algorithmic_latency_ms']:.0f} ms algorithmic latency."
+            )
+
     def convert_audio_batch(
         self,
         audio_input_paths: str,
         audio_output_path: str,
+        decode_workers: int = 2,
+        encode_workers: int = 2,
+        queue_size: int = 4,
+        workers: int = 1,
         **kwargs,
     ):
         """
@@ -381,9 +735,13 @@ class VoiceConverter:
             audio_output_path (str): Path to the output audio file.
             resample_sr (int, optional): Resample sampling rate. Default is 0.
             sid (int, optional): Speaker ID. Default is 0.
+            decode_workers (int, optional): Threads decoding and resampling input files. Default is 2.
+            encode_workers (int, optional): Threads writing and re-encoding output files. Default is 2.
+            queue_size (int, optional): Maximum number of files buffered between stages. Default is 4.
+            workers (int, optional): Worker processes to shard the batch across, each with its own share of CPU cores. Default is 1.
             **kwargs: Additional keyword arguments.
         """
-        self._is_cancelled = False # Reset cancellation flag at start
+        self._is_cancelled = False  # Reset cancellation flag at start
         pid = os.getpid()
         try:
             with open(
@@ -414,21 +772,63 @@ class VoiceConverter:
                 )
             ]
             print(f"Detected {len(audio_files)} audio files for inference.")
-            if self._is_cancelled: print(">>> Batch inference cancelled before file loop."); return
+            if self._is_cancelled:
+                print(">>> Batch inference cancelled before file loop.")
+                return
+            jobs = []
+            export_format = kwargs.get("export_format", "WAV")
             for a in audio_files:
-                # Check cancellation inside loop
-                if self._is_cancelled: print(">>> Batch inference cancelled inside file loop."); break # Exit loop
-
                 new_input = os.path.join(audio_input_paths, a)
                 new_output = os.path.splitext(a)[0] + "_output.wav"
                 new_output = os.path.join(audio_output_path, new_output)
-                if os.path.exists(new_output):
+                # Files already converted to every requested format are skipped.
+                if all(
+                    os.path.exists(path)
+                    for path in export_paths(new_output, export_format)
+                ):
                     continue
-                self.convert_audio(
-                    audio_input_path=new_input,
-                    audio_output_path=new_output,
-                    **kwargs,
+                jobs.append((new_input, new_output))
+
+            if workers > 1:
+                run_sharded_batch(
+                    jobs, kwargs, workers, is_cancelled=lambda: self._is_cancelled
                 )
+                return
+
+            # Decoding needs the voice model's feature cache, so load the model first.
+            self.set_precision(kwargs.get("precision"))
+            self.set_compile_models(kwargs.get("compile_models"))
+            self.get_vc(kwargs.get("model_path"), kwargs.get("sid", 0))
+            if self.cpt is None:
+                print(f"Model not found: {kwargs.get('model_path')}")
+                return
+
+            def encode(job, result):
+                audio_opt, sample_rate = result
+                # Effects run here, on the encode threads, overlapped with the inference of the
+                # next file.
+                if kwargs.get("post_process", False):
+                    audio_opt = self.post_process_audio(
+                        audio_opt, sample_rate, **kwargs
+                    )
+                return self.write_output(audio_opt, sample_rate, job[1], export_format)
+
+            run_pipelined_batch(
+                jobs,
+                decode=lambda job: self.load_input(job[0], **kwargs),
+                infer=lambda job, audio: self.convert_audio(
+                    audio_input_path=job[0],
+                    audio_output_path=job[1],
+                    audio=audio,
+                    write_output=False,
+                    **dict(kwargs, post_process=False),
+                ),
+                encode=encode,
+                is_cancelled=lambda: self._is_cancelled,
+                decode_workers=decode_workers,
+                encode_workers=encode_workers,
+                queue_size=queue_size,
+            )
             print(f"Conversion completed at '{audio_input_paths}'.")
             elapsed_time = time.time() - start_time
             print(f"Batch conversion completed in {elapsed_time:.2f} seconds.")
@@ -438,13 +838,14 @@ class VoiceConverter:
         finally:
             os.remove(os.path.join(now_dir, "assets", "infer_pid.txt"))
 
-    def get_vc(self, weight_root, sid):
+    def get_vc(self, weight_root, sid, cpt=None):
         """
         Loads the voice conversion model and sets up the pipeline.
 
         Args:
             weight_root (str): Path to the model weights.
             sid (int): Speaker ID.
+            cpt (dict, optional): Already loaded checkpoint of `weight_root`, e.g. one shared between processes.
         """
         if sid == "" or sid == []:
             self.cleanup_model()
@@ -452,15 +853,179 @@ class VoiceConverter:
                 torch.cuda.empty_cache()
 
         if not self.loaded_model or self.loaded_model != weight_root:
-            self.load_model(weight_root)
-            if self.cpt is not None:
-                self.setup_network()
-                self.setup_vc_instance()
+            if os.path.isfile(weight_root):
+                key = (
+                    "synthesizer",
+                    os.path.abspath(weight_root),
+                    os.path.getmtime(weight_root),
+                    self.config.device,
+                    self.precision,
+                    self.config.inference_backend,
+                    self.compile_models,
+                )
+                self.registry_keys.add(key)
+                voice_model = self.model_registry.get(
+                    key,
+                    lambda: self.build_voice_model(weight_root, cpt),
+                    self.config.device,
+                )
+                self.apply_voice_model(voice_model)
+            else:
+                self.cpt = None
             self.loaded_model = weight_root
 
+    def build_voice_model(self, weight_root, cpt=None):
+        """
+        Loads a voice model from disk into the form kept by the model registry.
+
+        With `compile_models` enabled, the model is compiled with TorchScript on first use and
+        the artifact is cached next to the checkpoint, keyed by its content hash, the torch
+        version, the device and the precision; later loads read the artifact directly. Models
+        built from a shared checkpoint are left uncompiled so their weights stay shared.
+
+        Args:
+            weight_root (str): Path to the model weights.
+            cpt (dict, optional): Already loaded checkpoint to use instead of reading the file.
+        """
+        if self.config.inference_backend == "onnx":
+            return self.build_onnx_voice_model(weight_root, cpt)
+
+        device = self.config.device
+        artifact = None
+        if self.compile_models and cpt is None:
+            artifact = artifact_path(
+                weight_root, checkpoint_hash(weight_root), device, self.precision
+            )
+            loaded = load_artifact(artifact, device)
+            if loaded is not None:
+                net_g, cpt = loaded
+                version = cpt.get("version", "v1")
+                warm_up(
+                    net_g, 768 if version == "v2" else 256, cpt.get("f0", 1), device
+                )
+                return {"net_g": net_g, "cpt": cpt}
+
+        shared = cpt is not None
+        self.load_model(weight_root, cpt)
+        self.setup_network()
+        if not shared:
+            # Folding weight norm writes new weight tensors, which would unshare them.
+            prepare_for_inference(self.net_g)
+        if self.precision == "int8":
+            quantize_synthesizer(self.net_g)
+        # The weights now live in net_g, only the metadata of the checkpoint is kept.
+        cpt = {key: value for key, value in self.cpt.items() if key != "weight"}
+        if artifact is not None:
+            start_time = time.time()
+            compiled = compile_voice_model(
+                self.net_g,
+                self.text_enc_hidden_dim,
+                self.use_f0,
+                device,
+            )
+            if compiled is not None:
+                self.net_g = compiled
+                save_artifact(compiled, artifact, weight_root, cpt)
+                print(
+                    f"Compiled voice model in {time.time() - start_time:.2f} seconds."
+                )
+        warm_up(self.net_g, self.text_enc_hidden_dim, self.use_f0, device)
+        return {"net_g": self.net_g, "cpt": cpt}
+
+    def onnx_voice_model_path(self, weight_root):
+        """
+        Returns where the ONNX graph of a voice model is cached, keyed by its content hash.
+
+        Args:
+            weight_root (str): Path to the model weights.
+        """
+        name = os.path.splitext(os.path.basename(weight_root))[0]
+        return onnx_path(f"{name}.{checkpoint_hash(weight_root)[:16]}", self.precision)
+
+    def build_onnx_voice_model(self, weight_root, cpt=None):
+        """
+        Loads a voice model as an onnxruntime graph, exporting it from the checkpoint on first
+        use.
+
+        Args:
+            weight_root (str): Path to the model weights.
+            cpt (dict, optional): Already loaded checkpoint to use instead of reading the file.
+        """
+        path = self.onnx_voice_model_path(weight_root)
+        if not os.path.isfile(path):
+            self.load_model(weight_root, cpt)
+            self.setup_network()
+            prepare_for_inference(self.net_g)
+            cpt = {key: value for key, value in self.cpt.items() if key != "weight"}
+            print(f"Exporting voice model to '{path}'...")
+            export_synthesizer(
+                self.net_g.cpu(), path, self.text_enc_hidden_dim, cpt, self.precision
+            )
+        return load_synthesizer(path, self.config.device)
+
+    def check_onnx_parity(
+        self,
+        model_path: str,
+        embedder_model: str = "contentvec",
+        embedder_model_custom: str = None,
+    ):
+        """
+        Exports the voice model, the embedder and RMVPE to ONNX if needed and compares each
+        graph with its torch model on the same inputs.
+
+        Args:
+            model_path (str): Path to the voice model.
+            embedder_model (str): Name of the embedder.
+            embedder_model_custom (str): Folder of the custom embedder.
+        """
+        self.load_model(model_path)
+        self.setup_network()
+        net_g = self.net_g.cpu()
+        report = {
+            "synthesizer": synthesizer_parity(
+                net_g,
+                self.build_onnx_voice_model(model_path)["net_g"],
+                self.text_enc_hidden_dim,
+                self.tgt_sr,
+            )
+        }
+        report["embedder"] = embedder_parity(
+            load_embedding(embedder_model, embedder_model_custom).float().eval(),
+            get_embedder(embedder_model, embedder_model_custom, "cpu", self.precision),
+        )
+        rmvpe_path = os.path.join("rvc", "models", "predictors", "rmvpe.pt")
+        report["rmvpe"] = rmvpe_parity(
+            RMVPE0Predictor(rmvpe_path, device="cpu").model,
+            get_rmvpe(rmvpe_path, "cpu").model,
+        )
+        # net_g now holds the torch model used for the comparison, not a registry entry.
+        self.loaded_model = None
+        for name, result in report.items():
+            print(f"{name}: " + ", ".join(f"{k} {v:.6f}" for k, v in result.items()))
+        return report
+
+    def apply_voice_model(self, voice_model):
+        """
+        Makes a registry entry built by `build_voice_model` the active voice model.
+
+        Args:
+            voice_model (dict): The registry entry.
+        """
+        self.cpt = voice_model["cpt"]
+        self.net_g = voice_model["net_g"]
+        self.tgt_sr = self.cpt["config"][-1]
+        self.use_f0 = self.cpt.get("f0", 1)
+        self.version = self.cpt.get("version", "v1")
+        self.text_enc_hidden_dim = 768 if self.version == "v2" else 256
+        self.vocoder = self.cpt.get("vocoder", "HiFi-GAN")
+        self.setup_vc_instance()
+
     def cleanup_model(self):
         """
         Cleans up the model and releases resources.
+
+        Only the registry entries this converter loaded are dropped; models other converters
+        loaded stay resident and are left to the registry's memory budget.
         """
         if self.hubert_model is not None:
             del self.net_g, self.n_spk, self.vc, self.hubert_model, self.tgt_sr
@@ -469,22 +1034,26 @@ class VoiceConverter:
                 torch.cuda.empty_cache()
 
         del self.net_g, self.cpt
+        for key in self.registry_keys:
+            self.model_registry.remove(key)
+        self.registry_keys.clear()
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
-        self.cpt = None
+        self.cpt = self.net_g = self.loaded_model = None
 
-    def load_model(self, weight_root):
+    def load_model(self, weight_root, cpt=None):
         """
-        Loads the model weights from the specified path.
+        Loads the model weights from the specified path, memory-mapped from the packed file
+        next to it when an up-to-date one exists.
 
         Args:
             weight_root (str): Path to the model weights.
+            cpt (dict, optional): Already loaded checkpoint to use instead of reading the file.
         """
-        self.cpt = (
-            torch.load(weight_root, map_location="cpu", weights_only=True)
-            if os.path.isfile(weight_root)
-            else None
-        )
+        if cpt is not None:
+            self.cpt = dict(cpt, config=list(cpt["config"]))
+            return
+        self.cpt = load_checkpoint(weight_root) if os.path.isfile(weight_root) else None
 
     def setup_network(self):
         """
@@ -505,7 +1074,9 @@ class VoiceConverter:
                 vocoder=self.vocoder,
             )
             del self.net_g.enc_q
-            self.net_g.load_state_dict(self.cpt["weight"], strict=False)
+            # assign=True adopts the checkpoint tensors instead of copying them, which keeps
+            # weights placed in shared memory shared between worker processes.
+            self.net_g.load_state_dict(self.cpt["weight"], strict=False, assign=True)
             self.net_g = self.net_g.to(self.config.device).float()
             self.net_g.eval()
 
@@ -516,3 +1087,50 @@ class VoiceConverter:
         if self.cpt is not None:
             self.vc = VC(self.tgt_sr, self.config)
             self.n_spk = self.cpt["config"][-3]
+
+
+def check_stream_normalization(seconds=95, seed=0):
+    """
+    Checks that a streamed conversion is normalized with the single gain of a whole-file one.
+
+    A synthetic recording whose level rises over `seconds` is converted by
+    `VoiceConverter.convert_input_stream` with a stand-in for the model that doubles each
+    segment, so the output needs scaling down and a gain per segment would make the level
+    jump. The written output must match the doubled input scaled by the one gain
+    `Pipeline.finalize_audio` gives the whole output.
+
+    Args:
+        seconds: Length of the synthetic recording.
+        seed: Seed of the synthetic recording.
+
+    Returns:
+        Whether the output matched, and a summary of the largest difference.
+    """
+    import soundfile as sf
+
+    converter = VoiceConverter()
+    converter.tgt_sr = 16000
+    converter.vc = VC(converter.tgt_sr, converter.config)
+    rng = np.random.default_rng(seed)
+    level = np.linspace(0.2, 1.2, int(seconds * 16000), dtype=np.float32)
+    audio = rng.standard_normal(level.shape[0], dtype=np.float32) * 0.1 * level
+
+    def convert_segment(segment, normalize):
+        return converter.vc.finalize_audio(segment, [segment * 2], 1, normalize)
+
+    with tempfile.TemporaryDirectory() as folder:
+        input_path = os.path.join(folder, "input.wav")
+        sf.write(input_path, audio, 16000, subtype="FLOAT")
+        expected = np.concatenate(list(iter_audio(input_path, 16000)))
+        if np.abs(expected).max() > 0.95:
+            expected *= 0.95 / np.abs(expected).max()
+        expected = converter.vc.finalize_audio(expected, [expected * 2], 1)
+        output_path = converter.convert_input_stream(
+            input_path, os.path.join(folder, "output.wav"), "WAV", convert_segment
+        )
+        output, _ = sf.read(output_path, dtype="float32")
+    if output.shape != expected.shape:
+        return False, f"{output.shape[0]} samples written, {expected.shape[0]} expected"
+    # The WAV output is 16-bit PCM, so differences up to its step are rounding.
+    difference = float(np.abs(output - expected).max())
+    return difference <= 1e-4, f"largest difference {difference:.1e}"
@@ -0,0 +1,479 @@
+import os
+import json
+
+import torch
+import numpy as np
+
+ONNX_OPSET = 17
+ONNX_DIR = os.path.join("rvc", "models", "onnx")
+# Convolutional feature encoder of the HuBERT family, for graphs exported without it
+CONV_KERNEL = (10, 3, 3, 3, 3, 2, 2)
+CONV_STRIDE = (5, 2, 2, 2, 2, 2, 2)
+
+
+def onnx_path(name, precision="fp32"):
+    """
+    Returns where an exported ONNX graph is cached.
+
+    Graphs live in their own folder rather than next to the voice models, which the model
+    lists would otherwise pick up as `.onnx` voice models.
+
+    Args:
+        name: Identifies the model, e.g. the checkpoint name and content hash.
+        precision: "fp32", or "int8" for a dynamically quantized copy of the graph.
+    """
+    suffix = "" if precision == "fp32" else f".{precision}"
+    return os.path.join(ONNX_DIR, f"{name}{suffix}.onnx")
+
+
+def create_session(path, device="cpu", threads=0):
+    """
+    Opens an onnxruntime session with all graph optimizations enabled.
+
+    Args:
+        path: Path to the ONNX graph.
+        device: Torch device string; CUDA devices use the CUDA provider when it is installed.
+        threads: Intra-op threads, 0 lets onnxruntime use every physical core.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = threads
+    providers = ["CPUExecutionProvider"]
+    if str(device).startswith("cuda") and (
+        "CUDAExecutionProvider" in ort.get_available_providers()
+    ):
+        device_id = int(str(device).split(":")[-1]) if ":" in str(device) else 0
+        providers.insert(0, ("CUDAExecutionProvider", {"device_id": device_id}))
+    return ort.InferenceSession(path, sess_options=options, providers=providers)
+
+
+def _export(module, args, path, input_names, output_names, dynamic_axes, precision):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            args,
+            tmp_path,
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+            do_constant_folding=True,
+        )
+    if precision == "int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = f"{tmp_path}.int8"
+        quantize_dynamic(tmp_path, quantized_path, weight_type=QuantType.QInt8)
+        os.replace(quantized_path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class SynthesizerExport(torch.nn.Module):
+    """
+    `Synthesizer.infer` with the prior noise as an input, so the exported graph is
+    deterministic up to the vocoder's own excitation noise.
+    """
+
+    def __init__(self, net_g):
+        super().__init__()
+        self.net_g = net_g
+        self.use_f0 = net_g.use_f0
+
+    def forward(self, *args):
+        if self.use_f0:
+            phone, phone_lengths, pitch, nsff0, sid, rnd = args
+        else:
+            phone, phone_lengths, sid, rnd = args
+            pitch = nsff0 = None
+        net_g = self.net_g
+        g = net_g.emb_g(sid).unsqueeze(-1)
+        m_p, logs_p, x_mask = net_g.enc_p(phone, pitch, phone_lengths)
+        z_p = (m_p + torch.exp(logs_p) * rnd * 0.66666) * x_mask
+        z = net_g.flow(z_p, x_mask, g=g, reverse=True)
+        if self.use_f0:
+            return net_g.dec(z * x_mask, nsff0, g=g)
+        return net_g.dec(z * x_mask, g=g)
+
+
+def synthesizer_inputs(net_g, phone_dim, frames=200, batch_size=1):
+    """
+    Returns example inputs of `SynthesizerExport` and their names.
+
+    Args:
+        net_g: The Synthesizer.
+        phone_dim: Feature dimension of the embedder (256 for v1, 768 for v2).
+        frames: Number of embedder frames per item.
+        batch_size: Number of items.
+    """
+    phone = torch.randn(batch_size, frames, phone_dim)
+    phone_lengths = torch.full((batch_size,), frames, dtype=torch.long)
+    sid = torch.zeros(batch_size, dtype=torch.long)
+    rnd = torch.randn(batch_size, net_g.enc_p.out_channels, frames)
+    if net_g.use_f0:
+        pitch = torch.randint(1, 255, (batch_size, frames), dtype=torch.long)
+        nsff0 = 50 + 500 * torch.rand(batch_size, frames)
+        args = (phone, phone_lengths, pitch, nsff0, sid, rnd)
+        names = ["phone", "phone_lengths", "pitch", "nsff0", "sid", "rnd"]
+    else:
+        args = (phone, phone_lengths, sid, rnd)
+        names = ["phone", "phone_lengths", "sid", "rnd"]
+    return args, names
+
+
+def export_synthesizer(net_g, path, phone_dim, cpt, precision="fp32"):
+    """
+    Exports a Synthesizer's inference graph with dynamic batch and time axes.
+
+    Args:
+        net_g: The fp32 Synthesizer on the CPU, in eval mode.
+        path: Destination of the graph.
+        phone_dim: Feature dimension of the embedder.
+        cpt: Checkpoint metadata without the weights, written next to the graph.
+        precision: "fp32", or "int8" to quantize the graph's MatMuls dynamically.
+    """
+    args, names = synthesizer_inputs(net_g, phone_dim)
+    dynamic_axes = {
+        "phone": {0: "batch", 1: "frames"},
+        "phone_lengths": {0: "batch"},
+        "pitch": {0: "batch", 1: "frames"},
+        "nsff0": {0: "batch", 1: "frames"},
+        "sid": {0: "batch"},
+        "rnd": {0: "batch", 2: "frames"},
+        "audio": {0: "batch", 2: "samples"},
+    }
+    dynamic_axes = {k: v for k, v in dynamic_axes.items() if k in names + ["audio"]}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".json", "w") as f:
+        json.dump(cpt, f, default=str)
+    _export(
+        SynthesizerExport(net_g).eval(),
+        args,
+        path,
+        names,
+        ["audio"],
+        dynamic_axes,
+        precision,
+    )
+
+
+class EmbedderExport(torch.nn.Module):
+    """
+    The embedder returning its last hidden state only.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, feats, attention_mask):
+        return self.model(feats, attention_mask=attention_mask)["last_hidden_state"]
+
+
+def export_embedder(model, path, precision="fp32"):
+    """
+    Exports the embedder with dynamic batch and sample axes. The weights of its final
+    projection, which v1 models apply to cached features too, are saved next to the graph
+    together with the kernels and strides of its convolutional feature encoder.
+
+    Args:
+        model: The fp32 embedder on the CPU, in eval mode.
+        path: Destination of the graph.
+        precision: "fp32", or "int8" to quantize the graph's MatMuls dynamically.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(
+        path + ".final_proj.npz",
+        weight=model.final_proj.weight.detach().cpu().numpy(),
+        bias=model.final_proj.bias.detach().cpu().numpy(),
+        conv_kernel=np.asarray(model.config.conv_kernel),
+        conv_stride=np.asarray(model.config.conv_stride),
+    )
+    feats = torch.randn(1, 16000)
+    attention_mask = torch.ones(1, 16000, dtype=torch.long)
+    _export(
+        EmbedderExport(model).eval(),
+        (feats, attention_mask),
+        path,
+        ["feats", "attention_mask"],
+        ["last_hidden_state"],
+        {
+            "feats": {0: "batch", 1: "samples"},
+            "attention_mask": {0: "batch", 1: "samples"},
+            "last_hidden_state": {0: "batch", 1: "frames"},
+        },
+        precision,
+    )
+
+
+def export_rmvpe(model, path, precision="fp32"):
+    """
+    Exports RMVPE's E2E network with dynamic batch and frame axes.
+
+    Args:
+        model: The fp32 E2E model on the CPU, in eval mode.
+        path: Destination of the graph.
+        precision: "fp32", or "int8" to quantize the graph's MatMuls dynamically.
+    """
+    _export(
+        model,
+        (torch.randn(1, 128, 320),),
+        path,
+        ["mel"],
+        ["hidden"],
+        {"mel": {0: "batch", 2: "frames"}, "hidden": {0: "batch", 1: "frames"}},
+        precision,
+    )
+
+
+def _numpy(tensor, dtype):
+    return tensor.detach().cpu().numpy().astype(dtype, copy=False)
+
+
+class OnnxSynthesizer:
+    """
+    Runs an exported Synthesizer through onnxruntime behind the `infer` interface the
+    Pipeline calls.
+    """
+
+    def __init__(self, session, use_f0, device):
+        self.session = session
+        self.use_f0 = use_f0
+        self.device = device
+        rnd = next(i for i in session.get_inputs() if i.name == "rnd")
+        self.inter_channels = rnd.shape[1]
+        self.rng = np.random.default_rng()
+
+    def infer(self, phone, phone_lengths, pitch=None, nsff0=None, sid=None, rate=None):
+        if rate is not None:
+            raise ValueError("The ONNX synthesizer does not support partial inference.")
+        batch_size, frames = phone.shape[:2]
+        feeds = {
+            "phone": _numpy(phone, np.float32),
+            "phone_lengths": _numpy(phone_lengths, np.int64),
+            "sid": _numpy(sid, np.int64),
+            "rnd": self.rng.standard_normal(
+                (batch_size, self.inter_channels, frames), dtype=np.float32
+            ),
+        }
+        if self.use_f0:
+            feeds["pitch"] = _numpy(pitch, np.int64)
+            feeds["nsff0"] = _numpy(nsff0, np.float32)
+        audio = self.session.run(["audio"], feeds)[0]
+        return torch.from_numpy(audio).to(self.device), None, None
+
+
+class OnnxFinalProj:
+    def __init__(self, weight, bias, device):
+        self.weight = torch.from_numpy(weight).to(device)
+        self.bias = torch.from_numpy(bias).to(device)
+
+    def __call__(self, feats):
+        return torch.nn.functional.linear(feats.float(), self.weight, self.bias)
+
+
+class OnnxEmbedder:
+    """
+    Runs an exported embedder through onnxruntime behind the call interface of the
+    transformers model.
+    """
+
+    def __init__(
+        self,
+        session,
+        final_proj,
+        device,
+        conv_kernel=CONV_KERNEL,
+        conv_stride=CONV_STRIDE,
+    ):
+        self.session = session
+        self.final_proj = final_proj
+        self.device = device
+        self.conv_kernel = tuple(int(k) for k in conv_kernel)
+        self.conv_stride = tuple(int(s) for s in conv_stride)
+
+    def _get_feat_extract_output_lengths(self, input_lengths):
+        # Output frames of the convolutional feature encoder, as in transformers' HuBERT.
+        for kernel, stride in zip(self.conv_kernel, self.conv_stride):
+            input_lengths = (
+                torch.div(input_lengths - kernel, stride, rounding_mode="floor") + 1
+            )
+        return input_lengths
+
+    def __call__(self, feats, attention_mask=None):
+        if attention_mask is None:
+            attention_mask = torch.ones(feats.shape, dtype=torch.long)
+        hidden = self.session.run(
+            ["last_hidden_state"],
+            {
+                "feats": _numpy(feats, np.float32),
+                "attention_mask": _numpy(attention_mask, np.int64),
+            },
+        )[0]
+        return {"last_hidden_state": torch.from_numpy(hidden).to(self.device)}
+
+
+class OnnxE2E:
+    """
+    Runs RMVPE's exported E2E network through onnxruntime behind the module call interface.
+    """
+
+    def __init__(self, session, device):
+        self.session = session
+        self.device = device
+
+    def __call__(self, mel):
+        hidden = self.session.run(["hidden"], {"mel": _numpy(mel, np.float32)})[0]
+        return torch.from_numpy(hidden).to(self.device)
+
+
+def load_embedder(path, device):
+    """
+    Opens an exported embedder.
+
+    Args:
+        path: Path to the graph written by `export_embedder`.
+        device: Device the returned features are placed on.
+    """
+    final_proj = np.load(path + ".final_proj.npz")
+    return OnnxEmbedder(
+        create_session(path, device),
+        OnnxFinalProj(final_proj["weight"], final_proj["bias"], device),
+        device,
+        final_proj["conv_kernel"] if "conv_kernel" in final_proj else CONV_KERNEL,
+        final_proj["conv_stride"] if "conv_stride" in final_proj else CONV_STRIDE,
+    )
+
+
+def load_synthesizer(path, device):
+    """
+    Opens an exported Synthesizer and the checkpoint metadata written with it.
+
+    Args:
+        path: Path to the graph written by `export_synthesizer`.
+        device: Device the returned audio is placed on.
+
+    Returns:
+        The voice model in the form kept by the model registry.
+    """
+    with open(path + ".json", "r") as f:
+        cpt = json.load(f)
+    net_g = OnnxSynthesizer(create_session(path, device), cpt.get("f0", 1), device)
+    return {"net_g": net_g, "cpt": cpt}
+
+
+def _is_stale(path, source):
+    return not os.path.isfile(path) or (
+        source is not None
+        and os.path.isfile(source)
+        and os.path.getmtime(path) < os.path.getmtime(source)
+    )
+
+
+def get_embedder(embedder_model, embedder_model_custom, device, precision="fp32"):
+    """
+    Returns an onnxruntime embedder, exporting the torch model on first use.
+
+    Args:
+        embedder_model: Name of the embedder, or "custom".
+        embedder_model_custom: Folder of the custom embedder.
+        device: Device the returned features are placed on.
+        precision: "fp32", or "int8" for a dynamically quantized graph.
+    """
+    from rvc.lib.utils import load_embedding
+
+    if embedder_model == "custom" and embedder_model_custom:
+        name = "embedder_" + os.path.basename(os.path.normpath(embedder_model_custom))
+        source = os.path.join(embedder_model_custom, "pytorch_model.bin")
+    else:
+        name, source = f"embedder_{embedder_model}", None
+    path = onnx_path(name, precision)
+    if _is_stale(path, source):
+        print(f"Exporting embedder to '{path}'...")
+        model = load_embedding(embedder_model, embedder_model_custom).float().eval()
+        export_embedder(model, path, precision)
+    return load_embedder(path, device)
+
+
+def get_rmvpe(model_path, device, **kwargs):
+    """
+    Returns an RMVPE predictor running its network through onnxruntime, exporting the torch
+    model on first use. The mel spectrogram and decoding stay in the predictor.
+
+    Args:
+        model_path: Path to the RMVPE torch checkpoint.
+        device: Device the predictor runs on.
+        **kwargs: Keyword arguments forwarded to `RMVPE0Predictor`.
+    """
+    from rvc.lib.predictors.RMVPE import RMVPE0Predictor
+
+    path = onnx_path("rmvpe")
+    if _is_stale(path, model_path):
+        print(f"Exporting RMVPE to '{path}'...")
+        export_rmvpe(RMVPE0Predictor(model_path, device="cpu").model, path)
+    model = OnnxE2E(create_session(path, device), device)
+    return RMVPE0Predictor(model_path, device=device, model=model, **kwargs)
+
+
+def synthesizer_parity(net_g, net_g_onnx, phone_dim, sample_rate, frames=300):
+    """
+    Compares an exported Synthesizer with the torch model on the same inputs and noise.
+
+    The vocoders draw their own excitation noise, which torch and onnxruntime cannot share,
+    so the outputs are compared by mel-spectral distance as well as sample by sample.
+
+    Args:
+        net_g: The torch Synthesizer.
+        net_g_onnx: The `OnnxSynthesizer` exported from it.
+        phone_dim: Feature dimension of the embedder.
+        sample_rate: Output sampling rate of the model.
+        frames: Number of embedder frames to synthesize.
+    """
+    from rvc.infer.quantize import mel_distance
+
+    args, names = synthesizer_inputs(net_g, phone_dim, frames)
+    with torch.no_grad():
+        expected = SynthesizerExport(net_g)(*args).numpy()
+    feeds = {name: arg.numpy() for name, arg in zip(names, args)}
+    actual = net_g_onnx.session.run(["audio"], feeds)[0]
+    return {
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+        "mel_distance_db": mel_distance(
+            expected.reshape(-1), actual.reshape(-1), sample_rate
+        ),
+    }
+
+
+def embedder_parity(model, model_onnx, seconds=3):
+    """
+    Compares an exported embedder with the torch model on random audio.
+
+    Args:
+        model: The torch embedder.
+        model_onnx: The `OnnxEmbedder` exported from it.
+        seconds: Length of the test signal.
+    """
+    feats = torch.randn(1, 16000 * seconds) * 0.1
+    with torch.no_grad():
+        expected = model(feats)["last_hidden_state"].numpy()
+    actual = model_onnx(feats)["last_hidden_state"].cpu().numpy()
+    return {"max_abs_diff": float(np.abs(expected - actual).max())}
+
+
+def rmvpe_parity(model, model_onnx, frames=500):
+    """
+    Compares RMVPE's exported E2E network with the torch model on a random mel input.
+
+    Args:
+        model: The torch E2E model.
+        model_onnx: The `OnnxE2E` exported from it.
+        frames: Number of mel frames, a multiple of 32 like the predictor pads to.
+    """
+    mel = torch.randn(1, 128, 32 * (frames // 32))
+    with torch.no_grad():
+        expected = model(mel).numpy()
+    actual = model_onnx(mel).cpu().numpy()
+    return {"max_abs_diff": float(np.abs(expected - actual).max())}
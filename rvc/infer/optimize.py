@@ -0,0 +1,197 @@
+import time
+
+import torch
+from torch.nn.utils import parametrize
+
+VOCODERS = ["HiFi-GAN", "MRF HiFi-GAN", "RefineGAN"]
+
+
+def fold_weight_norm(module):
+    """
+    Bakes weight norm into plain weights, so it is no longer recomputed on every forward.
+
+    Covers both the parametrization API the generators use and the older hook-based
+    `torch.nn.utils.weight_norm`.
+
+    Args:
+        module: The torch module to modify in place.
+    """
+    for submodule in module.modules():
+        if parametrize.is_parametrized(submodule):
+            for name in list(submodule.parametrizations.keys()):
+                parametrize.remove_parametrizations(
+                    submodule, name, leave_parametrized=True
+                )
+        for hook in list(submodule._forward_pre_hooks.values()):
+            if type(hook).__name__ == "WeightNorm":
+                torch.nn.utils.remove_weight_norm(submodule, hook.name)
+    return module
+
+
+def drop_training_modules(net_g):
+    """
+    Removes what a Synthesizer only needs for training: the posterior encoder, dropout
+    layers and gradient checkpointing.
+
+    Args:
+        net_g: The Synthesizer to modify in place.
+    """
+    if hasattr(net_g, "enc_q"):
+        del net_g.enc_q
+    for module in list(net_g.modules()):
+        for name, child in module.named_children():
+            if isinstance(child, torch.nn.Dropout):
+                setattr(module, name, torch.nn.Identity())
+        if hasattr(module, "checkpointing"):
+            module.checkpointing = False
+    return net_g
+
+
+def prepare_for_inference(net_g):
+    """
+    Puts a Synthesizer in its inference form: training-only modules dropped, weight norm
+    folded and gradients disabled.
+
+    Args:
+        net_g: The Synthesizer to modify in place.
+    """
+    net_g.eval()
+    drop_training_modules(net_g)
+    fold_weight_norm(net_g)
+    net_g.requires_grad_(False)
+    return net_g
+
+
+def freeze(compiled):
+    """
+    Freezes a compiled Synthesizer: weights become constants of the graph, and the
+    backend's inference passes (conv and elementwise fusions, oneDNN layouts on CPU) run
+    where the backend supports them.
+
+    Args:
+        compiled: The scripted or traced Synthesizer, in eval mode.
+    """
+    frozen = torch.jit.freeze(compiled.eval(), preserved_attrs=["infer"])
+    try:
+        return torch.jit.optimize_for_inference(frozen, other_methods=["infer"])
+    except Exception as error:
+        print(f"Backend inference passes could not be applied: {error}")
+        return frozen
+
+
+def _time_infer(net_g, inputs, runs):
+    timings = []
+    with torch.no_grad():
+        net_g.infer(*inputs)
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            net_g.infer(*inputs)
+            timings.append(time.perf_counter() - start_time)
+    return sorted(timings)[len(timings) // 2]
+
+
+def benchmark_vocoders(
+    configs, sample_rate=48000, frames=500, runs=5, device="cpu", vocoders=VOCODERS
+):
+    """
+    Measures `Synthesizer.infer` latency per vocoder as loaded, after `prepare_for_inference`,
+    and compiled and frozen.
+
+    Randomly initialized models are used, which have the same layers and cost as trained ones.
+
+    Args:
+        configs: The training configurations from `Config.json_config`.
+        sample_rate: Sampling rate whose configuration is benchmarked.
+        frames: Embedder frames per call; 100 frames are one second of audio.
+        runs: Timed calls per variant, the median is reported.
+        device: Device to run on.
+        vocoders: Vocoders to benchmark.
+
+    Returns:
+        A list of dicts with the vocoder and the median latency in ms of each variant.
+    """
+    from rvc.infer.compiled import compile_voice_model, example_inputs
+    from rvc.lib.algorithm.synthesizers import Synthesizer
+
+    config = configs[f"{sample_rate}.json"]
+    results = []
+    for vocoder in vocoders:
+        net_g = Synthesizer(
+            config["data"]["filter_length"] // 2 + 1,
+            config["train"]["segment_size"] // config["data"]["hop_length"],
+            **config["model"],
+            use_f0=True,
+            sr=sample_rate,
+            vocoder=vocoder,
+            randomized=False,
+        )
+        net_g = net_g.to(device).eval()
+        phone_dim = config["model"]["text_enc_hidden_dim"]
+        inputs = example_inputs(phone_dim, True, frames, 1, device)
+        result = {"vocoder": vocoder, "loaded_ms": _time_infer(net_g, inputs, runs)}
+        prepare_for_inference(net_g)
+        result["prepared_ms"] = _time_infer(net_g, inputs, runs)
+        compiled = compile_voice_model(net_g, phone_dim, True, device)
+        result["compiled_ms"] = (
+            _time_infer(compiled, inputs, runs) if compiled is not None else None
+        )
+        for key in ("loaded_ms", "prepared_ms", "compiled_ms"):
+            if result[key] is not None:
+                result[key] *= 1000
+        results.append(result)
+    return results
+
+
+def check_prepare_for_inference(
+    configs=None, sample_rate=40000, frames=50, device="cpu", vocoders=VOCODERS
+):
+    """
+    Checks that `prepare_for_inference` leaves the output of `Synthesizer.infer` unchanged.
+
+    A randomly initialized model per vocoder runs the same inputs with the same seed before
+    and after preparation; folding weight norm may only move the output by float rounding.
+
+    Args:
+        configs: The training configurations from `Config.json_config`, loaded if None.
+        sample_rate: Sampling rate whose configuration is checked.
+        frames: Embedder frames per call; 100 frames are one second of audio.
+        device: Device to run on.
+        vocoders: Vocoders to check.
+
+    Returns:
+        Whether every vocoder matched, and a summary of the largest absolute difference of
+        each.
+    """
+    from rvc.infer.compiled import example_inputs
+    from rvc.lib.algorithm.synthesizers import Synthesizer
+
+    if configs is None:
+        from rvc.configs.config import Config
+
+        configs = Config().json_config
+    config = configs[f"{sample_rate}.json"]
+    phone_dim = config["model"]["text_enc_hidden_dim"]
+    inputs = example_inputs(phone_dim, True, frames, 1, device)
+    differences = {}
+    for vocoder in vocoders:
+        torch.manual_seed(0)
+        net_g = Synthesizer(
+            config["data"]["filter_length"] // 2 + 1,
+            config["train"]["segment_size"] // config["data"]["hop_length"],
+            **config["model"],
+            use_f0=True,
+            sr=sample_rate,
+            vocoder=vocoder,
+            randomized=False,
+        )
+        net_g = net_g.to(device).eval()
+        outputs = []
+        for prepare in (False, True):
+            if prepare:
+                prepare_for_inference(net_g)
+            torch.manual_seed(0)
+            with torch.no_grad():
+                outputs.append(net_g.infer(*inputs)[0])
+        differences[vocoder] = float((outputs[0] - outputs[1]).abs().max())
+    passed = all(difference <= 1e-4 for difference in differences.values())
+    return passed, ", ".join(f"{v} {d:.1e}" for v, d in differences.items())
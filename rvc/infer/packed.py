@@ -0,0 +1,200 @@
+import os
+import json
+import struct
+import threading
+
+import torch
+import numpy as np
+
+PACKED_SUFFIX = ".safetensors"
+# The tensor data starts on a 64-byte boundary of the file
+ALIGNMENT = 64
+DTYPES = {
+    "F64": np.float64,
+    "F32": np.float32,
+    "F16": np.float16,
+    "I64": np.int64,
+    "I32": np.int32,
+    "I16": np.int16,
+    "I8": np.int8,
+    "U8": np.uint8,
+    "BOOL": np.bool_,
+}
+DTYPE_NAMES = {np.dtype(dtype): name for name, dtype in DTYPES.items()}
+
+
+def packed_path(weight_root):
+    """
+    Returns the path of the packed file that belongs to a `.pth` voice model.
+
+    Args:
+        weight_root: Path to the `.pth` checkpoint.
+    """
+    return os.path.splitext(weight_root)[0] + PACKED_SUFFIX
+
+
+def find_packed(weight_root):
+    """
+    Returns the packed file to load instead of `weight_root`, or None if there is no packed
+    file or it is older than the checkpoint.
+
+    Args:
+        weight_root: Path to the voice model, `.pth` or packed.
+    """
+    if weight_root.endswith(PACKED_SUFFIX):
+        return weight_root if os.path.isfile(weight_root) else None
+    path = packed_path(weight_root)
+    if not os.path.isfile(path):
+        return None
+    if os.path.isfile(weight_root) and os.path.getmtime(path) < os.path.getmtime(
+        weight_root
+    ):
+        return None
+    return path
+
+
+def _read_header(f):
+    (header_size,) = struct.unpack("<Q", f.read(8))
+    header = json.loads(f.read(header_size))
+    metadata = json.loads(header.pop("__metadata__")["rvc"])
+    return metadata, header, 8 + header_size
+
+
+def read_packed_metadata(path):
+    """
+    Returns the checkpoint metadata of a packed voice model without touching its weights.
+
+    Args:
+        path: Path to the packed file.
+    """
+    with open(path, "rb") as f:
+        return _read_header(f)[0]
+
+
+def load_packed(path):
+    """
+    Loads a packed voice model with its weights memory-mapped from the file.
+
+    The mapping is copy-on-write: the weights are read lazily from the page cache, which every
+    process mapping the same file shares, and writing to a tensor only copies the pages
+    written.
+
+    Args:
+        path: Path to the packed file.
+
+    Returns:
+        The checkpoint as a dict, laid out like the one `torch.load` returns for the `.pth`.
+    """
+    with open(path, "rb") as f:
+        metadata, header, data_start = _read_header(f)
+    payload = np.memmap(path, dtype=np.uint8, mode="c", offset=data_start)
+    weight = {}
+    for name, info in header.items():
+        start, end = info["data_offsets"]
+        array = payload[start:end].view(DTYPES[info["dtype"]]).reshape(info["shape"])
+        weight[name] = torch.from_numpy(array)
+    return dict(metadata, weight=weight)
+
+
+def write_packed(cpt, path, float32=False):
+    """
+    Writes a checkpoint in the packed format.
+
+    The layout is the safetensors one: an 8-byte little-endian header size, a JSON header
+    giving the dtype, shape and byte range of every tensor, then the raw tensor data back to
+    back. The checkpoint metadata is stored as JSON under `__metadata__`, so the file also
+    opens with the safetensors library.
+
+    The header is padded so the data starts on an `ALIGNMENT` boundary, and tensors are
+    written widest dtype first, so every memory-mapped view is aligned for its dtype without
+    gaps between tensors.
+
+    Tensors keep their dtype by default, so a half precision checkpoint stays the same size
+    and is cast to float32 after mapping, when the model is loaded. With `float32`, floating
+    weights are stored at the dtype inference runs at and loading adopts the mapped tensors
+    without a copy, at twice the file size for half precision checkpoints.
+
+    Args:
+        cpt: The checkpoint, with its tensors under `weight`.
+        path: Destination path.
+        float32: Whether to store floating weights as float32.
+    """
+    arrays = {}
+    for name, tensor in cpt["weight"].items():
+        if float32 and tensor.is_floating_point():
+            tensor = tensor.float()
+        arrays[name] = np.asarray(tensor.detach().cpu().numpy())
+    # Every tensor's size is a multiple of its itemsize, so placing the widest dtypes first
+    # keeps all offsets aligned.
+    arrays = dict(
+        sorted(arrays.items(), key=lambda item: (-item[1].dtype.itemsize, item[0]))
+    )
+
+    metadata = {key: value for key, value in cpt.items() if key != "weight"}
+    header = {"__metadata__": {"rvc": json.dumps(metadata, default=str)}}
+    offset = 0
+    for name, array in arrays.items():
+        header[name] = {
+            "dtype": DTYPE_NAMES[array.dtype],
+            "shape": list(array.shape),
+            "data_offsets": [offset, offset + array.nbytes],
+        }
+        offset += array.nbytes
+    header_bytes = json.dumps(header).encode()
+    # Trailing spaces are valid JSON and put the data on an aligned offset.
+    header_bytes += b" " * (-(8 + len(header_bytes)) % ALIGNMENT)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for array in arrays.values():
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def pack_model(weight_root, path=None, float32=False):
+    """
+    Converts a `.pth` voice model to the packed format.
+
+    Args:
+        weight_root: Path to the `.pth` checkpoint.
+        path: Destination path, next to the checkpoint by default.
+        float32: Whether to store floating weights as float32; see `write_packed`.
+
+    Returns:
+        The path of the packed file.
+    """
+    path = path or packed_path(weight_root)
+    cpt = torch.load(weight_root, map_location="cpu", weights_only=True)
+    write_packed(cpt, path, float32)
+    return path
+
+
+def load_checkpoint(weight_root):
+    """
+    Loads a voice model checkpoint, from its packed file when an up-to-date one exists.
+
+    Args:
+        weight_root: Path to the voice model.
+    """
+    path = find_packed(weight_root)
+    if path is not None:
+        return load_packed(path)
+    return torch.load(weight_root, map_location="cpu", weights_only=True)
+
+
+def load_checkpoint_metadata(weight_root):
+    """
+    Returns the metadata of a voice model checkpoint without its weights, reading only the
+    header of the packed file when an up-to-date one exists.
+
+    Args:
+        weight_root: Path to the voice model.
+    """
+    path = find_packed(weight_root)
+    if path is not None:
+        return read_packed_metadata(path)
+    cpt = load_checkpoint(weight_root)
+    cpt.pop("weight", None)
+    return cpt
@@ -1,21 +1,27 @@
 import os
-import gc
 import re
 import sys
+import time
+import threading
+import tracemalloc
 import torch
 import torch.nn.functional as F
 import torchcrepe
-import faiss
 import librosa
 import numpy as np
 from scipy import signal
 from torch import Tensor
+from concurrent.futures import ThreadPoolExecutor
 
 now_dir = os.getcwd()
 sys.path.append(now_dir)
 
 from rvc.lib.predictors.RMVPE import RMVPE0Predictor
 from rvc.lib.predictors.FCPE import FCPEF0Predictor
+from rvc.infer.retrieval import get_index_store
+from rvc.infer.onnx_backend import get_rmvpe
+from rvc.infer.cache import DiskCache
+from rvc.infer.registry import get_model_registry
 
 import logging
 
@@ -24,11 +30,75 @@ logging.getLogger("faiss").setLevel(logging.WARNING)
 FILTER_ORDER = 5
 CUTOFF_FREQUENCY = 48  # Hz
 SAMPLE_RATE = 16000  # Hz
-bh, ah = signal.butter(
-    N=FILTER_ORDER, Wn=CUTOFF_FREQUENCY, btype="high", fs=SAMPLE_RATE
+sos = signal.butter(
+    N=FILTER_ORDER, Wn=CUTOFF_FREQUENCY, btype="high", fs=SAMPLE_RATE, output="sos"
 )
+# Samples filtered per block, and the overlap on each side of a block, which is long enough
+# for the filter's response to decay far below float32 resolution
+FILTER_BLOCK = SAMPLE_RATE * 10
+FILTER_OVERLAP = SAMPLE_RATE // 2
 
-input_audio_path2wav = {}
+
+def zero_phase_highpass(audio, block_size=FILTER_BLOCK, overlap=FILTER_OVERLAP):
+    """
+    Applies the high-pass filter forwards and backwards, returning float32.
+
+    The filter runs as second-order sections over overlapping blocks, so the float64 work
+    buffers are one block long instead of the length of the input.
+
+    Args:
+        audio: The input audio signal at 16 kHz.
+        block_size: Samples kept from each filtered block.
+        overlap: Extra samples filtered on each side of a block and then dropped.
+    """
+    filtered = np.empty(audio.shape[0], dtype=np.float32)
+    for start in range(0, audio.shape[0], block_size):
+        end = min(start + block_size, audio.shape[0])
+        lo, hi = max(0, start - overlap), min(audio.shape[0], end + overlap)
+        block = signal.sosfiltfilt(sos, audio[lo:hi].astype(np.float64))
+        filtered[start:end] = block[start - lo : end - lo]
+    return filtered
+
+
+class ThreadBudget:
+    """
+    Divides torch's intra-op threads between estimators running side by side.
+
+    The thread count is process-wide, so concurrent users share one budget: the first to enter
+    lowers the count and the last to leave restores it, unless something else changed it in the
+    meantime.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._saved = self._budget = None
+
+    def acquire(self, parts):
+        """
+        Enters the budget, lowering the thread count if no one else holds it.
+
+        Args:
+            parts: Number of estimators that will share the threads.
+        """
+        with self._lock:
+            if self._users == 0:
+                self._saved = torch.get_num_threads()
+                self._budget = max(1, self._saved // parts)
+                torch.set_num_threads(self._budget)
+            self._users += 1
+
+    def release(self):
+        """
+        Leaves the budget, restoring the thread count once its last user has left.
+        """
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and torch.get_num_threads() == self._budget:
+                torch.set_num_threads(self._saved)
+
+
+thread_budget = ThreadBudget()
 
 
 class AudioProcessor:
@@ -91,6 +161,15 @@ class Autotune:
     A class for applying autotune to a given fundamental frequency (F0) contour.
     """
 
+    note_names = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+    scales = {
+        "chromatic": [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11],
+        "major": [0, 2, 4, 5, 7, 9, 11],
+        "minor": [0, 2, 3, 5, 7, 8, 10],
+        "pentatonic_major": [0, 2, 4, 7, 9],
+        "pentatonic_minor": [0, 3, 5, 7, 10],
+    }
+
     def __init__(self, ref_freqs):
         """
         Initializes the Autotune class with a set of reference frequencies.
@@ -100,18 +179,71 @@ class Autotune:
         """
         self.ref_freqs = ref_freqs
         self.note_dict = self.ref_freqs  # No interpolation needed
+        self.note_tables = {}
 
-    def autotune_f0(self, f0, f0_autotune_strength):
+    def note_table(self, key="C", scale="chromatic"):
         """
-        Autotunes a given F0 contour by snapping each frequency to the closest reference frequency.
+        Returns the sorted log2 frequencies of the reference notes that belong to a key and scale.
+
+        Args:
+            key: Tonic of the scale, one of `note_names`.
+            scale: Name of the scale, one of `scales`.
+        """
+        if (key, scale) not in self.note_tables:
+            if key not in self.note_names or scale not in self.scales:
+                raise ValueError(f"Unknown key or scale: {key} {scale}")
+            log_freqs = np.log2(np.sort(np.asarray(self.ref_freqs, dtype=np.float64)))
+            pitch_classes = (
+                np.rint(12 * (log_freqs - np.log2(440)) + 69).astype(int) % 12
+            )
+            degrees = (pitch_classes - self.note_names.index(key)) % 12
+            self.note_tables[(key, scale)] = log_freqs[
+                np.isin(degrees, self.scales[scale])
+            ]
+        return self.note_tables[(key, scale)]
+
+    def autotune_f0(
+        self,
+        f0,
+        f0_autotune_strength,
+        key="C",
+        scale="chromatic",
+        retune_speed=0,
+        frame_period=10,
+    ):
+        """
+        Autotunes a given F0 contour by pulling each voiced frame towards the closest note of the
+        selected scale. Unvoiced frames (F0 of 0) are left untouched.
 
         Args:
             f0: The input F0 contour as a NumPy array.
+            f0_autotune_strength: Fraction of the distance to the closest note to correct.
+            key: Tonic of the scale, one of `note_names`.
+            scale: Name of the scale, one of `scales`.
+            retune_speed: Time constant in milliseconds of the pull towards the note; 0 snaps
+                instantly, larger values let note onsets and vibrato through.
+            frame_period: Duration of one F0 frame in milliseconds.
         """
-        autotuned_f0 = np.zeros_like(f0)
-        for i, freq in enumerate(f0):
-            closest_note = min(self.note_dict, key=lambda x: abs(x - freq))
-            autotuned_f0[i] = freq + (closest_note - freq) * f0_autotune_strength
+        notes = self.note_table(key, scale)
+        voiced = f0 > 0
+        log_f0 = np.log2(f0[voiced])
+        # Closest note in log frequency: compare the neighbours on either side of each frame.
+        upper = np.clip(np.searchsorted(notes, log_f0), 1, len(notes) - 1)
+        lower = upper - 1
+        closest = np.where(
+            log_f0 - notes[lower] <= notes[upper] - log_f0, notes[lower], notes[upper]
+        )
+        correction = np.zeros(f0.shape, dtype=np.float64)
+        correction[voiced] = closest - log_f0
+        if retune_speed > 0:
+            # One-pole low-pass over the correction; unvoiced frames pull it back to 0, so each
+            # note starts uncorrected and glides onto the pitch.
+            alpha = 1 - np.exp(-frame_period / retune_speed)
+            correction = signal.lfilter([alpha], [1, alpha - 1], correction)
+        autotuned_f0 = f0.copy()
+        autotuned_f0[voiced] = f0[voiced] * np.exp2(
+            correction[voiced] * f0_autotune_strength
+        )
         return autotuned_f0
 
 
@@ -137,6 +269,7 @@ class Pipeline:
         self.window = 160
         self.t_pad = self.sample_rate * self.x_pad
         self.t_pad_tgt = tgt_sr * self.x_pad
+        self.tgt_sr = tgt_sr
         self.t_pad2 = self.t_pad * 2
         self.t_query = self.sample_rate * self.x_query
         self.t_center = self.sample_rate * self.x_center
@@ -147,6 +280,20 @@ class Pipeline:
         self.f0_mel_min = 1127 * np.log(1 + self.f0_min / 700)
         self.f0_mel_max = 1127 * np.log(1 + self.f0_max / 700)
         self.device = config.device
+        self.window_batch_size = config.window_batch_size
+        self.rmvpe_segment_frames = int(config.rmvpe_segment_seconds * 100)
+        self.silence_threshold = config.silence_threshold
+        self.min_silence = config.min_silence
+        self.inference_backend = config.inference_backend
+        self.index_store = get_index_store(config.index_cache_size)
+        self.f0_cache = DiskCache(
+            os.path.join(now_dir, "assets", "cache", "f0"),
+            config.f0_cache_size * 1024 * 1024,
+        )
+        self.feature_cache = DiskCache(
+            os.path.join(now_dir, "assets", "cache", "features"),
+            config.feature_cache_size * 1024 * 1024,
+        )
         self.ref_freqs = [
             49.00,  # G1
             51.91,  # G#1 / Ab1
@@ -205,9 +352,50 @@ class Pipeline:
         ]
         self.autotune = Autotune(self.ref_freqs)
         self.note_dict = self.autotune.note_dict
-        self.model_rmvpe = RMVPE0Predictor(
-            os.path.join("rvc", "models", "predictors", "rmvpe.pt"),
-            device=self.device,
+        self.model_registry = get_model_registry(config)
+
+    @property
+    def model_rmvpe(self):
+        """
+        The shared RMVPE predictor, loaded on first use.
+        """
+        model_path = os.path.join("rvc", "models", "predictors", "rmvpe.pt")
+        if self.inference_backend == "onnx":
+            loader = lambda: get_rmvpe(
+                model_path, self.device, segment_frames=self.rmvpe_segment_frames
+            )
+        else:
+            loader = lambda: RMVPE0Predictor(
+                model_path,
+                device=self.device,
+                segment_frames=self.rmvpe_segment_frames,
+            )
+        return self.model_registry.get(
+            ("rmvpe", self.rmvpe_segment_frames, self.device, self.inference_backend),
+            loader,
+            self.device,
+        )
+
+    def get_fcpe(self, f0_min, f0_max):
+        """
+        Returns the shared FCPE predictor for an F0 range, loaded on first use.
+
+        Args:
+            f0_min: Minimum F0 value to consider.
+            f0_max: Maximum F0 value to consider.
+        """
+        return self.model_registry.get(
+            ("fcpe", int(f0_min), int(f0_max), self.device),
+            lambda: FCPEF0Predictor(
+                os.path.join("rvc", "models", "predictors", "fcpe.pt"),
+                f0_min=int(f0_min),
+                f0_max=int(f0_max),
+                dtype=torch.float32,
+                device=self.device,
+                sample_rate=self.sample_rate,
+                threshold=0.03,
+            ),
+            self.device,
         )
 
     def get_f0_crepe(
@@ -282,35 +470,44 @@ class Pipeline:
         methods_str = re.search("hybrid\[(.+)\]", methods_str)
         if methods_str:
             methods = [method.strip() for method in methods_str.group(1).split("+")]
-        f0_computation_stack = []
         print(f"Calculating f0 pitch estimations for methods: {', '.join(methods)}")
         x = x.astype(np.float32)
         x /= np.quantile(np.abs(x), 0.999)
-        for method in methods:
-            f0 = None
-            if method == "crepe":
-                f0 = self.get_f0_crepe_computation(
-                    x, f0_min, f0_max, p_len, int(hop_length)
-                )
-            elif method == "rmvpe":
-                f0 = self.model_rmvpe.infer_from_audio(x, thred=0.03)
-                f0 = f0[1:]
-            elif method == "fcpe":
-                self.model_fcpe = FCPEF0Predictor(
-                    os.path.join("rvc", "models", "predictors", "fcpe.pt"),
-                    f0_min=int(f0_min),
-                    f0_max=int(f0_max),
-                    dtype=torch.float32,
-                    device=self.device,
-                    sample_rate=self.sample_rate,
-                    threshold=0.03,
-                )
-                f0 = self.model_fcpe.compute_f0(x, p_len=p_len)
-                del self.model_fcpe
-                gc.collect()
-            f0_computation_stack.append(f0)
+        estimators = {
+            "crepe": lambda: self.get_f0_crepe(
+                x, f0_min, f0_max, p_len, int(hop_length)
+            ),
+            "rmvpe": lambda: self.model_rmvpe.infer_from_audio(x, thred=0.03)[1:],
+            "fcpe": lambda: self.get_fcpe(f0_min, f0_max).compute_f0(x, p_len=p_len),
+        }
+        methods = [method for method in methods if method in estimators]
+
+        def estimate(method):
+            start_time = time.perf_counter()
+            f0 = estimators[method]()
+            return f0, time.perf_counter() - start_time
 
-        f0_computation_stack = [fc for fc in f0_computation_stack if fc is not None]
+        # The estimators are independent and spend their time in torch kernels that release
+        # the GIL, so they run side by side; on CPU the intra-op threads are split between them
+        # instead of every estimator competing for all cores.
+        split_threads = len(methods) > 1 and not str(self.device).startswith("cuda")
+        if split_threads:
+            thread_budget.acquire(len(methods))
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(methods))) as executor:
+                results = list(executor.map(estimate, methods))
+        finally:
+            if split_threads:
+                thread_budget.release()
+        print(
+            "F0 estimation time: "
+            + ", ".join(
+                f"{method} {seconds:.2f} s"
+                for method, (_, seconds) in zip(methods, results)
+            )
+        )
+
+        f0_computation_stack = [f0 for f0, _ in results if f0 is not None]
         f0_median_hybrid = None
         if len(f0_computation_stack) == 1:
             f0_median_hybrid = f0_computation_stack[0]
@@ -318,32 +515,17 @@ class Pipeline:
             f0_median_hybrid = np.nanmedian(f0_computation_stack, axis=0)
         return f0_median_hybrid
 
-    def get_f0(
-        self,
-        input_audio_path,
-        x,
-        p_len,
-        pitch,
-        f0_method,
-        hop_length,
-        f0_autotune,
-        f0_autotune_strength,
-        inp_f0=None,
-    ):
+    def compute_f0(self, input_audio_path, x, p_len, f0_method, hop_length):
         """
-        Estimates the fundamental frequency (F0) of a given audio signal using various methods.
+        Estimates the raw fundamental frequency (F0) contour in Hz, before pitch shift or autotune.
 
         Args:
             input_audio_path: Path to the input audio file.
             x: The input audio signal as a NumPy array.
             p_len: Desired length of the F0 output.
-            pitch: Key to adjust the pitch of the F0 contour.
             f0_method: Method to use for F0 estimation (e.g., "crepe").
             hop_length: Hop length for F0 estimation methods.
-            f0_autotune: Whether to apply autotune to the F0 contour.
-            inp_f0: Optional input F0 contour to use instead of estimating.
         """
-        global input_audio_path2wav
         if f0_method == "crepe":
             f0 = self.get_f0_crepe(x, self.f0_min, self.f0_max, p_len, int(hop_length))
         elif f0_method == "crepe-tiny":
@@ -353,20 +535,8 @@ class Pipeline:
         elif f0_method == "rmvpe":
             f0 = self.model_rmvpe.infer_from_audio(x, thred=0.03)
         elif f0_method == "fcpe":
-            self.model_fcpe = FCPEF0Predictor(
-                os.path.join("rvc", "models", "predictors", "fcpe.pt"),
-                f0_min=int(self.f0_min),
-                f0_max=int(self.f0_max),
-                dtype=torch.float32,
-                device=self.device,
-                sample_rate=self.sample_rate,
-                threshold=0.03,
-            )
-            f0 = self.model_fcpe.compute_f0(x, p_len=p_len)
-            del self.model_fcpe
-            gc.collect()
+            f0 = self.get_fcpe(self.f0_min, self.f0_max).compute_f0(x, p_len=p_len)
         elif "hybrid" in f0_method:
-            input_audio_path2wav[input_audio_path] = x.astype(np.double)
             f0 = self.get_f0_hybrid(
                 f0_method,
                 x,
@@ -375,9 +545,61 @@ class Pipeline:
                 p_len,
                 hop_length,
             )
+        return f0
+
+    def get_f0(
+        self,
+        input_audio_path,
+        x,
+        p_len,
+        pitch,
+        f0_method,
+        hop_length,
+        f0_autotune,
+        f0_autotune_strength,
+        inp_f0=None,
+        use_f0_cache=True,
+        f0_autotune_key="C",
+        f0_autotune_scale="chromatic",
+        f0_autotune_speed=0,
+    ):
+        """
+        Estimates the fundamental frequency (F0) of a given audio signal using various methods.
+
+        Args:
+            input_audio_path: Path to the input audio file.
+            x: The input audio signal as a NumPy array.
+            p_len: Desired length of the F0 output.
+            pitch: Key to adjust the pitch of the F0 contour.
+            f0_method: Method to use for F0 estimation (e.g., "crepe").
+            hop_length: Hop length for F0 estimation methods.
+            f0_autotune: Whether to apply autotune to the F0 contour.
+            inp_f0: Optional input F0 contour to use instead of estimating.
+            use_f0_cache: Whether to read and write the on-disk F0 contour cache.
+            f0_autotune_key: Tonic of the autotune scale.
+            f0_autotune_scale: Scale whose notes the autotune snaps to.
+            f0_autotune_speed: Retune speed of the autotune in milliseconds, 0 snaps instantly.
+        """
+        f0 = None
+        if use_f0_cache:
+            cache_key = DiskCache.make_key(
+                x, f0_method, int(hop_length), self.f0_min, self.f0_max
+            )
+            f0 = self.f0_cache.load(cache_key)
+        if f0 is None:
+            f0 = self.compute_f0(input_audio_path, x, p_len, f0_method, hop_length)
+            if use_f0_cache:
+                self.f0_cache.save(cache_key, f0)
 
         if f0_autotune is True:
-            f0 = Autotune.autotune_f0(self, f0, f0_autotune_strength)
+            f0 = self.autotune.autotune_f0(
+                f0,
+                f0_autotune_strength,
+                f0_autotune_key,
+                f0_autotune_scale,
+                f0_autotune_speed,
+                self.time_step,
+            )
 
         f0 *= pow(2, pitch / 12)
         tf0 = self.sample_rate // self.window
@@ -416,6 +638,7 @@ class Pipeline:
         index_rate,
         version,
         protect,
+        embedder_key=None,
     ):
         """
         Performs voice conversion on a given audio segment.
@@ -432,16 +655,12 @@ class Pipeline:
             index_rate: Blending rate for speaker embedding retrieval.
             version: Model version (Keep to support old models).
             protect: Protection level for preserving the original pitch.
+            embedder_key: Identifies the embedder model for the feature cache, None disables it.
         """
         with torch.no_grad():
             pitch_guidance = pitch != None and pitchf != None
-            # prepare source audio
-            feats = torch.from_numpy(audio0).float()
-            feats = feats.mean(-1) if feats.dim() == 2 else feats
-            assert feats.dim() == 1, feats.dim()
-            feats = feats.view(1, -1).to(self.device)
             # extract features
-            feats = model(feats)["last_hidden_state"]
+            feats = self._extract_features(model, audio0, embedder_key)
             feats = (
                 model.final_proj(feats[0]).unsqueeze(0) if version == "v1" else feats
             )
@@ -477,7 +696,15 @@ class Pipeline:
                 pitch, pitchf = None, None
             p_len = torch.tensor([p_len], device=self.device).long()
             audio1 = (
-                (net_g.infer(feats.float(), p_len, pitch, pitchf.float(), sid)[0][0, 0])
+                (
+                    net_g.infer(
+                        feats.float(),
+                        p_len,
+                        pitch,
+                        pitchf.float() if pitchf is not None else None,
+                        sid,
+                    )[0][0, 0]
+                )
                 .data.cpu()
                 .float()
                 .numpy()
@@ -488,6 +715,219 @@ class Pipeline:
                 torch.cuda.empty_cache()
         return audio1
 
+    def voice_conversion_batch(
+        self,
+        model,
+        net_g,
+        sid,
+        audios,
+        pitches,
+        pitchfs,
+        index,
+        big_npy,
+        index_rate,
+        version,
+        protect,
+        embedder_key=None,
+    ):
+        """
+        Performs voice conversion on several audio windows in a single synthesizer forward pass.
+
+        The embedder front end normalizes over its whole input, so features are extracted per
+        group of equal-length windows and then zero padded; `phone_lengths` masks the padding in
+        the synthesizer, so windows of any length can share a batch.
+
+        Args:
+            model: The feature extractor model.
+            net_g: The generative model for synthesizing speech.
+            sid: Speaker ID tensor, either one per window or a single one shared by all windows.
+            audios: List of input audio windows.
+            pitches: List of quantized F0 contours, or None without pitch guidance.
+            pitchfs: List of original F0 contours, or None without pitch guidance.
+            index: FAISS index for speaker embedding retrieval.
+            big_npy: Speaker embeddings stored in a NumPy array.
+            index_rate: Blending rate for speaker embedding retrieval.
+            version: Model version (Keep to support old models).
+            protect: Protection level for preserving the original pitch.
+            embedder_key: Identifies the embedder model for the feature cache, None disables it.
+        """
+        with torch.no_grad():
+            pitch_guidance = pitches is not None and pitchfs is not None
+            batch_size = len(audios)
+            lengths = [audio.shape[0] for audio in audios]
+            feat_lengths = model._get_feat_extract_output_lengths(
+                torch.tensor(lengths)
+            ).tolist()
+            # extract features
+            feats = self._extract_features_batch(
+                model, audios, lengths, feat_lengths, embedder_key
+            )
+            feats = model.final_proj(feats) if version == "v1" else feats
+            # make a copy for pitch guidance and protection
+            feats0 = feats.clone() if pitch_guidance else None
+            if index:
+                feats = self._retrieve_speaker_embeddings_batch(
+                    feats, feat_lengths, index, big_npy, index_rate
+                )
+            # feature upsampling
+            feats = F.interpolate(feats.permute(0, 2, 1), scale_factor=2).permute(
+                0, 2, 1
+            )
+            # adjust the lengths if the audio is short
+            p_lens = [
+                min(length // self.window, feat_length * 2)
+                for length, feat_length in zip(lengths, feat_lengths)
+            ]
+            max_p_len = max(p_lens)
+            feats = feats[:, :max_p_len]
+            if pitch_guidance:
+                feats0 = F.interpolate(feats0.permute(0, 2, 1), scale_factor=2).permute(
+                    0, 2, 1
+                )[:, :max_p_len]
+                pitch = torch.ones(
+                    batch_size, max_p_len, dtype=torch.long, device=self.device
+                )
+                pitchf = torch.zeros(
+                    batch_size, max_p_len, dtype=torch.float32, device=self.device
+                )
+                for i, p_len in enumerate(p_lens):
+                    pitch[i, :p_len] = pitches[i][0, :p_len]
+                    pitchf[i, :p_len] = pitchfs[i][0, :p_len]
+                # Pitch protection blending
+                if protect < 0.5:
+                    pitchff = pitchf.clone()
+                    pitchff[pitchf > 0] = 1
+                    pitchff[pitchf < 1] = protect
+                    feats = feats * pitchff.unsqueeze(-1) + feats0 * (
+                        1 - pitchff.unsqueeze(-1)
+                    )
+                    feats = feats.to(feats0.dtype)
+            else:
+                pitch, pitchf = None, None
+            phone_lengths = torch.tensor(p_lens, device=self.device).long()
+            audio1 = net_g.infer(
+                feats.float(),
+                phone_lengths,
+                pitch,
+                pitchf,
+                sid if sid.numel() == batch_size else sid.expand(batch_size),
+            )[0][:, 0]
+            samples_per_frame = audio1.shape[-1] // max_p_len
+            audio1 = audio1.data.cpu().float().numpy()
+            outputs = [
+                audio1[i, : p_len * samples_per_frame][self.t_pad_tgt : -self.t_pad_tgt]
+                for i, p_len in enumerate(p_lens)
+            ]
+            # clean up
+            del feats, feats0, phone_lengths, audio1
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return outputs
+
+    def _extract_features_batch(
+        self, model, audios, lengths, feat_lengths, embedder_key
+    ):
+        cache_keys = None
+        cached = [None] * len(audios)
+        if embedder_key is not None:
+            cache_keys = [
+                DiskCache.make_key(audio, embedder_key, self.device) for audio in audios
+            ]
+            cached = [self.feature_cache.load(key) for key in cache_keys]
+        parts = [
+            None if c is None else torch.from_numpy(c[0]).to(self.device)
+            for c in cached
+        ]
+        missing = [i for i, part in enumerate(parts) if part is None]
+        # The embedder normalizes over its whole input, so only windows of the same length
+        # share a forward pass; the features are zero padded afterwards instead.
+        for group in self.length_batches([lengths[i] for i in missing], len(missing)):
+            indices = [missing[j] for j in group]
+            feats = torch.from_numpy(np.stack([audios[i] for i in indices])).float()
+            feats = model(feats.to(self.device))["last_hidden_state"]
+            for j, i in enumerate(indices):
+                parts[i] = feats[j, : feat_lengths[i]]
+                if cache_keys is not None:
+                    self.feature_cache.save(
+                        cache_keys[i], parts[i].unsqueeze(0).float().cpu().numpy()
+                    )
+        dtype = parts[missing[0]].dtype if missing else torch.float32
+        feats = torch.zeros(
+            len(audios),
+            max(feat_lengths),
+            parts[0].shape[-1],
+            dtype=dtype,
+            device=self.device,
+        )
+        for i, part in enumerate(parts):
+            feats[i, : part.shape[0]] = part.to(dtype)
+        return feats
+
+    def get_window_batch_size(self, n_windows, window_length):
+        """
+        Returns how many windows to convert per forward pass.
+
+        Uses `config.window_batch_size` when it is positive, otherwise picks a size from the
+        memory currently available on the inference device.
+
+        Args:
+            n_windows: Number of windows the input was cut into.
+            window_length: Length of the longest window in samples at 16 kHz.
+        """
+        if self.window_batch_size > 0:
+            return max(1, min(self.window_batch_size, n_windows))
+        try:
+            if self.device.startswith("cuda"):
+                available = torch.cuda.mem_get_info(self.device)[0]
+            else:
+                available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (AttributeError, ValueError, OSError, RuntimeError):
+            return 1
+        # Rough peak working set of one window through the embedder and vocoder
+        bytes_per_window = window_length * 2048
+        return max(1, min(n_windows, 8, int(available * 0.5 // bytes_per_window)))
+
+    @staticmethod
+    def length_batches(lengths, batch_size):
+        """
+        Groups items into batches of at most `batch_size` items that all have the same length.
+
+        Args:
+            lengths: Length of each item.
+            batch_size: Largest number of items per batch.
+
+        Returns:
+            A list of batches, each a list of item indices in their original order.
+        """
+        groups = {}
+        for i, length in enumerate(lengths):
+            groups.setdefault(length, []).append(i)
+        return [
+            indices[start : start + batch_size]
+            for indices in groups.values()
+            for start in range(0, len(indices), batch_size)
+        ]
+
+    def _frame(self, sample):
+        return None if sample is None else sample // self.window
+
+    def _extract_features(self, model, audio0, embedder_key):
+        cache_key = None
+        if embedder_key is not None:
+            cache_key = DiskCache.make_key(audio0, embedder_key, self.device)
+            cached = self.feature_cache.load(cache_key)
+            if cached is not None:
+                return torch.from_numpy(cached).to(self.device)
+        # prepare source audio
+        feats = torch.from_numpy(audio0).float()
+        feats = feats.mean(-1) if feats.dim() == 2 else feats
+        assert feats.dim() == 1, feats.dim()
+        feats = feats.view(1, -1).to(self.device)
+        feats = model(feats)["last_hidden_state"]
+        if cache_key is not None:
+            self.feature_cache.save(cache_key, feats.float().cpu().numpy())
+        return feats
+
     def _retrieve_speaker_embeddings(self, feats, index, big_npy, index_rate):
         npy = feats[0].cpu().numpy()
         score, ix = index.search(npy, k=8)
@@ -500,6 +940,48 @@ class Pipeline:
         )
         return feats
 
+    def _retrieve_speaker_embeddings_batch(
+        self, feats, feat_lengths, index, big_npy, index_rate
+    ):
+        npy = (
+            torch.cat([feats[i, :n] for i, n in enumerate(feat_lengths)], dim=0)
+            .cpu()
+            .numpy()
+        )
+        score, ix = index.search(npy, k=8)
+        weight = np.square(1 / score)
+        weight /= weight.sum(axis=1, keepdims=True)
+        npy = np.sum(big_npy[ix] * np.expand_dims(weight, axis=2), axis=1)
+        retrieved = torch.from_numpy(npy).to(self.device)
+        blended = feats.clone()
+        offset = 0
+        for i, n in enumerate(feat_lengths):
+            blended[i, :n] = (
+                retrieved[offset : offset + n] * index_rate
+                + (1 - index_rate) * feats[i, :n]
+            )
+            offset += n
+        return blended
+
+    def highpass(self, audio, cache=False):
+        """
+        Applies the zero-phase high-pass filter that removes rumble below the cutoff frequency.
+
+        Args:
+            audio: The input audio signal at 16 kHz.
+            cache: Whether to reuse the filtered signal from the feature cache.
+        """
+        if not cache:
+            return zero_phase_highpass(audio)
+        cache_key = DiskCache.make_key(
+            audio, "highpass", FILTER_ORDER, CUTOFF_FREQUENCY, "sos"
+        )
+        filtered = self.feature_cache.load(cache_key)
+        if filtered is None:
+            filtered = zero_phase_highpass(audio)
+            self.feature_cache.save(cache_key, filtered)
+        return filtered
+
     def pipeline(
         self,
         model,
@@ -518,6 +1000,13 @@ class Pipeline:
         f0_autotune,
         f0_autotune_strength,
         f0_file,
+        f0_cache=True,
+        embedder_key=None,
+        silence_gate=False,
+        f0_autotune_key="C",
+        f0_autotune_scale="chromatic",
+        f0_autotune_speed=0,
+        normalize=True,
     ):
         """
         The main pipeline function for performing voice conversion.
@@ -541,34 +1030,337 @@ class Pipeline:
             hop_length: Hop length for F0 estimation methods.
             f0_autotune: Whether to apply autotune to the F0 contour.
             f0_file: Path to a file containing an F0 contour to use.
+            f0_cache: Whether to reuse cached F0 contours of the same input.
+            embedder_key: Identifies the embedder model for the feature cache, None disables it.
+            silence_gate: Whether to skip long silences instead of converting them. Ignored when
+                an F0 file is given, since its contour is timed against the whole input.
+            f0_autotune_key: Tonic of the autotune scale.
+            f0_autotune_scale: Scale whose notes the autotune snaps to.
+            f0_autotune_speed: Retune speed of the autotune in milliseconds, 0 snaps instantly.
+            normalize: Whether to scale the output down to a 0.99 peak. Inputs converted in
+                segments turn it off and apply one gain to the whole output instead.
         """
         if file_index != "" and os.path.exists(file_index) and index_rate > 0:
             try:
-                index = faiss.read_index(file_index)
-                big_npy = index.reconstruct_n(0, index.ntotal)
+                index, big_npy = self.index_store.get(file_index)
             except Exception as error:
                 print(f"An error occurred reading the FAISS index: {error}")
                 index = big_npy = None
         else:
             index = big_npy = None
-        audio = signal.filtfilt(bh, ah, audio)
-        audio_pad = np.pad(audio, (self.window // 2, self.window // 2), mode="reflect")
+        audio = self.highpass(audio, cache=embedder_key is not None)
+        if silence_gate and not hasattr(f0_file, "name"):
+            spans = self.voiced_spans(audio)
+        else:
+            spans = [(0, audio.shape[0])]
+        sid = torch.tensor(sid, device=self.device).unsqueeze(0).long()
+        converted = []
+        for start, end in spans:
+            windows = self.prepare_windows(
+                audio[start:end],
+                pitch,
+                f0_method,
+                pitch_guidance,
+                hop_length,
+                f0_autotune,
+                f0_autotune_strength,
+                f0_file,
+                f0_cache,
+                f0_autotune_key,
+                f0_autotune_scale,
+                f0_autotune_speed,
+            )
+            converted.append(
+                self.convert_windows(
+                    model,
+                    net_g,
+                    sid,
+                    windows,
+                    index,
+                    big_npy,
+                    index_rate,
+                    pitch_guidance,
+                    version,
+                    protect,
+                    embedder_key,
+                )
+            )
+        audio_opt = self.join_spans(audio, spans, converted)
+        del sid
+        return self.finalize_audio(audio, audio_opt, volume_envelope, normalize)
+
+    def segment_stream(self, blocks):
+        """
+        Regroups decoded input blocks into segments that `pipeline` converts one at a time.
+
+        Segments are about `config.x_center` seconds long and cut at the quietest frame within
+        `config.x_query` seconds of that length, like the windows of `prepare_windows`. Each one
+        carries `x_pad` seconds of the neighbouring input on both sides as context, so only one
+        segment plus its context is held in memory however long the input is.
+
+        Args:
+            blocks: Iterable of mono float32 blocks at 16 kHz.
+
+        Yields:
+            `(audio, head, tail)` tuples, where `head` and `tail` are the context samples at
+            the start and end of `audio` whose output is dropped.
+        """
+        segment_samples = self.t_center + self.t_query + self.t_pad
+        context = np.zeros(0, dtype=np.float32)
+        buffer = np.zeros(0, dtype=np.float32)
+        for block in blocks:
+            buffer = np.concatenate((buffer, block))
+            while buffer.shape[0] >= segment_samples:
+                cut = (
+                    self.quiet_point(buffer, self.t_center) // self.window * self.window
+                )
+                yield np.concatenate(
+                    (context, buffer[: cut + self.t_pad])
+                ), context.shape[0], self.t_pad
+                context = buffer[cut - self.t_pad : cut]
+                buffer = buffer[cut:]
+        if buffer.shape[0]:
+            yield np.concatenate((context, buffer)), context.shape[0], 0
+
+    def join_spans(self, audio, spans, converted):
+        """
+        Lays converted spans out on the timeline of the input, filling the gated silences
+        between them with zeros.
+
+        Args:
+            audio: The filtered input audio signal.
+            spans: The `(start, end)` sample ranges that were converted, from `voiced_spans`.
+            converted: The list of converted windows of each span.
+
+        Returns:
+            The list of windows and silences to join with `finalize_audio`.
+        """
+        samples_per_frame = self.tgt_sr // 100
+        fade = np.linspace(0, 1, int(0.02 * self.tgt_sr), dtype=np.float32)
+        audio_opt = []
+        position = 0
+        for (start, end), windows in zip(spans, converted):
+            if start > position:
+                silence_frames = (start - position) // self.window
+                audio_opt.append(
+                    np.zeros(silence_frames * samples_per_frame, dtype=np.float32)
+                )
+            # Short fades where the converted audio meets a gated silence. The windows are
+            # faded in place and only joined once, in `finalize_audio`.
+            if start > 0:
+                self.apply_fade(windows, fade)
+            if end < audio.shape[0]:
+                self.apply_fade([window[::-1] for window in windows[::-1]], fade)
+            audio_opt.extend(windows)
+            position = end
+        if position < audio.shape[0]:
+            silence_frames = (audio.shape[0] - position) // self.window
+            audio_opt.append(
+                np.zeros(silence_frames * samples_per_frame, dtype=np.float32)
+            )
+        gated = audio.shape[0] - sum(end - start for start, end in spans)
+        if gated > 0:
+            print(
+                f"Skipped {gated / self.sample_rate:.1f} s of silence out of "
+                f"{audio.shape[0] / self.sample_rate:.1f} s."
+            )
+        return audio_opt
+
+    @staticmethod
+    def apply_fade(windows, fade):
+        """
+        Multiplies the start of consecutive converted windows by a fade curve, in place.
+
+        Args:
+            windows: List of converted windows, modified in place.
+            fade: The fade curve, applied from the first sample of the first window on.
+        """
+        position = 0
+        for window in windows:
+            n = min(window.shape[0], fade.shape[0] - position)
+            if n <= 0:
+                break
+            window[:n] *= fade[position : position + n]
+            position += n
+
+    def voiced_spans(self, audio):
+        """
+        Finds the parts of the input that need converting, leaving out long silences.
+
+        A run of frames whose RMS stays `config.silence_threshold` dB below the loudest frame for
+        at least `config.min_silence` seconds is gated, apart from a 0.1 s margin on each side so
+        onsets and decays are still converted.
+
+        Args:
+            audio: The filtered input audio signal.
+
+        Returns:
+            A list of `(start, end)` sample ranges aligned to frames, in order.
+        """
+        n_frames = audio.shape[0] // self.window
+        frames_per_second = self.sample_rate // self.window
+        margin = frames_per_second // 10
+        min_frames = max(2 * margin + 1, int(self.min_silence * frames_per_second))
+        if n_frames < min_frames:
+            return [(0, audio.shape[0])]
+        frames = audio[: n_frames * self.window].reshape(n_frames, self.window)
+        rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / self.window)
+        silent = rms <= rms.max() * 10 ** (self.silence_threshold / 20)
+        edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+        spans = []
+        position = 0
+        for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            if end - start < min_frames:
+                continue
+            gate_start = start + margin if start > 0 else 0
+            gate_end = end - margin if end < n_frames else n_frames
+            if gate_start > position:
+                spans.append((position, gate_start))
+            position = gate_end
+        if position < n_frames:
+            spans.append((position, n_frames))
+        spans = [
+            (int(start) * self.window, int(end) * self.window) for start, end in spans
+        ]
+        if spans and spans[-1][1] == n_frames * self.window:
+            spans[-1] = (spans[-1][0], audio.shape[0])
+        return spans
+
+    def convert_windows(
+        self,
+        model,
+        net_g,
+        sid,
+        windows,
+        index,
+        big_npy,
+        index_rate,
+        pitch_guidance,
+        version,
+        protect,
+        embedder_key=None,
+    ):
+        """
+        Converts prepared windows, batching windows of equal length according to
+        `config.window_batch_size`. A window of a different length, such as the last one, is
+        converted on its own.
+
+        Args:
+            model: The feature extractor model.
+            net_g: The generative model for synthesizing speech.
+            sid: Speaker ID tensor.
+            windows: List of `(audio, pitch, pitchf)` windows from `prepare_windows`.
+            index: FAISS index for speaker embedding retrieval.
+            big_npy: Speaker embeddings stored in a NumPy array.
+            index_rate: Blending rate for speaker embedding retrieval.
+            pitch_guidance: Whether to use pitch guidance during voice conversion.
+            version: Model version.
+            protect: Protection level for preserving the original pitch.
+            embedder_key: Identifies the embedder model for the feature cache, None disables it.
+        """
+        audio_opt = [None] * len(windows)
+        batch_size = self.get_window_batch_size(len(windows), self.t_max)
+        lengths = [window[0].shape[0] for window in windows]
+        for indices in self.length_batches(lengths, batch_size):
+            audios = [windows[i][0] for i in indices]
+            pitches = [windows[i][1] for i in indices]
+            pitchfs = [windows[i][2] for i in indices]
+            if len(indices) == 1:
+                audio_opt[indices[0]] = self.voice_conversion(
+                    model,
+                    net_g,
+                    sid,
+                    audios[0],
+                    pitches[0],
+                    pitchfs[0],
+                    index,
+                    big_npy,
+                    index_rate,
+                    version,
+                    protect,
+                    embedder_key,
+                )[self.t_pad_tgt : -self.t_pad_tgt]
+            else:
+                outputs = self.voice_conversion_batch(
+                    model,
+                    net_g,
+                    sid,
+                    audios,
+                    pitches if pitch_guidance else None,
+                    pitchfs if pitch_guidance else None,
+                    index,
+                    big_npy,
+                    index_rate,
+                    version,
+                    protect,
+                    embedder_key,
+                )
+                for i, output in zip(indices, outputs):
+                    audio_opt[i] = output
+        return audio_opt
+
+    def quiet_point(self, audio, t):
+        """
+        Returns the sample within `config.x_query` seconds of `t` where the signal summed over
+        one frame is closest to zero, the least audible place to cut the input.
+
+        Only the searched range is summed, so no full-length buffer is allocated.
+
+        Args:
+            audio: The filtered input audio signal.
+            t: The sample to search around, at least `x_query` seconds into `audio`.
+        """
+        half = self.window // 2
+        start, end = t - self.t_query, min(t + self.t_query, audio.shape[0])
+        region = audio[start - half : end + half]
+        if end + half > audio.shape[0]:
+            region = np.pad(region, (0, end + half - audio.shape[0]), mode="reflect")
+        sums = np.convolve(
+            region, np.ones(self.window, dtype=audio.dtype), mode="valid"
+        )
+        return start + int(np.argmin(np.abs(sums[: end - start])))
+
+    def prepare_windows(
+        self,
+        audio,
+        pitch,
+        f0_method,
+        pitch_guidance,
+        hop_length,
+        f0_autotune,
+        f0_autotune_strength,
+        f0_file=None,
+        f0_cache=True,
+        f0_autotune_key="C",
+        f0_autotune_scale="chromatic",
+        f0_autotune_speed=0,
+    ):
+        """
+        Pads the filtered input, estimates its F0 contour and cuts it into conversion windows.
+
+        Args:
+            audio: The filtered input audio signal.
+            pitch: Key to adjust the pitch of the F0 contour.
+            f0_method: Method to use for F0 estimation.
+            pitch_guidance: Whether to use pitch guidance during voice conversion.
+            hop_length: Hop length for F0 estimation methods.
+            f0_autotune: Whether to apply autotune to the F0 contour.
+            f0_autotune_strength: Strength of the autotune.
+            f0_file: Path to a file containing an F0 contour to use.
+            f0_cache: Whether to reuse cached F0 contours of the same input.
+            f0_autotune_key: Tonic of the autotune scale.
+            f0_autotune_scale: Scale whose notes the autotune snaps to.
+            f0_autotune_speed: Retune speed of the autotune in milliseconds, 0 snaps instantly.
+
+        Returns:
+            A list of `(audio, pitch, pitchf)` windows; the pitch entries are None without pitch
+            guidance.
+        """
         opt_ts = []
-        if audio_pad.shape[0] > self.t_max:
-            audio_sum = np.zeros_like(audio)
-            for i in range(self.window):
-                audio_sum += audio_pad[i : i - self.window]
+        if audio.shape[0] + self.window > self.t_max:
             for t in range(self.t_center, audio.shape[0], self.t_center):
-                opt_ts.append(
-                    t
-                    - self.t_query
-                    + np.where(
-                        np.abs(audio_sum[t - self.t_query : t + self.t_query])
-                        == np.abs(audio_sum[t - self.t_query : t + self.t_query]).min()
-                    )[0][0]
-                )
+                opt_ts.append(self.quiet_point(audio, t))
         s = 0
-        audio_opt = []
         t = None
         audio_pad = np.pad(audio, (self.t_pad, self.t_pad), mode="reflect")
         p_len = audio_pad.shape[0] // self.window
@@ -583,7 +1375,6 @@ class Pipeline:
                 inp_f0 = np.array(inp_f0, dtype="float32")
             except Exception as error:
                 print(f"An error occurred reading the F0 file: {error}")
-        sid = torch.tensor(sid, device=self.device).unsqueeze(0).long()
         if pitch_guidance:
             pitch, pitchf = self.get_f0(
                 "input_audio_path",  # questionable purpose of making a key for an array
@@ -595,6 +1386,10 @@ class Pipeline:
                 f0_autotune,
                 f0_autotune_strength,
                 inp_f0,
+                f0_cache,
+                f0_autotune_key,
+                f0_autotune_scale,
+                f0_autotune_speed,
             )
             pitch = pitch[:p_len]
             pitchf = pitchf[:p_len]
@@ -602,84 +1397,228 @@ class Pipeline:
                 pitchf = pitchf.astype(np.float32)
             pitch = torch.tensor(pitch, device=self.device).unsqueeze(0).long()
             pitchf = torch.tensor(pitchf, device=self.device).unsqueeze(0).float()
+        windows = []
         for t in opt_ts:
             t = t // self.window * self.window
-            if pitch_guidance:
-                audio_opt.append(
-                    self.voice_conversion(
-                        model,
-                        net_g,
-                        sid,
-                        audio_pad[s : t + self.t_pad2 + self.window],
-                        pitch[:, s // self.window : (t + self.t_pad2) // self.window],
-                        pitchf[:, s // self.window : (t + self.t_pad2) // self.window],
-                        index,
-                        big_npy,
-                        index_rate,
-                        version,
-                        protect,
-                    )[self.t_pad_tgt : -self.t_pad_tgt]
-                )
-            else:
-                audio_opt.append(
-                    self.voice_conversion(
-                        model,
-                        net_g,
-                        sid,
-                        audio_pad[s : t + self.t_pad2 + self.window],
-                        None,
-                        None,
-                        index,
-                        big_npy,
-                        index_rate,
-                        version,
-                        protect,
-                    )[self.t_pad_tgt : -self.t_pad_tgt]
-                )
+            windows.append((s, t + self.t_pad2 + self.window, t + self.t_pad2))
             s = t
-        if pitch_guidance:
-            audio_opt.append(
-                self.voice_conversion(
-                    model,
-                    net_g,
-                    sid,
-                    audio_pad[t:],
-                    pitch[:, t // self.window :] if t is not None else pitch,
-                    pitchf[:, t // self.window :] if t is not None else pitchf,
-                    index,
-                    big_npy,
-                    index_rate,
-                    version,
-                    protect,
-                )[self.t_pad_tgt : -self.t_pad_tgt]
-            )
-        else:
-            audio_opt.append(
-                self.voice_conversion(
-                    model,
-                    net_g,
-                    sid,
-                    audio_pad[t:],
-                    None,
-                    None,
-                    index,
-                    big_npy,
-                    index_rate,
-                    version,
-                    protect,
-                )[self.t_pad_tgt : -self.t_pad_tgt]
+        windows.append((t, None, None))
+        return [
+            (
+                audio_pad[start:end],
+                (
+                    pitch[:, self._frame(start) : self._frame(f0_end)]
+                    if pitch_guidance
+                    else None
+                ),
+                (
+                    pitchf[:, self._frame(start) : self._frame(f0_end)]
+                    if pitch_guidance
+                    else None
+                ),
             )
-        audio_opt = np.concatenate(audio_opt)
+            for start, end, f0_end in windows
+        ]
+
+    def finalize_audio(self, audio, audio_opt, volume_envelope, normalize=True):
+        """
+        Joins converted windows, applies the volume envelope and prevents clipping.
+
+        Args:
+            audio: The filtered input audio signal.
+            audio_opt: List of converted windows.
+            volume_envelope: Blending rate for adjusting the RMS level of the output audio.
+            normalize: Whether to scale the output down to a 0.99 peak.
+        """
+        audio_opt = np.concatenate(audio_opt, dtype=np.float32)
         if volume_envelope != 1:
             audio_opt = AudioProcessor.change_rms(
                 audio, self.sample_rate, audio_opt, self.sample_rate, volume_envelope
             )
         audio_max = np.abs(audio_opt).max() / 0.99
-        if audio_max > 1:
+        if normalize and audio_max > 1:
             audio_opt /= audio_max
-        if pitch_guidance:
-            del pitch, pitchf
-        del sid
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
         return audio_opt
+
+
+def _autotune_f0_loop(f0, note_dict, f0_autotune_strength):
+    # The frame-by-frame autotune `Autotune.autotune_f0` replaced, kept as its reference.
+    autotuned_f0 = np.zeros_like(f0)
+    for i, freq in enumerate(f0):
+        closest_note = min(note_dict, key=lambda x: abs(x - freq))
+        autotuned_f0[i] = freq + (closest_note - freq) * f0_autotune_strength
+    return autotuned_f0
+
+
+def benchmark_autotune(config, n_frames=30000, runs=5, seed=0):
+    """
+    Times `Autotune.autotune_f0` against the frame-by-frame loop it replaced on the same
+    synthetic contour and compares their output at full strength.
+
+    The contour sweeps the reference range with vibrato and has unvoiced gaps. The loop snapped
+    to the closest note in Hz and also moved unvoiced frames, while `autotune_f0` snaps in log
+    frequency and leaves them at 0, so only voiced frames are compared and a few frames near
+    the midpoint between two notes can land on the other note.
+
+    Args:
+        config: The Config instance the pipeline is built from.
+        n_frames: Frames of the contour; 100 frames are one second of audio.
+        runs: Timed calls per implementation, the median is reported.
+        seed: Seed of the vibrato phase and the unvoiced gaps.
+
+    Returns:
+        A dict with the fraction of voiced frames on the same note, the largest difference in
+        cents among them and the median time in ms of each implementation.
+    """
+    vc = Pipeline(SAMPLE_RATE, config)
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_frames) / 100
+    sweep = np.linspace(np.log2(vc.f0_min), np.log2(vc.f0_max), n_frames)
+    f0 = np.exp2(sweep + 0.03 * np.sin(2 * np.pi * 5.5 * t + rng.uniform(0, np.pi)))
+    f0[rng.random(n_frames) < 0.2] = 0
+
+    old = _autotune_f0_loop(f0, vc.autotune.note_dict, 1.0)
+    new = vc.autotune.autotune_f0(f0, 1.0)
+    voiced = f0 > 0
+    same = np.isclose(old[voiced], new[voiced], rtol=1e-9)
+    cents = 1200 * np.abs(np.log2(old[voiced][same] / new[voiced][same]))
+
+    def median_ms(function):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        return float(np.median(times)) * 1000
+
+    return {
+        "same_note": float(same.mean()),
+        "max_cents": float(cents.max()) if cents.size else 0.0,
+        "loop_ms": median_ms(lambda: _autotune_f0_loop(f0, vc.autotune.note_dict, 1.0)),
+        "vectorized_ms": median_ms(lambda: vc.autotune.autotune_f0(f0, 1.0)),
+    }
+
+
+def _measure(results, path, stage, function, *args):
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start_time = time.perf_counter()
+    output = function(*args)
+    results.append(
+        {
+            "path": path,
+            "stage": stage,
+            "seconds": time.perf_counter() - start_time,
+            "peak_mb": (tracemalloc.get_traced_memory()[1] - baseline) / 1024**2,
+        }
+    )
+    return output
+
+
+def benchmark_front_end(audio_path, config):
+    """
+    Measures time and peak memory of the signal processing around the models on one input.
+
+    The stages are decoding to 16 kHz mono, the high-pass filter, the window cut search,
+    padding and output assembly. They run once the way inference used to, in float64 with
+    whole-signal filtering, and once along the float32 path. The models are left out; the output
+    windows are stand-ins cut from the input.
+
+    Args:
+        audio_path: Path to the input audio file.
+        config: The Config instance providing the window settings.
+
+    Returns:
+        A list of dicts with the path, the stage, its time in seconds and the peak memory it
+        allocated in MB.
+    """
+    import soundfile as sf
+    from rvc.lib.utils import read_audio
+
+    vc = Pipeline(SAMPLE_RATE, config)
+    bh, ah = signal.butter(
+        N=FILTER_ORDER, Wn=CUTOFF_FREQUENCY, btype="high", fs=SAMPLE_RATE
+    )
+
+    def decode_float64():
+        audio, sr = sf.read(audio_path)
+        if audio.ndim > 1:
+            audio = librosa.to_mono(audio.T)
+        return librosa.resample(
+            audio, orig_sr=sr, target_sr=SAMPLE_RATE, res_type="soxr_vhq"
+        )
+
+    def cuts_float64(audio):
+        audio_pad = np.pad(audio, (vc.window // 2, vc.window // 2), mode="reflect")
+        audio_sum = np.zeros_like(audio)
+        for i in range(vc.window):
+            audio_sum += audio_pad[i : i - vc.window]
+        return [
+            t
+            - vc.t_query
+            + int(np.argmin(np.abs(audio_sum[t - vc.t_query : t + vc.t_query])))
+            for t in range(vc.t_center, audio.shape[0], vc.t_center)
+        ]
+
+    def cuts_float32(audio):
+        return [
+            vc.quiet_point(audio, t)
+            for t in range(vc.t_center, audio.shape[0], vc.t_center)
+        ]
+
+    def windows(audio, cuts):
+        bounds = [0] + [t // vc.window * vc.window for t in cuts] + [audio.shape[0]]
+        return [audio[start:end].copy() for start, end in zip(bounds, bounds[1:])]
+
+    results = []
+    tracemalloc.start()
+    try:
+        audio = _measure(results, "float64", "decode", decode_float64)
+        audio = _measure(
+            results, "float64", "high-pass", signal.filtfilt, bh, ah, audio
+        )
+        cuts = _measure(results, "float64", "window search", cuts_float64, audio)
+        _measure(
+            results,
+            "float64",
+            "padding",
+            np.pad,
+            audio,
+            (vc.t_pad, vc.t_pad),
+            "reflect",
+        )
+        converted = windows(audio, cuts)
+        _measure(
+            results,
+            "float64",
+            "output assembly",
+            lambda: np.concatenate([np.concatenate(converted)]),
+        )
+        del audio, converted
+
+        audio = _measure(
+            results, "float32", "decode", read_audio, audio_path, SAMPLE_RATE
+        )
+        audio = _measure(results, "float32", "high-pass", zero_phase_highpass, audio)
+        cuts = _measure(results, "float32", "window search", cuts_float32, audio)
+        _measure(
+            results,
+            "float32",
+            "padding",
+            np.pad,
+            audio,
+            (vc.t_pad, vc.t_pad),
+            "reflect",
+        )
+        converted = windows(audio, cuts)
+        _measure(
+            results,
+            "float32",
+            "output assembly",
+            lambda: np.concatenate(converted, dtype=np.float32),
+        )
+    finally:
+        tracemalloc.stop()
+    return results
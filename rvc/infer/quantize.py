@@ -0,0 +1,179 @@
+import time
+
+import torch
+import librosa
+import numpy as np
+
+PRECISIONS = ["fp32", "int8"]
+
+
+class PointwiseLinear(torch.nn.Module):
+    """
+    A kernel-size-1 Conv1d computed as a Linear layer over the channel axis.
+
+    Dynamic quantization only covers Linear layers, so the pointwise projections of the
+    TextEncoder are swapped for this equivalent module before quantizing.
+    """
+
+    def __init__(self, conv):
+        super().__init__()
+        self.linear = torch.nn.Linear(
+            conv.in_channels, conv.out_channels, bias=conv.bias is not None
+        )
+        with torch.no_grad():
+            self.linear.weight.copy_(conv.weight.squeeze(-1))
+            if conv.bias is not None:
+                self.linear.bias.copy_(conv.bias)
+
+    def forward(self, x):
+        return self.linear(x.transpose(1, 2)).transpose(1, 2)
+
+
+def replace_pointwise_convs(module):
+    """
+    Replaces every kernel-size-1, ungrouped Conv1d below `module` with a `PointwiseLinear`.
+
+    Args:
+        module: The torch module to modify in place.
+    """
+    for name, child in module.named_children():
+        if (
+            isinstance(child, torch.nn.Conv1d)
+            and child.kernel_size == (1,)
+            and child.stride == (1,)
+            and child.dilation == (1,)
+            and child.padding in ((0,), "valid")
+            and child.groups == 1
+        ):
+            setattr(module, name, PointwiseLinear(child))
+        else:
+            replace_pointwise_convs(child)
+    return module
+
+
+def quantize_int8(module):
+    """
+    Applies dynamic int8 quantization to the Linear layers of a CPU model.
+
+    Weights are stored as int8 and activations are quantized on the fly per batch, so no
+    calibration data is needed. Convolutions keep their fp32 weights.
+
+    Args:
+        module: The fp32 torch module, modified in place.
+    """
+    return torch.ao.quantization.quantize_dynamic(
+        module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def quantize_synthesizer(net_g):
+    """
+    Quantizes the TextEncoder of a Synthesizer to int8.
+
+    The attention and output projections of the TextEncoder are pointwise convolutions and
+    become Linear layers first. The vocoder stays in fp32: it is built from dilated and
+    transposed convolutions behind weight norm, which dynamic quantization does not cover.
+
+    Args:
+        net_g: The fp32 Synthesizer on the CPU, modified in place.
+    """
+    replace_pointwise_convs(net_g.enc_p)
+    quantize_int8(net_g.enc_p)
+    return net_g
+
+
+def resolve_precision(precision, device):
+    """
+    Returns the precision inference actually runs at on `device`.
+
+    Args:
+        precision: The requested precision, one of `PRECISIONS`.
+        device: The torch device models are loaded on.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    if precision == "int8" and not str(device).startswith("cpu"):
+        print(f"int8 inference is CPU-only, running at fp32 on {device}.")
+        return "fp32"
+    return precision
+
+
+def mel_distance(reference, candidate, sample_rate, n_mels=80):
+    """
+    Returns the mean absolute log-mel spectrogram difference in dB between two signals.
+
+    Args:
+        reference: The reference signal, e.g. the fp32 output.
+        candidate: The signal to compare, e.g. the int8 output.
+        sample_rate: Sampling rate of both signals.
+        n_mels: Number of mel bands.
+    """
+    length = min(len(reference), len(candidate))
+    mels = [
+        librosa.power_to_db(
+            librosa.feature.melspectrogram(
+                y=np.asarray(signal[:length], dtype=np.float32),
+                sr=sample_rate,
+                n_fft=2048,
+                hop_length=sample_rate // 100,
+                n_mels=n_mels,
+            ),
+            ref=1.0,
+            amin=1e-5,
+        )
+        for signal in (reference, candidate)
+    ]
+    return float(np.mean(np.abs(mels[0] - mels[1])))
+
+
+def compare_precision(converter, audio_input_path, precision="int8", **kwargs):
+    """
+    Converts one file at fp32 and at `precision` and reports the speedup and the quality cost.
+
+    Both runs skip the F0 and feature caches so each one does the full amount of work, and
+    models are loaded before the clock starts.
+
+    Args:
+        converter: The VoiceConverter to run.
+        audio_input_path: Path to the input audio file.
+        precision: The precision compared against fp32.
+        **kwargs: Keyword arguments forwarded to `VoiceConverter.convert_audio`.
+    """
+    kwargs = dict(kwargs, f0_cache=False, feature_cache=False)
+    kwargs.pop("precision", None)
+    audio = converter.load_input(audio_input_path, False, **kwargs)
+    outputs, timings = {}, {}
+    for run_precision in ("fp32", precision):
+        converter.set_precision(run_precision)
+        converter.get_vc(kwargs["model_path"], kwargs.get("sid", 0))
+        converter.load_hubert(
+            kwargs.get("embedder_model", "contentvec"),
+            kwargs.get("embedder_model_custom"),
+        )
+        converter.last_embedder_model = kwargs.get("embedder_model", "contentvec")
+        start_time = time.perf_counter()
+        result = converter.convert_audio(
+            audio_input_path=audio_input_path,
+            audio_output_path=None,
+            audio=audio,
+            write_output=False,
+            **kwargs,
+        )
+        timings[run_precision] = time.perf_counter() - start_time
+        if result is None:
+            print(f"Conversion at {run_precision} failed.")
+            return None
+        outputs[run_precision] = result
+
+    (reference, sample_rate), (candidate, _) = outputs["fp32"], outputs[precision]
+    report = {
+        "fp32_s": timings["fp32"],
+        f"{precision}_s": timings[precision],
+        "speedup": timings["fp32"] / timings[precision],
+        "mel_distance_db": mel_distance(reference, candidate, sample_rate),
+    }
+    print(
+        f"fp32: {report['fp32_s']:.2f} s, {precision}: {report[f'{precision}_s']:.2f} s "
+        f"({report['speedup']:.2f}x), mel distance {report['mel_distance_db']:.3f} dB"
+    )
+    return report
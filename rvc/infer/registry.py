@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+
+import torch
+
+
+def model_bytes(obj, depth=3):
+    """
+    Estimates the memory held by the parameters and buffers of a model or model wrapper.
+
+    Args:
+        obj: A torch module, a predictor wrapping one, or a dict of them.
+        depth: How many attribute levels to search for modules.
+    """
+    if isinstance(obj, torch.nn.Module):
+        tensors = list(obj.parameters()) + list(obj.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    if depth == 0:
+        return 0
+    if isinstance(obj, dict):
+        values = obj.values()
+    elif hasattr(obj, "__dict__"):
+        values = vars(obj).values()
+    else:
+        return 0
+    return sum(model_bytes(value, depth - 1) for value in values)
+
+
+class ModelRegistry:
+    """
+    A process-wide registry of loaded models: voice synthesizers, embedders and F0 predictors.
+
+    Models are loaded lazily on first request, shared by key between every Pipeline and
+    VoiceConverter in the process, and the least recently used ones are evicted once the RAM or
+    VRAM budget is exceeded.
+    """
+
+    def __init__(self, ram_budget, vram_budget):
+        """
+        Initializes the registry with memory budgets.
+
+        Args:
+            ram_budget: Bytes of CPU-resident models to keep, 0 for no limit.
+            vram_budget: Bytes of GPU-resident models to keep, 0 for no limit.
+        """
+        self.ram_budget = ram_budget
+        self.vram_budget = vram_budget
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, loader, device="cpu"):
+        """
+        Returns the model registered under `key`, loading it with `loader` if it is not resident.
+
+        Args:
+            key: Hashable identifier of the model, including anything that changes its weights.
+            loader: Callable returning the loaded model.
+            device: Device the model lives on, used to pick the RAM or VRAM budget.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+            model = loader()
+            on_gpu = not str(device).startswith("cpu")
+            with self._lock:
+                self._entries[key] = (model, model_bytes(model), on_gpu)
+                self._evict(on_gpu)
+                self._key_locks.pop(key, None)
+        return model
+
+    def remove(self, key):
+        """
+        Drops a model from the registry.
+
+        Args:
+            key: Identifier the model was registered under.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+        self._empty_cache()
+
+    def clear(self):
+        """
+        Drops every registered model.
+        """
+        with self._lock:
+            self._entries.clear()
+        self._empty_cache()
+
+    def stats(self):
+        """
+        Returns the number of resident models and their estimated size per device class.
+        """
+        with self._lock:
+            return {
+                "models": len(self._entries),
+                "ram_bytes": sum(e[1] for e in self._entries.values() if not e[2]),
+                "vram_bytes": sum(e[1] for e in self._entries.values() if e[2]),
+            }
+
+    def _evict(self, on_gpu):
+        budget = self.vram_budget if on_gpu else self.ram_budget
+        if budget <= 0:
+            return
+        keys = [k for k, e in self._entries.items() if e[2] == on_gpu]
+        total = sum(self._entries[k][1] for k in keys)
+        evicted = False
+        # The most recently added model always stays, even if it alone exceeds the budget.
+        for key in keys[:-1]:
+            if total <= budget:
+                break
+            total -= self._entries.pop(key)[1]
+            evicted = True
+        if evicted and on_gpu:
+            self._empty_cache()
+
+    @staticmethod
+    def _empty_cache():
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+model_registry = None
+
+
+def get_model_registry(config):
+    """
+    Returns the process-wide model registry, creating it on first use.
+
+    Args:
+        config: The Config instance holding the memory budgets.
+    """
+    global model_registry
+    if model_registry is None:
+        model_registry = ModelRegistry(
+            config.model_ram_budget * 1024 * 1024,
+            config.model_vram_budget * 1024 * 1024,
+        )
+    return model_registry
@@ -0,0 +1,341 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+import logging
+
+logging.getLogger("faiss").setLevel(logging.WARNING)
+
+INDEX_TYPES = ["IVF-Flat", "HNSW", "IVF-PQ"]
+# Candidate values of the search parameter of each index family, cheapest first
+SEARCH_PARAMETERS = {
+    "nprobe": [1, 2, 4, 8, 16, 32, 64, 128, 256],
+    "efSearch": [16, 32, 64, 128, 256, 512],
+}
+
+
+class IndexStore:
+    """
+    A process-wide cache of FAISS indexes and their reconstructed feature vectors.
+
+    Entries are keyed by index path and modification time, so a rebuilt index is picked up
+    automatically. The reconstructed vectors are written once to a sidecar `.npy` file next
+    to the index and memory-mapped on later loads instead of being rebuilt in RAM.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Initializes the store with a memory budget.
+
+        Args:
+            max_bytes: Approximate number of bytes the cached entries may occupy before the least
+                recently used ones are evicted.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sidecar_path(file_index):
+        """
+        Returns the path of the memory-mapped vector file that belongs to an index.
+
+        Args:
+            file_index: Path to the FAISS index file.
+        """
+        return file_index + ".npy"
+
+    def get(self, file_index):
+        """
+        Returns the `(index, big_npy)` pair for an index file, loading it on first use.
+
+        Args:
+            file_index: Path to the FAISS index file.
+        """
+        path = os.path.abspath(file_index)
+        key = (path, os.path.getmtime(path))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0], entry[1]
+
+        index = faiss.read_index(path)
+        metadata = read_index_metadata(path)
+        if metadata.get("search_params"):
+            faiss.ParameterSpace().set_index_parameters(
+                index, metadata["search_params"]
+            )
+        big_npy = self._load_vectors(path, index, key[1])
+        size = os.path.getsize(path)
+        if not isinstance(big_npy, np.memmap):
+            size += big_npy.nbytes
+
+        with self._lock:
+            for stale_key in [k for k in self._entries if k[0] == path]:
+                del self._entries[stale_key]
+            self._entries[key] = (index, big_npy, size)
+            self._evict()
+        return index, big_npy
+
+    def clear(self):
+        """
+        Drops every cached index.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _load_vectors(self, path, index, mtime):
+        sidecar = self.sidecar_path(path)
+        if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= mtime:
+            try:
+                big_npy = np.load(sidecar, mmap_mode="r")
+                if big_npy.shape == (index.ntotal, index.d):
+                    return big_npy
+            except Exception as error:
+                print(f"An error occurred reading the index vectors: {error}")
+
+        big_npy = index.reconstruct_n(0, index.ntotal)
+        try:
+            tmp_path = f"{sidecar}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, big_npy)
+            os.replace(tmp_path, sidecar)
+            return np.load(sidecar, mmap_mode="r")
+        except OSError as error:
+            # Read-only model folders still work, the vectors just stay in RAM.
+            print(f"Could not write index vectors next to the index: {error}")
+            return big_npy
+
+    def _evict(self):
+        total = sum(entry[2] for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted[2]
+
+
+def metadata_path(file_index):
+    """
+    Returns the path of the JSON metadata file that belongs to an index.
+
+    Args:
+        file_index: Path to the FAISS index file.
+    """
+    return file_index + ".json"
+
+
+def read_index_metadata(file_index):
+    """
+    Returns the metadata written next to an index at build time, or an empty dict for indexes
+    built before metadata existed.
+
+    Args:
+        file_index: Path to the FAISS index file.
+    """
+    try:
+        with open(metadata_path(file_index), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_index(vectors, index_type="IVF-Flat"):
+    """
+    Builds and fills a FAISS index over feature vectors.
+
+    Args:
+        vectors: Float32 array of shape `(n, dim)`.
+        index_type: One of `INDEX_TYPES`.
+    """
+    n, dim = vectors.shape
+    n_ivf = max(1, min(int(16 * np.sqrt(n)), n // 39))
+    if index_type == "IVF-PQ" and (n < 256 or dim % 8 != 0):
+        # Product quantization needs 256 training vectors per 8-bit codebook.
+        print(f"Too few vectors for IVF-PQ ({n}), building an IVF-Flat index instead.")
+        index_type = "IVF-Flat"
+    if index_type == "HNSW":
+        index = faiss.index_factory(dim, "HNSW32")
+    elif index_type == "IVF-PQ":
+        index = faiss.index_factory(dim, f"IVF{n_ivf},PQ{dim // 8}x8")
+    elif index_type == "IVF-Flat":
+        index = faiss.index_factory(dim, f"IVF{n_ivf},Flat")
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+    index.train(vectors)
+    batch_size_add = 8192
+    for i in range(0, n, batch_size_add):
+        index.add(vectors[i : i + batch_size_add])
+    return index, index_type
+
+
+def search_parameter(index):
+    """
+    Returns the name of the parameter trading search speed for recall and its candidate values.
+
+    Args:
+        index: A FAISS index.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return "nprobe", [v for v in SEARCH_PARAMETERS["nprobe"] if v <= ivf.nlist]
+    if isinstance(index, faiss.IndexHNSW):
+        return "efSearch", SEARCH_PARAMETERS["efSearch"]
+    return None, []
+
+
+def recall_at_k(found, truth):
+    """
+    Returns the mean fraction of the true nearest neighbours found per query.
+
+    Args:
+        found: Neighbour ids returned by the approximate index, shape `(n_queries, k)`.
+        truth: Neighbour ids returned by exact search, shape `(n_queries, k)`.
+    """
+    hits = (found[:, :, None] == truth[:, None, :]).any(axis=2)
+    return float(hits.sum(axis=1).mean() / truth.shape[1])
+
+
+def tune_index(index, vectors, queries, target_recall=0.95, k=8):
+    """
+    Sets the cheapest search parameter reaching the target recall@k against exact search.
+
+    Args:
+        index: The FAISS index to tune, filled with `vectors`.
+        vectors: The vectors the index holds.
+        queries: Query vectors representative of inference features.
+        target_recall: Recall@k to reach.
+        k: Number of neighbours retrieved per query.
+
+    Returns:
+        The FAISS parameter string that was set (empty if the index has none) and its recall.
+        The search stops early once widening it no longer improves recall.
+    """
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    name, values = search_parameter(index)
+    params, recall = "", None
+    parameter_space = faiss.ParameterSpace()
+    for value in values or [None]:
+        previous_params, previous_recall = params, recall
+        if value is not None:
+            params = f"{name}={value}"
+            parameter_space.set_index_parameters(index, params)
+        _, found = index.search(queries, k)
+        recall = recall_at_k(found, truth)
+        if recall >= target_recall:
+            break
+        if previous_recall is not None and recall - previous_recall < 0.005:
+            # Quantized indexes plateau below the target; searching wider only costs time.
+            params, recall = previous_params, previous_recall
+            parameter_space.set_index_parameters(index, params)
+            break
+    return params, recall
+
+
+def write_index(index, file_index, index_type, search_params, recall, vectors):
+    """
+    Writes an index together with its metadata and the vectors retrieval blends.
+
+    The vectors are stored as the `.npy` sidecar so inference never has to reconstruct them,
+    which matters for IVF-PQ where reconstruction would only return the quantized codes.
+
+    Args:
+        index: The FAISS index.
+        file_index: Destination path of the index.
+        index_type: One of `INDEX_TYPES`.
+        search_params: FAISS parameter string applied when the index is loaded.
+        recall: Recall@8 measured with `search_params`.
+        vectors: The vectors the index holds, in insertion order.
+    """
+    faiss.write_index(index, file_index)
+    with open(metadata_path(file_index), "w") as f:
+        json.dump(
+            {
+                "index_type": index_type,
+                "search_params": search_params,
+                "recall_at_8": recall,
+                "ntotal": int(index.ntotal),
+            },
+            f,
+            indent=4,
+        )
+    np.save(IndexStore.sidecar_path(file_index), np.ascontiguousarray(vectors))
+
+
+def benchmark_index_types(vectors, queries, k=8, frames_per_second=50):
+    """
+    Builds and tunes every index type over `vectors` and measures it against exact search.
+
+    Like at training time, a random sample of `vectors` is kept out of the indexes and used to
+    tune them, so neither the tuning nor the measured queries are vectors the index holds.
+
+    Args:
+        vectors: Feature vectors the indexes hold, apart from the tuning sample.
+        queries: Held-out feature vectors used as inference queries.
+        k: Number of neighbours retrieved per query.
+        frames_per_second: Embedder frames per second of audio, to express latency per second.
+
+    Returns:
+        A list of dicts with the index type, search parameters, build time, recall@k and search
+        time per second of audio.
+    """
+    audio_seconds = queries.shape[0] / frames_per_second
+    held_out = min(1000, vectors.shape[0] // 10)
+    order = np.random.default_rng(0).permutation(vectors.shape[0])
+    tuning = vectors[order[:held_out]] if held_out else vectors
+    vectors = vectors[np.sort(order[held_out:])]
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    start_time = time.perf_counter()
+    _, truth = exact.search(queries, k)
+    results = [
+        {
+            "index_type": "Exact",
+            "search_params": "",
+            "build_s": 0.0,
+            "recall": 1.0,
+            "ms_per_audio_s": (time.perf_counter() - start_time) * 1000 / audio_seconds,
+        }
+    ]
+    for index_type in INDEX_TYPES:
+        start_time = time.perf_counter()
+        index, built_type = build_index(vectors, index_type)
+        search_params, _ = tune_index(index, vectors, tuning, k=k)
+        build_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        _, found = index.search(queries, k)
+        search_time = time.perf_counter() - start_time
+        results.append(
+            {
+                "index_type": built_type,
+                "search_params": search_params,
+                "build_s": build_time,
+                "recall": recall_at_k(found, truth),
+                "ms_per_audio_s": search_time * 1000 / audio_seconds,
+            }
+        )
+    return results
+
+
+index_store = None
+
+
+def get_index_store(max_mb):
+    """
+    Returns the process-wide index store, creating it on first use.
+
+    Args:
+        max_mb: Memory budget for cached indexes in megabytes.
+    """
+    global index_store
+    if index_store is None:
+        index_store = IndexStore(max_mb * 1024 * 1024)
+    else:
+        index_store.max_bytes = max_mb * 1024 * 1024
+    return index_store
@@ -0,0 +1,413 @@
+import io
+import os
+import json
+import time
+import threading
+import traceback
+import email.parser
+import email.policy
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import soxr
+import torch
+import numpy as np
+import soundfile as sf
+
+DEFAULT_PARAMS = {
+    "model_path": None,
+    "index_path": "",
+    "pitch": 0,
+    "f0_method": "rmvpe",
+    "index_rate": 0.75,
+    "protect": 0.5,
+    "hop_length": 128,
+    "volume_envelope": 1.0,
+    "f0_autotune": False,
+    "f0_autotune_strength": 1.0,
+    "f0_autotune_key": "C",
+    "f0_autotune_scale": "chromatic",
+    "f0_autotune_speed": 0.0,
+    "embedder_model": "contentvec",
+    "embedder_model_custom": None,
+    "sid": 0,
+    "feature_cache": True,
+    "silence_gate": False,
+}
+
+
+class ConversionJob:
+    """
+    A single conversion request waiting in the scheduler.
+    """
+
+    def __init__(self, audio, params):
+        self.audio = audio
+        self.params = params
+        self.created = time.time()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    @property
+    def batch_key(self):
+        # Requests sharing these settings can run through one forward pass; sid, pitch and
+        # F0 settings may differ per request.
+        p = self.params
+        return (
+            p["model_path"],
+            p["index_path"],
+            p["index_rate"],
+            p["protect"],
+            p["embedder_model"],
+            p["embedder_model_custom"],
+            p["feature_cache"],
+        )
+
+
+class BatchScheduler:
+    """
+    Queues conversion jobs per model and runs compatible ones together in a single forward pass.
+    """
+
+    def __init__(self, converter, max_batch=8, max_wait=0.05):
+        """
+        Initializes the scheduler.
+
+        Args:
+            converter: The VoiceConverter whose models stay resident for the server's lifetime.
+            max_batch: Maximum number of requests, and of windows per forward pass, in one batch.
+            max_wait: Seconds the oldest request waits for others to join its batch.
+        """
+        self.converter = converter
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queues = defaultdict(deque)
+        self.latencies = deque(maxlen=1000)
+        self.completed = 0
+        self.forward_passes = 0
+        self.batched_windows = 0
+        self._cond = threading.Condition()
+
+    def submit(self, job):
+        with self._cond:
+            self.queues[job.batch_key].append(job)
+            self._cond.notify()
+
+    def stats(self):
+        """
+        Returns queue depth per model, latency percentiles of recent requests and how full the
+        synthesizer batches have been.
+        """
+        with self._cond:
+            depths = defaultdict(int)
+            for key, jobs in self.queues.items():
+                depths[key[0]] += len(jobs)
+            latencies = np.array(self.latencies) * 1000
+            completed = self.completed
+            forward_passes = self.forward_passes
+            batched_windows = self.batched_windows
+        stats = {"queue_depth": dict(depths), "completed": completed}
+        if forward_passes:
+            # Average windows per synthesizer forward pass, as a fraction of max_batch.
+            stats["batch_occupancy"] = batched_windows / forward_passes / self.max_batch
+            stats["forward_passes"] = forward_passes
+        if latencies.size:
+            stats["latency_ms"] = {
+                f"p{q}": float(np.percentile(latencies, q)) for q in (50, 90, 99)
+            }
+        return stats
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not any(self.queues.values()):
+                    self._cond.wait()
+                key = min(
+                    (key for key, jobs in self.queues.items() if jobs),
+                    key=lambda key: self.queues[key][0].created,
+                )
+                deadline = self.queues[key][0].created + self.max_wait
+                while len(self.queues[key]) < self.max_batch:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                jobs = [
+                    self.queues[key].popleft()
+                    for _ in range(min(self.max_batch, len(self.queues[key])))
+                ]
+            try:
+                self._run_batch(jobs)
+            except Exception as error:
+                print(f"An error occurred during batched conversion: {error}")
+                print(traceback.format_exc())
+                for job in jobs:
+                    if not job.done.is_set():
+                        job.error = str(error)
+            with self._cond:
+                for job in jobs:
+                    self.latencies.append(time.time() - job.created)
+                    self.completed += 1
+            for job in jobs:
+                job.done.set()
+
+    def _run_batch(self, jobs):
+        converter = self.converter
+        params = jobs[0].params
+        converter.get_vc(params["model_path"], params["sid"])
+        # cpt stays set to the last model that loaded, so check it rather than net_g.
+        if converter.cpt is None:
+            raise FileNotFoundError(f"Model not found: {params['model_path']}")
+        if (
+            not converter.hubert_model
+            or params["embedder_model"] != converter.last_embedder_model
+        ):
+            converter.load_hubert(
+                params["embedder_model"], params["embedder_model_custom"]
+            )
+            converter.last_embedder_model = params["embedder_model"]
+
+        valid_jobs = []
+        for job in jobs:
+            if 0 <= job.params["sid"] < converter.n_spk:
+                valid_jobs.append(job)
+            else:
+                job.error = f"Speaker ID {job.params['sid']} is out of range"
+        if not valid_jobs:
+            return
+
+        vc = converter.vc
+        index = big_npy = None
+        index_path = params["index_path"]
+        if index_path and os.path.exists(index_path) and params["index_rate"] > 0:
+            index, big_npy = vc.index_store.get(index_path)
+        embedder_key = None
+        if params["feature_cache"]:
+            embedder_key = (
+                f"{params['embedder_model']}:{params['embedder_model_custom']}"
+                f":{converter.precision}:{converter.config.inference_backend}"
+            )
+
+        prepared = []
+        for job in valid_jobs:
+            audio = vc.highpass(job.audio, cache=params["feature_cache"])
+            if job.params["silence_gate"]:
+                spans = vc.voiced_spans(audio)
+            else:
+                spans = [(0, audio.shape[0])]
+            span_windows = [
+                vc.prepare_windows(
+                    audio[start:end],
+                    job.params["pitch"],
+                    job.params["f0_method"],
+                    converter.use_f0,
+                    job.params["hop_length"],
+                    job.params["f0_autotune"],
+                    job.params["f0_autotune_strength"],
+                    f0_autotune_key=job.params["f0_autotune_key"],
+                    f0_autotune_scale=job.params["f0_autotune_scale"],
+                    f0_autotune_speed=job.params["f0_autotune_speed"],
+                )
+                for start, end in spans
+            ]
+            prepared.append((audio, spans, span_windows))
+        items = [
+            (job_index, span_index, window)
+            for job_index, (_, _, span_windows) in enumerate(prepared)
+            for span_index, windows in enumerate(span_windows)
+            for window in windows
+        ]
+        outputs = [None] * len(items)
+        # Windows of any length share a synthesizer pass; sorting by length keeps the padding
+        # in each batch small.
+        order = sorted(range(len(items)), key=lambda i: items[i][2][0].shape[0])
+        for start in range(0, len(order), self.max_batch):
+            indices = order[start : start + self.max_batch]
+            group = [items[i] for i in indices]
+            # Different speakers of one model batch together through emb_g.
+            sid = torch.tensor(
+                [valid_jobs[job_index].params["sid"] for job_index, _, _ in group],
+                device=vc.device,
+            ).long()
+            converted = vc.voice_conversion_batch(
+                converter.hubert_model,
+                converter.net_g,
+                sid,
+                [window[0] for _, _, window in group],
+                [window[1] for _, _, window in group] if converter.use_f0 else None,
+                [window[2] for _, _, window in group] if converter.use_f0 else None,
+                index,
+                big_npy,
+                params["index_rate"],
+                converter.version,
+                params["protect"],
+                embedder_key,
+            )
+            for i, output in zip(indices, converted):
+                outputs[i] = output
+            with self._cond:
+                self.forward_passes += 1
+                self.batched_windows += len(indices)
+
+        per_job = [[[] for _ in spans] for _, spans, _ in prepared]
+        for (job_index, span_index, _), output in zip(items, outputs):
+            per_job[job_index][span_index].append(output)
+        for job, (audio, spans, _), converted in zip(valid_jobs, prepared, per_job):
+            audio_opt = vc.join_spans(audio, spans, converted)
+            audio_opt = vc.finalize_audio(
+                audio, audio_opt, job.params["volume_envelope"]
+            )
+            buffer = io.BytesIO()
+            sf.write(buffer, audio_opt, converter.tgt_sr, format="WAV")
+            job.result = buffer.getvalue()
+
+
+def parse_multipart(content_type, body):
+    """
+    Splits a multipart/form-data body into text fields and file contents.
+
+    Args:
+        content_type: The request's Content-Type header, including the boundary.
+        body: The raw request body.
+    """
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+    )
+    fields, files = {}, {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True)
+        if part.get_filename() is not None:
+            files[name] = payload
+        else:
+            fields[name] = payload.decode()
+    return fields, files
+
+
+def parse_params(fields):
+    """
+    Converts form fields to conversion parameters, filling in defaults.
+
+    Args:
+        fields: Dictionary of text form fields.
+    """
+    params = dict(DEFAULT_PARAMS)
+    for name, default in DEFAULT_PARAMS.items():
+        if name not in fields:
+            continue
+        value = fields[name]
+        if isinstance(default, bool):
+            params[name] = value.lower() in ("1", "true", "yes")
+        elif isinstance(default, int):
+            params[name] = int(value)
+        elif isinstance(default, float):
+            params[name] = float(value)
+        else:
+            params[name] = value
+    if not params["model_path"]:
+        raise ValueError("model_path is required")
+    return params
+
+
+def decode_audio(data):
+    """
+    Decodes uploaded audio to a normalized mono 16 kHz signal.
+
+    Args:
+        data: Bytes of an audio file in any format soundfile can read.
+    """
+    audio, sr = sf.read(io.BytesIO(data), dtype="float32")
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != 16000:
+        audio = soxr.resample(audio, sr, 16000, quality="VHQ")
+    audio_max = np.abs(audio).max() / 0.95
+    if audio_max > 1:
+        audio /= audio_max
+    return audio
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves `POST /convert` (multipart audio in, WAV out), `GET /stats` and `GET /health`.
+    """
+
+    scheduler = None
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.scheduler.stats())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/convert":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            fields, files = parse_multipart(
+                self.headers.get("Content-Type", ""), self.rfile.read(length)
+            )
+            if "audio" not in files:
+                raise ValueError("An 'audio' file field is required")
+            job = ConversionJob(decode_audio(files["audio"]), parse_params(fields))
+        except Exception as error:
+            self._send_json(400, {"error": str(error)})
+            return
+
+        self.scheduler.submit(job)
+        job.done.wait()
+        if job.error is not None or job.result is None:
+            self._send_json(500, {"error": job.error or "Conversion failed"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Content-Length", str(len(job.result)))
+        self.end_headers()
+        self.wfile.write(job.result)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep load tests quiet; /stats reports what matters
+
+
+def run_server(
+    host="127.0.0.1", port=6970, max_batch=8, max_wait_ms=50, compile_models=None
+):
+    """
+    Runs the inference server until interrupted.
+
+    Args:
+        host: Interface to bind, localhost by default.
+        port: Port to listen on.
+        max_batch: Maximum number of requests, and of windows per forward pass, in one batch.
+        max_wait_ms: Milliseconds a request waits for others to join its batch.
+        compile_models: Whether to compile voice models with TorchScript, None keeps the
+            configured setting.
+    """
+    from rvc.infer.infer import VoiceConverter
+
+    converter = VoiceConverter()
+    converter.set_compile_models(compile_models)
+    scheduler = BatchScheduler(converter, max_batch, max_wait_ms / 1000)
+    threading.Thread(target=scheduler.run, daemon=True).start()
+    InferenceRequestHandler.scheduler = scheduler
+    server = ThreadingHTTPServer((host, port), InferenceRequestHandler)
+    print(f"Inference server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,252 @@
+import time
+import soxr
+import torch
+import numpy as np
+import soundfile as sf
+
+from rvc.infer.pipeline import zero_phase_highpass
+
+
+class StreamingEngine:
+    """
+    A block-based voice conversion engine with bounded algorithmic latency.
+
+    Every incoming block is appended to a rolling 16 kHz context buffer, the F0 predictor and the
+    embedder run over that buffer, and only the newest block of synthesized audio is kept. Output
+    blocks are stitched with SOLA (synchronized overlap-add) so block seams do not click.
+    """
+
+    def __init__(
+        self,
+        vc,
+        hubert_model,
+        net_g,
+        sid,
+        tgt_sr,
+        version,
+        use_f0,
+        index=None,
+        big_npy=None,
+        pitch=0,
+        f0_method="rmvpe",
+        index_rate=0.75,
+        protect=0.5,
+        hop_length=128,
+        f0_autotune=False,
+        f0_autotune_strength=1,
+        context_time=2.5,
+        crossfade_time=0.05,
+        sola_search_time=0.012,
+    ):
+        """
+        Initializes the engine around already loaded models.
+
+        Args:
+            vc: The Pipeline instance of the loaded voice model.
+            hubert_model: The feature extractor model.
+            net_g: The generative model for synthesizing speech.
+            sid: Speaker ID for the target voice.
+            tgt_sr: Sampling rate of the synthesized audio.
+            version: Model version.
+            use_f0: Whether the model uses pitch guidance.
+            index: FAISS index for speaker embedding retrieval.
+            big_npy: Speaker embeddings stored in a NumPy array.
+            pitch: Key to adjust the pitch of the F0 contour.
+            f0_method: Method to use for F0 estimation.
+            index_rate: Blending rate for speaker embedding retrieval.
+            protect: Protection level for preserving the original pitch.
+            hop_length: Hop length for F0 estimation methods.
+            f0_autotune: Whether to apply autotune to the F0 contour.
+            f0_autotune_strength: Strength of the autotune.
+            context_time: Seconds of past input fed to the embedder and F0 predictor.
+            crossfade_time: Seconds of crossfade between consecutive output blocks.
+            sola_search_time: Seconds searched for the best SOLA alignment.
+        """
+        self.vc = vc
+        self.hubert_model = hubert_model
+        self.net_g = net_g
+        self.sid = torch.tensor(sid, device=vc.device).unsqueeze(0).long()
+        self.tgt_sr = tgt_sr
+        self.version = version
+        self.use_f0 = use_f0
+        self.index = index
+        self.big_npy = big_npy
+        self.pitch = pitch
+        self.f0_method = f0_method
+        self.index_rate = index_rate
+        self.protect = protect
+        self.hop_length = hop_length
+        self.f0_autotune = f0_autotune
+        self.f0_autotune_strength = f0_autotune_strength
+
+        self.window = vc.window
+        self.zc = tgt_sr // 100  # output samples per 160-sample input frame
+        self.context_frames = int(np.round(context_time * 100))
+        self.crossfade_frames = max(1, int(np.round(crossfade_time * 100)))
+        self.sola_search_frames = max(1, int(np.round(sola_search_time * 100)))
+        self.block_frames = None
+        self.latencies = []
+
+    def algorithmic_latency(self):
+        """
+        Returns the delay in seconds between a sample entering and leaving the engine,
+        excluding processing time.
+        """
+        if self.block_frames is None:
+            return None
+        return (
+            self.block_frames + self.crossfade_frames + self.sola_search_frames
+        ) / 100
+
+    def stats(self):
+        """
+        Returns the measured per-block processing latency.
+        """
+        if not self.latencies:
+            return {"blocks": 0}
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "blocks": len(latencies),
+            "mean_ms": float(latencies.mean()),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "max_ms": float(latencies.max()),
+            "algorithmic_latency_ms": self.algorithmic_latency() * 1000,
+        }
+
+    def process(self, frames_iter, sample_rate=16000):
+        """
+        Converts an iterable of fixed-size PCM blocks, yielding one converted block per input block.
+
+        Args:
+            frames_iter: Iterable of mono (or multi-channel, which is downmixed) float PCM blocks.
+            sample_rate: Sampling rate of the incoming blocks.
+        """
+        resampler = (
+            soxr.ResampleStream(sample_rate, 16000, 1, dtype="float32")
+            if sample_rate != 16000
+            else None
+        )
+        pending = np.zeros(0, dtype=np.float32)
+        buffer = None
+        sola_buffer = None
+
+        for block in frames_iter:
+            block = np.asarray(block, dtype=np.float32)
+            if block.ndim > 1:
+                block = block.mean(axis=1)
+            if self.block_frames is None:
+                block_samples = int(np.round(block.shape[0] * 16000 / sample_rate))
+                self.block_frames = max(1, block_samples // self.window)
+            if resampler is not None:
+                block = resampler.resample_chunk(block)
+            pending = np.concatenate((pending, block))
+
+            block_samples = self.block_frames * self.window
+            while pending.shape[0] >= block_samples:
+                new_input, pending = pending[:block_samples], pending[block_samples:]
+                buffer, sola_buffer, output = self._convert_block(
+                    new_input, buffer, sola_buffer
+                )
+                yield output
+
+        if resampler is not None:
+            flushed = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+            pending = np.concatenate((pending, flushed))
+        if pending.shape[0] > 0 and self.block_frames is not None:
+            block_samples = self.block_frames * self.window
+            tail_frames = int(np.ceil(pending.shape[0] / self.window))
+            new_input = np.pad(pending, (0, block_samples - pending.shape[0]))
+            buffer, sola_buffer, output = self._convert_block(
+                new_input, buffer, sola_buffer
+            )
+            yield output[: tail_frames * self.zc]
+
+    def _convert_block(self, new_input, buffer, sola_buffer):
+        start_time = time.perf_counter()
+        buffer_frames = (
+            self.context_frames
+            + self.crossfade_frames
+            + self.sola_search_frames
+            + self.block_frames
+        )
+        if buffer is None:
+            buffer = np.zeros(buffer_frames * self.window, dtype=np.float32)
+        buffer = np.concatenate((buffer[new_input.shape[0] :], new_input))
+
+        audio = zero_phase_highpass(buffer)
+        p_len = audio.shape[0] // self.window
+        pitch = pitchf = None
+        if self.use_f0:
+            pitch, pitchf = self.vc.get_f0(
+                "stream",
+                audio,
+                p_len,
+                self.pitch,
+                self.f0_method,
+                self.hop_length,
+                self.f0_autotune,
+                self.f0_autotune_strength,
+                use_f0_cache=False,
+            )
+            pitch = torch.tensor(pitch[:p_len], device=self.vc.device).unsqueeze(0)
+            pitchf = torch.tensor(
+                pitchf[:p_len], device=self.vc.device, dtype=torch.float32
+            ).unsqueeze(0)
+            pitch = pitch.long()
+
+        infer_wav = self.vc.voice_conversion(
+            self.hubert_model,
+            self.net_g,
+            self.sid,
+            audio,
+            pitch,
+            pitchf,
+            self.index,
+            self.big_npy,
+            self.index_rate,
+            self.version,
+            self.protect,
+        )
+
+        block = self.block_frames * self.zc
+        crossfade = self.crossfade_frames * self.zc
+        sola_search = self.sola_search_frames * self.zc
+        infer_wav = infer_wav[-(block + crossfade + sola_search) :]
+        if infer_wav.shape[0] < block + crossfade + sola_search:
+            infer_wav = np.pad(
+                infer_wav, (block + crossfade + sola_search - infer_wav.shape[0], 0)
+            )
+
+        if sola_buffer is None:
+            sola_offset = sola_search
+        else:
+            search = infer_wav[: crossfade + sola_search]
+            cor_nom = np.correlate(search, sola_buffer, mode="valid")
+            cor_den = np.sqrt(
+                np.convolve(search**2, np.ones(crossfade), mode="valid") + 1e-8
+            )
+            sola_offset = int(np.argmax(cor_nom / cor_den))
+        infer_wav = infer_wav[sola_offset : sola_offset + block + crossfade].copy()
+
+        if sola_buffer is not None:
+            fade_in = np.sin(0.5 * np.pi * np.linspace(0, 1, crossfade)) ** 2
+            infer_wav[:crossfade] = infer_wav[:crossfade] * fade_in + sola_buffer * (
+                1 - fade_in
+            )
+        sola_buffer = infer_wav[block : block + crossfade].copy()
+        output = infer_wav[:block]
+
+        self.latencies.append(time.perf_counter() - start_time)
+        return buffer, sola_buffer, output
+
+
+def iter_audio_blocks(file, block_size):
+    """
+    Yields fixed-size mono blocks from an audio file, for feeding the streaming engine offline.
+
+    Args:
+        file: Path to the audio file.
+        block_size: Number of samples per block at the file's own sampling rate.
+    """
+    for block in sf.blocks(file, blocksize=block_size, dtype="float32"):
+        yield block.mean(axis=1) if block.ndim > 1 else block
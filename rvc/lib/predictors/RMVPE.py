@@ -8,6 +8,8 @@ from typing import List
 
 N_MELS = 128
 N_CLASS = 360
+# Cents of each salience bin, zero-padded by 4 bins on each side
+CENTS_MAPPING = np.pad(20 * np.arange(N_CLASS) + 1997.3794084376191, (4, 4))
 
 
 class ConvBlockRes(nn.Module):
@@ -424,23 +426,38 @@ class RMVPE0Predictor:
     Args:
         model_path (str): Path to the RMVPE0 model file.
         device (str, optional): Device to use for computation. Defaults to None, which uses CUDA if available.
+        segment_frames (int, optional): Frames (10 ms each) converted per block on long inputs, so
+            peak memory does not grow with the input length. 0 runs the whole input at once.
+        context_frames (int, optional): Frames of neighbouring audio run on each side of a block
+            and then discarded, giving the BiGRU context across block seams.
+        model (callable, optional): Already loaded E2E network, or a callable with the same
+            interface such as an onnxruntime wrapper. `model_path` is not read then.
     """
 
-    def __init__(self, model_path, device=None):
+    def __init__(
+        self,
+        model_path,
+        device=None,
+        segment_frames=6000,
+        context_frames=400,
+        model=None,
+    ):
         self.resample_kernel = {}
-        model = E2E(4, 1, (2, 2))
-        ckpt = torch.load(model_path, map_location="cpu", weights_only=True)
-        model.load_state_dict(ckpt)
-        model.eval()
+        if model is None:
+            model = E2E(4, 1, (2, 2))
+            ckpt = torch.load(model_path, map_location="cpu", weights_only=True)
+            model.load_state_dict(ckpt)
+            model.eval()
+            model = model.to(device)
         self.model = model
         self.resample_kernel = {}
         self.device = device
         self.mel_extractor = MelSpectrogram(
             N_MELS, 16000, 1024, 160, None, 30, 8000
         ).to(device)
-        self.model = self.model.to(device)
-        cents_mapping = 20 * np.arange(N_CLASS) + 1997.3794084376191
-        self.cents_mapping = np.pad(cents_mapping, (4, 4))
+        self.cents_mapping = CENTS_MAPPING
+        self.segment_frames = segment_frames
+        self.context_frames = context_frames
 
     def mel2hidden(self, mel):
         """
@@ -474,45 +491,227 @@ class RMVPE0Predictor:
         """
         Infers F0 from audio.
 
+        Inputs longer than one segment are converted block by block: each block is run together
+        with `context_frames` of audio on either side and only its own frames are kept, so the
+        mel spectrogram and the network activations never cover more than one padded block.
+
         Args:
             audio (np.ndarray): Audio signal.
             thred (float, optional): Threshold for salience. Defaults to 0.03.
         """
+        hop_length = self.mel_extractor.hop_length
+        n_frames = audio.shape[0] // hop_length + 1
+        if (
+            not self.segment_frames
+            or n_frames <= self.segment_frames + 2 * self.context_frames
+        ):
+            return self.decode(self.audio2hidden(audio), thred=thred)
+
+        f0 = []
+        for start in range(0, n_frames, self.segment_frames):
+            end = min(start + self.segment_frames, n_frames)
+            context_start = max(0, start - self.context_frames)
+            context_end = min(n_frames, end + self.context_frames)
+            # A centered STFT over this slice yields exactly frames context_start..context_end-1;
+            # only the last block keeps the true end of the signal, like the full pass does.
+            audio_end = (
+                (context_end - 1) * hop_length + 1
+                if context_end < n_frames
+                else audio.shape[0]
+            )
+            hidden = self.audio2hidden(audio[context_start * hop_length : audio_end])
+            hidden = hidden[start - context_start : end - context_start]
+            f0.append(self.decode(hidden, thred=thred))
+            del hidden
+        return np.concatenate(f0)
+
+    def audio2hidden(self, audio):
+        """
+        Converts audio to the hidden salience representation, one row per 10 ms frame.
+
+        Args:
+            audio (np.ndarray): Audio signal.
+        """
         audio = torch.from_numpy(audio).float().to(self.device).unsqueeze(0)
         mel = self.mel_extractor(audio, center=True)
-        hidden = self.mel2hidden(mel)
-        hidden = hidden.squeeze(0).cpu().numpy()
-        f0 = self.decode(hidden, thred=thred)
-        return f0
+        return self.mel2hidden(mel).squeeze(0)
 
     def to_local_average_cents(self, salience, thred=0.05):
         """
         Converts salience to local average cents.
 
         Args:
-            salience (np.ndarray): Salience values.
+            salience (np.ndarray or torch.Tensor): Salience values. A tensor is windowed on its own
+                device, so only the 9 bins around each peak are copied back to the host.
             thred (float, optional): Threshold for salience. Defaults to 0.05.
         """
-        center = np.argmax(salience, axis=1)
-        salience = np.pad(salience, ((0, 0), (4, 4)))
-        center += 4
-        todo_salience = []
-        todo_cents_mapping = []
-        starts = center - 4
-        ends = center + 5
-        for idx in range(salience.shape[0]):
-            todo_salience.append(salience[:, starts[idx] : ends[idx]][idx])
-            todo_cents_mapping.append(self.cents_mapping[starts[idx] : ends[idx]])
-        todo_salience = np.array(todo_salience)
-        todo_cents_mapping = np.array(todo_cents_mapping)
+        # Gather the 9 bins around each peak directly instead of slicing frame by frame; bins
+        # past either edge read as 0, as if the salience were zero-padded by 4.
+        offsets = np.arange(-4, 5)
+        n_bins = salience.shape[1]
+        if isinstance(salience, torch.Tensor):
+            center = torch.argmax(salience, dim=1)
+            idx = center.unsqueeze(1) + torch.from_numpy(offsets).to(center.device)
+            todo_salience = salience.gather(1, idx.clamp(0, n_bins - 1))
+            todo_salience = todo_salience.masked_fill((idx < 0) | (idx >= n_bins), 0)
+            todo_salience = todo_salience.cpu().numpy()
+            center = center.cpu().numpy()
+        else:
+            center = np.argmax(salience, axis=1)
+            idx = center[:, None] + offsets
+            todo_salience = np.take_along_axis(
+                salience, np.clip(idx, 0, n_bins - 1), axis=1
+            )
+            todo_salience[(idx < 0) | (idx >= n_bins)] = 0
+        todo_cents_mapping = self.cents_mapping[center[:, None] + offsets + 4]
         product_sum = np.sum(todo_salience * todo_cents_mapping, 1)
         weight_sum = np.sum(todo_salience, 1)
         devided = product_sum / weight_sum
-        maxx = np.max(salience, axis=1)
+        maxx = np.maximum(todo_salience[:, 4], 0)  # the peak, or 0 from the padding
         devided[maxx <= thred] = 0
         return devided
 
 
+def _local_average_cents_loop(salience, cents_mapping, thred=0.05):
+    # The frame-by-frame decoder `to_local_average_cents` replaced, kept as its reference.
+    center = np.argmax(salience, axis=1)
+    salience = np.pad(salience, ((0, 0), (4, 4)))
+    center += 4
+    todo_salience = []
+    todo_cents_mapping = []
+    starts = center - 4
+    ends = center + 5
+    for idx in range(salience.shape[0]):
+        todo_salience.append(salience[:, starts[idx] : ends[idx]][idx])
+        todo_cents_mapping.append(cents_mapping[starts[idx] : ends[idx]])
+    todo_salience = np.array(todo_salience)
+    todo_cents_mapping = np.array(todo_cents_mapping)
+    product_sum = np.sum(todo_salience * todo_cents_mapping, 1)
+    weight_sum = np.sum(todo_salience, 1)
+    devided = product_sum / weight_sum
+    maxx = np.max(salience, axis=1)
+    devided[maxx <= thred] = 0
+    return devided
+
+
+def benchmark_salience_decoder(n_frames=30000, runs=5, seed=0):
+    """
+    Checks `RMVPE0Predictor.to_local_average_cents` against the frame-by-frame loop it replaced
+    and times both.
+
+    Random salience maps of several lengths, and a map whose peaks sit on the first and last
+    bins or under the threshold, must decode to the same cents bit for bit, from an array and
+    from a tensor.
+
+    Args:
+        n_frames: Frames of the timed salience map; 100 frames are one second of audio.
+        runs: Timed calls per decoder, the median is reported.
+        seed: Seed of the random salience maps.
+
+    Returns:
+        A dict with whether every map matched, the number of maps checked and the median time
+        in ms of each decoder.
+    """
+    import time
+
+    # The decoder only needs the cents mapping, so no model is loaded.
+    predictor = RMVPE0Predictor.__new__(RMVPE0Predictor)
+    predictor.cents_mapping = CENTS_MAPPING
+    rng = np.random.default_rng(seed)
+    maps = [rng.random((n, N_CLASS), dtype=np.float32) for n in (1, 2, 7, 1000)]
+    edges = rng.random((4, N_CLASS), dtype=np.float32) * 0.04
+    edges[0, 0] = edges[1, -1] = 1.0
+    edges[2, 3] = 0.05
+    maps.append(edges)
+    timed = rng.random((n_frames, N_CLASS), dtype=np.float32)
+    maps.append(timed)
+
+    matched = True
+    for salience in maps:
+        expected = _local_average_cents_loop(salience, CENTS_MAPPING).tobytes()
+        for candidate in (salience, torch.from_numpy(salience)):
+            decoded = predictor.to_local_average_cents(candidate)
+            matched = matched and decoded.tobytes() == expected
+
+    def median_ms(function):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            function(timed)
+            times.append(time.perf_counter() - start)
+        return float(np.median(times)) * 1000
+
+    return {
+        "matched": matched,
+        "maps": len(maps),
+        "loop_ms": median_ms(lambda x: _local_average_cents_loop(x, CENTS_MAPPING)),
+        "vectorized_ms": median_ms(predictor.to_local_average_cents),
+    }
+
+
+def _peak_rss_mb():
+    import sys
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _segmented_inference_memory(seconds, segment_frames, device, seed):
+    # Runs in a fresh process, so the peak RSS covers this conversion only.
+    model = E2E(4, 1, (2, 2)).eval().to(device)
+    predictor = RMVPE0Predictor(
+        None, device=device, segment_frames=segment_frames, model=model
+    )
+    rng = np.random.default_rng(seed)
+    audio = rng.standard_normal(int(seconds * 16000), dtype=np.float32) * 0.1
+    before = _peak_rss_mb()
+    predictor.infer_from_audio(audio)
+    return before, _peak_rss_mb()
+
+
+def benchmark_segment_memory(
+    minutes=60, reference_minutes=5, segment_frames=6000, device="cpu", seed=0
+):
+    """
+    Measures the peak resident memory of RMVPE on a synthetic input of `minutes` and on a
+    shorter one of `reference_minutes`, converted in segments, and of the shorter one converted
+    in a single pass.
+
+    Each run happens in its own process, as `ru_maxrss` only ever grows. The network is randomly
+    initialized, which does not change its memory use. With segmenting, the peak minus the
+    input itself should stay flat as the input grows. Needs the `resource` module, so it does
+    not run on Windows.
+
+    Args:
+        minutes: Length of the long synthetic input in minutes.
+        reference_minutes: Length of the short input, also converted without segmenting.
+        segment_frames: Frames per segment, as in `RMVPE0Predictor`.
+        device: Device to run the network on; only host memory is measured.
+        seed: Seed of the synthetic audio.
+
+    Returns:
+        A dict mapping each run to the peak RSS in MB before and after the conversion.
+    """
+    import multiprocessing
+
+    runs = {
+        f"segmented {minutes} min": (minutes * 60, segment_frames),
+        f"segmented {reference_minutes} min": (reference_minutes * 60, segment_frames),
+        f"single pass {reference_minutes} min": (reference_minutes * 60, 0),
+    }
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name, (seconds, frames) in runs.items():
+        with context.Pool(1) as pool:
+            before, after = pool.apply(
+                _segmented_inference_memory, (seconds, frames, device, seed)
+            )
+        results[name] = {"before_mb": before, "peak_mb": after}
+    return results
+
+
 class BiGRU(nn.Module):
     """
     A bidirectional GRU layer.
@@ -40,6 +40,38 @@ def merge_audio(audio_segments_org, audio_segments_new, intervals, sr_orig, sr_n
     Returns:
     - np.ndarray: The merged audio signal with silent gaps restored.
     """
+    dtype = audio_segments_new[0].dtype
+    sr_ratio = sr_new / sr_orig
+    intervals = np.asarray(intervals)
+
+    # Lay out every segment first, then fill one preallocated buffer: each segment is preceded
+    # or followed by silence making up for its change in duration, and followed by the gap to
+    # the next segment.
+    starts_new = (intervals[:, 0] * sr_ratio).astype(np.int64)
+    ends_new = (intervals[:, 1] * sr_ratio).astype(np.int64)
+    lengths_org = np.array([len(segment) for segment in audio_segments_org])
+    lengths_new = np.array([len(segment) for segment in audio_segments_new])
+    duration_diff = lengths_new / sr_new - lengths_org / sr_orig
+    silence_samples = (np.abs(duration_diff) * sr_new).astype(np.int64)
+    silence_before = np.where(duration_diff > 0, silence_samples, 0)
+    silence_after = np.where(duration_diff < 0, silence_samples, 0)
+    gaps = np.zeros(len(intervals), dtype=np.int64)
+    gaps[:-1] = np.maximum(starts_new[1:] - ends_new[:-1], 0)
+
+    block_lengths = silence_before + lengths_new + silence_after + gaps
+    offsets = np.concatenate(([max(starts_new[0], 0)], block_lengths)).cumsum()
+    merged_audio = np.zeros(offsets[-1], dtype=dtype)
+    for segment, offset in zip(audio_segments_new, offsets[:-1] + silence_before):
+        merged_audio[offset : offset + len(segment)] = segment
+
+    return merged_audio
+
+
+def _merge_audio_concat(
+    audio_segments_org, audio_segments_new, intervals, sr_orig, sr_new
+):
+    # The merge `merge_audio` replaced, growing the output one segment at a time; kept as its
+    # reference.
     merged_audio = np.array([], dtype=audio_segments_new[0].dtype)
     sr_ratio = sr_new / sr_orig
 
@@ -77,3 +109,55 @@ def merge_audio(audio_segments_org, audio_segments_new, intervals, sr_orig, sr_n
                 merged_audio = np.concatenate((merged_audio, silence))
 
     return merged_audio
+
+
+def benchmark_merge(n_segments=300, runs=3, sr_orig=16000, sr_new=40000, seed=0):
+    """
+    Checks `merge_audio` against the concatenating merge it replaced and times both.
+
+    Builds `n_segments` random segments of 0.1 to 2.5 s separated by gaps of up to 1 s, and
+    converted segments up to 5% shorter or longer than the originals, as resampling and the
+    voice model leave them.
+
+    Parameters:
+    - n_segments (int): Number of segments to merge.
+    - runs (int): Timed calls per implementation; the median is reported.
+    - sr_orig (int): Sample rate of the original segments.
+    - sr_new (int): Sample rate of the converted segments.
+    - seed (int): Seed of the segment layout and contents.
+
+    Returns:
+    - dict: Whether both outputs are identical, the output length in seconds and the median
+      time in ms of each implementation.
+    """
+    import time
+
+    rng = np.random.default_rng(seed)
+    lengths = (rng.uniform(0.1, 2.5, n_segments) * sr_orig).astype(np.int64)
+    gaps = (rng.uniform(0, 1, n_segments) * sr_orig).astype(np.int64)
+    starts = np.cumsum(gaps) + np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    intervals = np.stack((starts, starts + lengths), axis=1)
+    segments_org = [rng.standard_normal(length, dtype=np.float32) for length in lengths]
+    segments_new = [
+        rng.standard_normal(
+            int(length * sr_new / sr_orig * rng.uniform(0.95, 1.05)), dtype=np.float32
+        )
+        for length in lengths
+    ]
+    args = (segments_org, segments_new, intervals, sr_orig, sr_new)
+
+    def median_ms(function):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            function(*args)
+            times.append(time.perf_counter() - start)
+        return float(np.median(times)) * 1000
+
+    merged = merge_audio(*args)
+    return {
+        "matched": bool(np.array_equal(merged, _merge_audio_concat(*args))),
+        "seconds": merged.shape[0] / sr_new,
+        "concat_ms": median_ms(_merge_audio_concat),
+        "preallocated_ms": median_ms(merge_audio),
+    }
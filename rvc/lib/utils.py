@@ -1,10 +1,10 @@
 import os
 import sys
 import soxr
-import librosa
 import soundfile as sf
 import numpy as np
 import re
+import subprocess
 import unicodedata
 import wget
 from torch import nn
@@ -34,16 +34,124 @@ class HubertModelWithFinalProj(HubertModel):
         self.final_proj = nn.Linear(config.hidden_size, config.classifier_proj_size)
 
 
+def ffmpeg_path():
+    local = os.path.join(now_dir, "ffmpeg.exe")
+    return local if sys.platform == "win32" and os.path.isfile(local) else "ffmpeg"
+
+
+def audio_duration(file):
+    """
+    Returns the duration of an audio file in seconds, or None if soundfile cannot read it.
+
+    Args:
+        file: Path to the audio file.
+    """
+    try:
+        return sf.info(file).duration
+    except Exception:
+        return None
+
+
+def iter_audio(file, sample_rate, block_seconds=10):
+    """
+    Decodes an audio file block by block as mono float32 at `sample_rate`.
+
+    Formats soundfile reads are decoded with `soundfile.blocks` and resampled with a streaming
+    soxr resampler; anything else is decoded, downmixed and resampled by an ffmpeg pipe. Memory
+    stays at one block whatever the length of the file.
+
+    Args:
+        file: Path to the audio file.
+        sample_rate: Sampling rate of the yielded blocks.
+        block_seconds: Seconds of audio per block.
+    """
+    try:
+        sr = sf.info(file).samplerate
+    except Exception:
+        yield from _iter_audio_ffmpeg(file, sample_rate, block_seconds)
+        return
+    resampler = (
+        soxr.ResampleStream(sr, sample_rate, 1, dtype="float32", quality="VHQ")
+        if sr != sample_rate
+        else None
+    )
+    for block in sf.blocks(
+        file, blocksize=int(sr * block_seconds), dtype="float32", always_2d=True
+    ):
+        block = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+        if resampler is not None:
+            block = resampler.resample_chunk(block)
+        if block.shape[0]:
+            yield block
+    if resampler is not None:
+        block = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        if block.shape[0]:
+            yield block
+
+
+def _iter_audio_ffmpeg(file, sample_rate, block_seconds):
+    command = [
+        ffmpeg_path(),
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        file,
+        "-f",
+        "f32le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "-",
+    ]
+    block_bytes = int(sample_rate * block_seconds) * 4
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data[: len(data) // 4 * 4], dtype=np.float32)
+        if process.wait() != 0:
+            raise RuntimeError(process.stderr.read().decode(errors="replace").strip())
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def read_audio(file, sample_rate):
+    """
+    Decodes a whole audio file as mono float32 at `sample_rate`.
+
+    The output array is allocated once from the file's length where soundfile knows it, so the
+    only full-length buffer is the result itself.
+
+    Args:
+        file: Path to the audio file.
+        sample_rate: Sampling rate of the result.
+    """
+    duration = audio_duration(file)
+    if duration is None:
+        blocks = list(iter_audio(file, sample_rate))
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+    # soxr may return a few samples more than the rounded duration.
+    audio = np.empty(int(np.ceil(duration * sample_rate)) + 64, dtype=np.float32)
+    position = 0
+    for block in iter_audio(file, sample_rate):
+        if position + block.shape[0] > audio.shape[0]:
+            audio = np.resize(audio, position + block.shape[0])
+        audio[position : position + block.shape[0]] = block
+        position += block.shape[0]
+    return audio[:position]
+
+
 def load_audio(file, sample_rate):
     try:
         file = file.strip(" ").strip('"').strip("\n").strip('"').strip(" ")
-        audio, sr = sf.read(file)
-        if len(audio.shape) > 1:
-            audio = librosa.to_mono(audio.T)
-        if sr != sample_rate:
-            audio = librosa.resample(
-                audio, orig_sr=sr, target_sr=sample_rate, res_type="soxr_vhq"
-            )
+        audio = read_audio(file, sample_rate)
     except Exception as error:
         raise RuntimeError(f"An error occurred loading the audio: {error}")
 
@@ -60,13 +168,7 @@ def load_audio_infer(
         file = file.strip(" ").strip('"').strip("\n").strip('"').strip(" ")
         if not os.path.isfile(file):
             raise FileNotFoundError(f"File not found: {file}")
-        audio, sr = sf.read(file)
-        if len(audio.shape) > 1:
-            audio = librosa.to_mono(audio.T)
-        if sr != sample_rate:
-            audio = librosa.resample(
-                audio, orig_sr=sr, target_sr=sample_rate, res_type="soxr_vhq"
-            )
+        audio = read_audio(file, sample_rate)
         if formant_shifting:
             formant_qfrency = kwargs.get("formant_qfrency", 0.8)
             formant_timbre = kwargs.get("formant_timbre", 0.8)
@@ -1,13 +1,18 @@
 import os
 import sys
-import faiss
 import numpy as np
 from sklearn.cluster import MiniBatchKMeans
 from multiprocessing import cpu_count
 
+now_dir = os.getcwd()
+sys.path.append(now_dir)
+
+from rvc.infer.retrieval import build_index, tune_index, write_index
+
 # Parse command line arguments
 exp_dir = str(sys.argv[1])
 index_algorithm = str(sys.argv[2])
+index_type = str(sys.argv[3]) if len(sys.argv) > 3 else "IVF-Flat"
 
 try:
     feature_dir = os.path.join(exp_dir, f"extracted")
@@ -48,19 +53,30 @@ try:
                 .cluster_centers_
             )
 
-        n_ivf = min(int(16 * np.sqrt(big_npy.shape[0])), big_npy.shape[0] // 39)
-
-        # index_added
-        index_added = faiss.index_factory(768, f"IVF{n_ivf},Flat")
-        index_ivf_added = faiss.extract_index_ivf(index_added)
-        index_ivf_added.nprobe = 1
-        index_added.train(big_npy)
-
-        batch_size_add = 8192
-        for i in range(0, big_npy.shape[0], batch_size_add):
-            index_added.add(big_npy[i : i + batch_size_add])
+        big_npy = big_npy.astype(np.float32)
+        # The search is tuned with queries the index does not hold yet, as at inference, and
+        # they are only added once it is tuned. big_npy is already shuffled, so its last rows
+        # are a random sample.
+        held_out = min(1000, big_npy.shape[0] // 10)
+        indexed = big_npy[: big_npy.shape[0] - held_out]
+        queries = big_npy[big_npy.shape[0] - held_out :] if held_out else big_npy
+        index_added, index_type = build_index(indexed, index_type)
+        search_params, recall = tune_index(index_added, indexed, queries)
+        if held_out:
+            index_added.add(queries)
+        print(
+            f"{index_type} index tuned to '{search_params or 'defaults'}' "
+            f"(recall@8 {recall:.3f})"
+        )
 
-        faiss.write_index(index_added, index_filepath_added)
+        write_index(
+            index_added,
+            index_filepath_added,
+            index_type,
+            search_params,
+            recall,
+            big_npy,
+        )
         print(f"Saved index file '{index_filepath_added}'")
 
 except Exception as error:
@@ -1,6 +1,7 @@
-import torch
 from datetime import datetime
 
+from rvc.infer.packed import load_checkpoint_metadata
+
 
 def prettify_date(date_str):
     if date_str is None:
@@ -13,7 +14,7 @@ def prettify_date(date_str):
 
 
 def model_information(path):
-    model_data = torch.load(path, map_location="cpu", weights_only=True)
+    model_data = load_checkpoint_metadata(path)
 
     print(f"Loaded model from {path}")
 
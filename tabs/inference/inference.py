@@ -4,7 +4,6 @@ import regex as re
 import shutil
 import datetime
 import json
-import torch
 
 from core import (
     run_infer_script,
@@ -13,6 +12,7 @@ from core import (
 
 from assets.i18n.i18n import I18nAuto
 
+from rvc.infer.packed import load_checkpoint_metadata
 from rvc.lib.utils import format_title
 from tabs.settings.sections.restart import stop_infer
 
@@ -335,9 +335,7 @@ def refresh_embedders_folders():
 def get_speakers_id(model):
     if model:
         try:
-            model_data = torch.load(
-                os.path.join(now_dir, model), map_location="cpu", weights_only=True
-            )
+            model_data = load_checkpoint_metadata(os.path.join(now_dir, model))
             speakers_id = model_data.get("speakers_id")
             if speakers_id:
                 return list(range(speakers_id))